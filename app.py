@@ -3,61 +3,74 @@ from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse
 from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from contextlib import asynccontextmanager
 import asyncio
 
 # Import models in correct order
-from backend.database import get_db, Base, engine
+from backend.database import get_db, get_async_db, Base, engine, SessionLocal
 from backend.models import user_models  # Import user models first
 from backend.models import models  # Then other models
 from backend.schemas import schemas
 from backend.routes.break_routes import router as break_router
 from backend.routes.calendar_routes import router as calendar_router
 from backend.routes.limit_routes import router as limit_router
-from backend.routes.auth_routes import router as auth_router, get_current_user, check_and_award_achievements
+from backend.routes.auth_routes import router as auth_router, get_current_user, get_current_user_async, check_and_award_achievements
 from backend.routes.notification_routes import router as notification_router
+from backend.routes.metrics_routes import router as metrics_router
+from backend.bootstrap import bootstrap
+from backend.core.query_stats import QueryStatsMiddleware
+from backend.core.metrics import RequestMetricsMiddleware
+from backend.services.progress_buffer import progress_buffer, MAX_HEARTBEAT_SECONDS
+from backend.services.reference_data import load_reference_snapshot
 import asyncio
 
-# Create all tables now that all models are imported
-Base.metadata.create_all(bind=engine)
-
-# Initialize default achievements
-user_models.create_default_achievements()
-
-# Initialize default settings
-models.create_tables()
-
 # Lifespan context manager for startup/shutdown events
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Start notification scheduler
+    # Startup: create/seed the database if its stored versions are stale
+    bootstrap()
+    with SessionLocal() as db:
+        load_reference_snapshot(db)
+
+    # Start notification scheduler
     from backend.services.notification_scheduler import scheduler
     asyncio.create_task(scheduler.start())
+
+    # Start the write-behind flusher for assignment progress
+    flusher = asyncio.create_task(progress_buffer.start())
     yield
-    # Shutdown: (Add any cleanup code here if needed)
+    # Shutdown: write any buffered progress before exiting
+    progress_buffer.stop()
+    await flusher
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
 app.include_router(break_router, prefix="/api", tags=["break"])
 app.include_router(calendar_router)
 app.include_router(limit_router, prefix="/api", tags=["limits"])
 app.include_router(auth_router, tags=["auth"])
 app.include_router(notification_router, tags=["notifications"])
+app.include_router(metrics_router, tags=["metrics"])
 
 templates = Jinja2Templates(directory="templates")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 @app.get("/", response_class=HTMLResponse)
-async def index(request: Request, db: Session = Depends(get_db)):
+async def index(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
-        user = get_current_user(request, db)
+        user = await get_current_user_async(request, db)
         if not user:
             return RedirectResponse(url="/login", status_code=302)
 
         # If user is logged in, show only their assignments
-        assignments = db.query(models.Assignment).filter(
-            models.Assignment.user_id == user.id
-        ).all()
+        result = await db.execute(
+            select(models.Assignment).where(models.Assignment.user_id == user.id)
+        )
+        assignments = result.scalars().all()
         
         # Debug: Print assignments to check for data issues
         print(f"Found {len(assignments)} assignments for user {user.username}")
@@ -139,16 +152,25 @@ async def create_assignment(
 
 # Add a route to serve the timer page
 @app.get("/timer", response_class=HTMLResponse)
-async def timer_page(request: Request, db: Session = Depends(get_db)):
-    user = get_current_user(request, db)
+async def timer_page(request: Request, db: AsyncSession = Depends(get_async_db)):
+    user = await get_current_user_async(request, db)
     if not user:
         return RedirectResponse(url="/login", status_code=302)
-    return templates.TemplateResponse(request=request, name="timer.html", context={"request": request, "user": user})
+    # Open assignments for the "Working on" picker; heartbeats report time against the one selected
+    assignments = (await db.scalars(
+        select(models.Assignment)
+        .where(models.Assignment.user_id == user.id, models.Assignment.completed == False)
+        .order_by(models.Assignment.due_date)
+    )).all()
+    return templates.TemplateResponse(
+        request=request, name="timer.html",
+        context={"request": request, "user": user, "assignments": assignments}
+    )
 
 # Add a route to serve the settings page
 @app.get("/settings", response_class=HTMLResponse)
-async def settings_page(request: Request, db: Session = Depends(get_db)):
-    user = get_current_user(request, db)
+async def settings_page(request: Request, db: AsyncSession = Depends(get_async_db)):
+    user = await get_current_user_async(request, db)
     if not user:
         return RedirectResponse(url="/login", status_code=302)
     return templates.TemplateResponse(request=request, name="settings.html", context={"request": request, "user": user})
@@ -156,9 +178,10 @@ async def settings_page(request: Request, db: Session = Depends(get_db)):
 # Assignments API endpoint is now in calendar_routes.py to avoid duplication
 
 @app.get("/api/assignments/debug")
-async def debug_assignments(db: Session = Depends(get_db)):
+async def debug_assignments(db: AsyncSession = Depends(get_async_db)):
     """Debug endpoint to check assignment data"""
-    assignments = db.query(models.Assignment).filter(models.Assignment.completed == False).all()
+    result = await db.execute(select(models.Assignment).where(models.Assignment.completed == False))
+    assignments = result.scalars().all()
     result = []
     for a in assignments:
         result.append({
@@ -174,8 +197,8 @@ async def debug_assignments(db: Session = Depends(get_db)):
     return JSONResponse(content=result)
 
 @app.get("/api/assignments/{assignment_id}")
-async def get_assignment(assignment_id: int, db: Session = Depends(get_db)):
-    assignment = db.query(models.Assignment).filter(models.Assignment.id == assignment_id).first()
+async def get_assignment(assignment_id: int, db: AsyncSession = Depends(get_async_db)):
+    assignment = await db.get(models.Assignment, assignment_id)
     if not assignment:
         raise HTTPException(status_code=404, detail="Assignment not found")
     
@@ -241,31 +264,40 @@ async def update_assignment_progress(
     db: Session = Depends(get_db)
 ):
     """Update assignment progress by adding minutes worked"""
-    assignment = db.query(models.Assignment).filter(models.Assignment.id == assignment_id).first()
-    if not assignment:
+    estimated_time = db.query(models.Assignment.estimated_time).filter(models.Assignment.id == assignment_id).scalar()
+    if estimated_time is None:
         raise HTTPException(status_code=404, detail="Assignment not found")
 
-    was_completed = assignment.completed
-    assignment.time_spent = progress_minutes
-
-    # Mark as completed if time spent >= estimated time
-    if assignment.time_spent >= assignment.estimated_time:
-        assignment.completed = True
-        assignment.status = 'completed'
-    elif assignment.time_spent > 0:
-        assignment.status = 'in_progress'
-
-    db.commit()
-
-    # Award achievements if assignment was just completed
-    if assignment.completed and not was_completed:
-        user = get_current_user(request, db)
-        if user:
-            newly_awarded = check_and_award_achievements(user, db)
+    # Written by the progress buffer together with any other pending updates;
+    # completion status and achievements are handled there too
+    progress_buffer.set_minutes(assignment_id, progress_minutes)
+    await progress_buffer.flush_now(db)
 
     return {
         "status": "success",
-        "time_spent": assignment.time_spent,
-        "estimated_time": assignment.estimated_time,
-        "progress_percent": min(100, (assignment.time_spent / assignment.estimated_time * 100) if assignment.estimated_time > 0 else 0)
+        "time_spent": progress_minutes,
+        "estimated_time": estimated_time,
+        "progress_percent": min(100, (progress_minutes / estimated_time * 100) if estimated_time > 0 else 0)
     }
+
+@app.post("/api/assignments/{assignment_id}/heartbeat", status_code=202)
+async def assignment_heartbeat(assignment_id: int, payload: dict, request: Request,
+                               db: AsyncSession = Depends(get_async_db)):
+    """
+    Report seconds of focused work on one of the user's assignments since
+    the last heartbeat. Buffered in memory and written in the next batch,
+    so a ticking timer doesn't cost a transaction per report.
+    """
+    seconds = payload.get("seconds")
+    if not isinstance(seconds, int) or seconds <= 0 or seconds > MAX_HEARTBEAT_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be 1..{MAX_HEARTBEAT_SECONDS} int")
+    user = await get_current_user_async(request, db)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not logged in")
+    owned = await db.scalar(
+        select(models.Assignment.id).where(models.Assignment.id == assignment_id, models.Assignment.user_id == user.id)
+    )
+    if owned is None:
+        raise HTTPException(status_code=404, detail="Assignment not found")
+    progress_buffer.add_seconds(assignment_id, seconds)
+    return {"status": "queued"}
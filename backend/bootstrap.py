@@ -0,0 +1,210 @@
+"""
+One-shot, versioned database bootstrap
+
+Creates the schema and seeds reference data, recording the applied versions
+in the app_meta table. When the stored versions are current a run costs a
+single SELECT, so it is cheap enough to call on every worker start.
+
+Usage:
+    python -m backend.bootstrap          # apply outstanding schema/seed work
+    python -m backend.bootstrap --force  # re-run schema creation and seeds
+"""
+import argparse
+import time
+from datetime import datetime
+from sqlalchemy import inspect, select, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.orm import Session
+
+from backend.database import Base, engine as default_engine
+from backend.models.meta_models import AppMeta
+
+# Bump SCHEMA_VERSION when the schema changes. create_all() handles new
+# tables; anything else (e.g. a column on an existing table) also needs an
+# idempotent step registered in SCHEMA_MIGRATIONS under the new version.
+SCHEMA_VERSION = 8  # v3: recurring_blocks, v4: calendar_feeds, v6: timer_states (new tables, created by create_all)
+
+
+def _add_calendar_block_owner(conn):
+    """v2: calendar_blocks.user_id, backfilled from the linked assignment"""
+    inspector = inspect(conn)
+    if "user_id" not in {c["name"] for c in inspector.get_columns("calendar_blocks")}:
+        conn.execute(text("ALTER TABLE calendar_blocks ADD COLUMN user_id INTEGER REFERENCES users(id)"))
+    if "ix_calendar_blocks_user_start" not in {i["name"] for i in inspector.get_indexes("calendar_blocks")}:
+        conn.execute(text("CREATE INDEX ix_calendar_blocks_user_start ON calendar_blocks (user_id, start_datetime)"))
+    conn.execute(text(
+        "UPDATE calendar_blocks SET user_id = "
+        "(SELECT assignments.user_id FROM assignments WHERE assignments.id = calendar_blocks.assignment_id) "
+        "WHERE user_id IS NULL AND assignment_id IS NOT NULL"
+    ))
+
+
+def _add_study_session_owner(conn):
+    """v5: study_sessions.user_id, and daily_study_totals built from finished sessions"""
+    from backend.services.study_totals import split_by_day
+
+    inspector = inspect(conn)
+    if "user_id" not in {c["name"] for c in inspector.get_columns("study_sessions")}:
+        conn.execute(text("ALTER TABLE study_sessions ADD COLUMN user_id INTEGER REFERENCES users(id)"))
+    if "ix_study_sessions_user_end" not in {i["name"] for i in inspector.get_indexes("study_sessions")}:
+        conn.execute(text("CREATE INDEX ix_study_sessions_user_end ON study_sessions (user_id, end_time)"))
+    conn.execute(text(
+        "UPDATE study_sessions SET user_id = "
+        "(SELECT assignments.user_id FROM assignments WHERE assignments.id = study_sessions.assignment_id) "
+        "WHERE user_id IS NULL AND assignment_id IS NOT NULL"
+    ))
+
+    # Only seed the totals once; afterwards they are maintained as sessions end
+    if conn.execute(text("SELECT COUNT(*) FROM daily_study_totals")).scalar():
+        return
+    totals = {}
+    sessions = conn.execute(text(
+        "SELECT user_id, start_time, end_time FROM study_sessions WHERE end_time IS NOT NULL"
+    )).all()
+    for user_id, start_time, end_time in sessions:
+        if isinstance(start_time, str):  # SQLite hands back text through a raw query
+            start_time, end_time = datetime.fromisoformat(start_time), datetime.fromisoformat(end_time)
+        for day, seconds in split_by_day(start_time, end_time):
+            totals[(user_id, day)] = totals.get((user_id, day), 0) + int(seconds)
+    if totals:
+        conn.execute(
+            text("INSERT INTO daily_study_totals (user_id, day, seconds) VALUES (:user_id, :day, :seconds)"),
+            [{"user_id": user_id, "day": day, "seconds": seconds} for (user_id, day), seconds in totals.items()]
+        )
+
+
+def _backfill_method_stats(conn):
+    """v7: user_method_stats totals for work sessions recorded before the table existed"""
+    if conn.execute(text("SELECT COUNT(*) FROM user_method_stats")).scalar():
+        return
+    conn.execute(text(
+        "INSERT INTO user_method_stats "
+        "(user_id, method_id, sessions, completed, focus_sum, duration_sum, last_started_at) "
+        "SELECT user_id, method_id, COUNT(*), "
+        "SUM(CASE WHEN completed THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN completed THEN COALESCE(focus_score, 0) ELSE 0 END), "
+        "SUM(CASE WHEN completed THEN COALESCE(actual_duration, 0) ELSE 0 END), "
+        "MAX(started_at) "
+        "FROM work_sessions GROUP BY user_id, method_id"
+    ))
+
+
+def _add_work_session_index(conn):
+    """v8: index work_sessions by owner and start time for the stats and analytics windows"""
+    if "ix_work_sessions_user_started" not in {i["name"] for i in inspect(conn).get_indexes("work_sessions")}:
+        conn.execute(text("CREATE INDEX ix_work_sessions_user_started ON work_sessions (user_id, started_at)"))
+
+
+SCHEMA_MIGRATIONS = {
+    2: _add_calendar_block_owner,
+    5: _add_study_session_owner,
+    7: _backfill_method_stats,
+    8: _add_work_session_index,
+}
+
+# Bump SEED_VERSION whenever the reference data in seed_reference_data changes
+SEED_VERSION = 1
+
+
+def read_versions(bind) -> dict:
+    """Return the stored bookkeeping values, or {} for a fresh database"""
+    try:
+        with bind.connect() as conn:
+            rows = conn.execute(select(AppMeta.key, AppMeta.value)).all()
+    except (OperationalError, ProgrammingError):
+        # app_meta does not exist yet
+        return {}
+    return {key: value for key, value in rows}
+
+
+def _store_version(db: Session, key: str, value: int):
+    row = db.get(AppMeta, key)
+    if row is None:
+        db.add(AppMeta(key=key, value=str(value)))
+    else:
+        row.value = str(value)
+    db.commit()
+
+
+def upgrade_schema(bind, current: int):
+    """Create missing tables, then run migration steps newer than `current`"""
+    import backend.models  # noqa: F401  registers every table on Base.metadata
+
+    Base.metadata.create_all(bind=bind)
+    with bind.begin() as conn:
+        for version in sorted(v for v in SCHEMA_MIGRATIONS if current < v <= SCHEMA_VERSION):
+            SCHEMA_MIGRATIONS[version](conn)
+
+
+def seed_reference_data(db: Session):
+    """
+    Insert default settings, achievements, time methods and tracks.
+
+    Errors propagate, so a failed seed is not recorded and runs again on
+    the next start.
+    """
+    from backend.models.user_models import create_default_achievements
+    from backend.models.models import create_tables
+    from backend.scripts.seed_time_methods import seed_time_methods, seed_default_tracks
+    import backend.services.reference_data  # noqa: F401  bumps the reference version as rows are seeded
+
+    create_default_achievements(db)
+    create_tables(db)
+    seed_time_methods(db)
+    seed_default_tracks(db)
+
+
+def bootstrap(bind=None, force: bool = False) -> dict:
+    """
+    Bring the database up to SCHEMA_VERSION and SEED_VERSION.
+
+    Returns which phases ran, e.g. {"schema": False, "seed": False} when the
+    database was already current.
+    """
+    bind = bind or default_engine
+    versions = {} if force else read_versions(bind)
+    schema_version = int(versions.get("schema_version", 0))
+    seed_version = int(versions.get("seed_version", 0))
+
+    applied = {"schema": False, "seed": False}
+    if schema_version >= SCHEMA_VERSION and seed_version >= SEED_VERSION:
+        return applied
+
+    db = Session(bind=bind)
+    try:
+        if schema_version < SCHEMA_VERSION:
+            upgrade_schema(bind, schema_version)
+            _store_version(db, "schema_version", SCHEMA_VERSION)
+            applied["schema"] = True
+
+        if seed_version < SEED_VERSION:
+            seed_reference_data(db)
+            _store_version(db, "seed_version", SEED_VERSION)
+            applied["seed"] = True
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create and seed the TimeFlow database")
+    parser.add_argument("--force", action="store_true", help="ignore stored versions and re-run everything")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    applied = bootstrap(force=args.force)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if not any(applied.values()):
+        print(f"✓ Database already at schema v{SCHEMA_VERSION}, seed v{SEED_VERSION} ({elapsed_ms:.1f} ms)")
+    else:
+        print(f"✓ Bootstrap complete: schema={'applied' if applied['schema'] else 'current'}, "
+              f"seed={'applied' if applied['seed'] else 'current'} ({elapsed_ms:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,24 @@ class Settings(BaseSettings):
     
     # Database settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./timeflow.db")
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")  # derived from DATABASE_URL when empty
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5  # persistent connections kept per worker
+    DB_MAX_OVERFLOW: int = 10  # extra connections allowed under burst load
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced, -1 disables
+    DB_POOL_PRE_PING: bool = True
+    DB_CONNECT_TIMEOUT: int = 10  # seconds
+    SQL_SLOW_QUERY_MS: int = 200  # statements slower than this are logged
+    SQL_N_PLUS_ONE_THRESHOLD: int = 10  # identical statements per request before warning
+    SQL_QUERY_BUDGET: int = 0  # max statements per request, 0 disables (set in tests)
+    
+    # Calendar settings
+    
+    # Timer settings
+    SETTINGS_CACHE_TTL: int = 60  # seconds a worker trusts its cached settings and break activities
+    PROGRESS_FLUSH_INTERVAL: float = 5.0  # seconds between batched writes of buffered assignment progress
+    REFERENCE_CHECK_INTERVAL: int = 30  # seconds a worker trusts its reference-data snapshot before re-checking the version
     
     # File upload settings
     UPLOAD_FOLDER: str = str(Path(__file__).parent.parent / "uploads")
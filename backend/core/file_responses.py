@@ -0,0 +1,160 @@
+"""
+Seekable file responses
+
+RangeFileResponse serves a file with HTTP Range support (206 Partial
+Content, If-Range), strong ETag / Last-Modified validators answered with
+304, and a caller-chosen Cache-Control. The body goes out through the ASGI
+zero-copy send extension when the server offers it (pathsend for whole
+files), otherwise in chunks read off the event loop.
+"""
+import os
+from email.utils import formatdate, parsedate_to_datetime
+
+import anyio
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+class RangeNotSatisfiable(Exception):
+    """The requested range starts past the end of the file"""
+
+
+def parse_range(header: str, size: int):
+    """
+    Inclusive (start, end) for a single "bytes=" range, or None when the
+    header should be ignored (malformed, another unit, or several ranges,
+    which are answered with the whole file). Raises RangeNotSatisfiable.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if not first:
+            # Suffix range: the final `last` bytes
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                raise RangeNotSatisfiable()
+            return max(size - suffix, 0), size - 1
+        start = int(first)
+        end = int(last) if last else None
+    except ValueError:
+        return None
+    if end is not None and end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class RangeFileResponse(Response):
+    """File response honouring Range, If-Range, If-None-Match and If-Modified-Since"""
+
+    def __init__(
+        self,
+        request: Request,
+        path,
+        media_type: str = None,
+        cache_control: str = IMMUTABLE_CACHE_CONTROL,
+        filename: str = None,
+        background: BackgroundTask = None,
+    ):
+        stat_result = os.stat(path)
+        self.path = path
+        self.size = stat_result.st_size
+        self.range = None
+
+        etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        headers = {
+            "accept-ranges": "bytes",
+            "cache-control": cache_control,
+            "etag": etag,
+            "last-modified": last_modified,
+        }
+        if filename:
+            headers["content-disposition"] = f'inline; filename="{filename}"'
+
+        status_code = 200
+        requested = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        if _not_modified(request, etag, stat_result.st_mtime):
+            status_code = 304
+        # A stale If-Range means the client's partial copy is outdated: send it all
+        elif requested and (if_range is None or if_range in (etag, last_modified)):
+            try:
+                self.range = parse_range(requested, self.size)
+            except RangeNotSatisfiable:
+                status_code = 416
+                headers["content-range"] = f"bytes */{self.size}"
+
+        if self.range is not None:
+            start, end = self.range
+            status_code = 206
+            headers["content-range"] = f"bytes {start}-{end}/{self.size}"
+            headers["content-length"] = str(end - start + 1)
+        elif status_code == 200:
+            headers["content-length"] = str(self.size)
+        elif status_code == 416:
+            headers["content-length"] = "0"
+
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type, background=background)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.status_code in (200, 206) and scope["method"].upper() != "HEAD":
+            await self._send_file(scope, send)
+        else:
+            await send({"type": "http.response.body", "body": b""})
+        if self.background is not None:
+            await self.background()
+
+    async def _send_file(self, scope: Scope, send: Send):
+        start, end = self.range or (0, self.size - 1)
+        count = end - start + 1
+        extensions = scope.get("extensions") or {}
+
+        if "http.response.zerocopysend" in extensions:
+            with open(self.path, "rb") as file:
+                await send({"type": "http.response.zerocopysend", "file": file, "offset": start, "count": count})
+            return
+        if "http.response.pathsend" in extensions and self.range is None:
+            await send({"type": "http.response.pathsend", "path": os.path.abspath(self.path)})
+            return
+
+        async with await anyio.open_file(self.path, "rb") as file:
+            await file.seek(start)
+            remaining = count
+            while remaining > 0:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
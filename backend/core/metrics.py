@@ -0,0 +1,139 @@
+"""
+Request metrics in Prometheus text format
+
+RequestMetricsMiddleware counts requests, tracks in-flight requests and
+records a latency histogram per (method, route template, status class).
+Everything is updated from the worker's event loop thread only, so the
+counters are plain Python ints with no locking; each worker process keeps
+its own set and the scraper sums them.
+"""
+import time
+from bisect import bisect_left
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts are per bucket, made cumulative on export."""
+
+    __slots__ = ("buckets", "sum", "count")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.buckets[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestMetrics:
+    """Per-worker request counters and latency histograms."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.histograms = {}  # (method, route, status class) -> Histogram
+
+    def observe(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route, f"{status // 100}xx")
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+    def reset(self):
+        self.in_flight = 0
+        self.histograms.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+def _label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_label_value(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value))
+
+
+def render_request_metrics(metrics: RequestMetrics = None) -> list:
+    """Prometheus exposition lines for the request counters and histograms."""
+    metrics = metrics or request_metrics
+    items = sorted(metrics.histograms.items())
+    lines = [
+        "# HELP timeflow_http_requests_in_flight Requests currently being served.",
+        "# TYPE timeflow_http_requests_in_flight gauge",
+        f"timeflow_http_requests_in_flight {metrics.in_flight}",
+        "# HELP timeflow_http_requests_total Completed requests.",
+        "# TYPE timeflow_http_requests_total counter",
+    ]
+    for (method, route, status), histogram in items:
+        lines.append(
+            f"timeflow_http_requests_total{_labels(method=method, route=route, status=status)} {histogram.count}"
+        )
+
+    lines += [
+        "# HELP timeflow_http_request_duration_seconds Request latency.",
+        "# TYPE timeflow_http_request_duration_seconds histogram",
+    ]
+    for (method, route, status), histogram in items:
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), histogram.buckets):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else _format_float(bound)
+            labels = _labels(method=method, route=route, status=status, le=le)
+            lines.append(f"timeflow_http_request_duration_seconds_bucket{labels} {cumulative}")
+        labels = _labels(method=method, route=route, status=status)
+        lines.append(f"timeflow_http_request_duration_seconds_sum{labels} {_format_float(histogram.sum)}")
+        lines.append(f"timeflow_http_request_duration_seconds_count{labels} {histogram.count}")
+    return lines
+
+
+def render_gauges(name: str, help_text: str, samples: list) -> list:
+    """Lines for one gauge family; ``samples`` is a list of (labels dict, value)."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(**labels) if labels else ''} {value}")
+    return lines
+
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware feeding ``request_metrics``."""
+
+    def __init__(self, app, metrics: RequestMetrics = None):
+        self.app = app
+        self.metrics = metrics or request_metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        status_code = 500  # reported if the app fails before responding
+        started = time.perf_counter()
+        metrics.in_flight += 1
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.in_flight -= 1
+            # Label by route template so path parameters don't explode cardinality
+            route = getattr(scope.get("route"), "path", "<unmatched>")
+            metrics.observe(scope["method"], route, status_code, time.perf_counter() - started)
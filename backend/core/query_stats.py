@@ -0,0 +1,161 @@
+"""
+Per-request SQL instrumentation
+
+Engine-wide SQLAlchemy cursor events count statements and time spent in the
+database. QueryStatsMiddleware opens a collection scope per HTTP request,
+reports the totals in X-DB-Query-Count / X-DB-Time-Ms response headers,
+logs slow statements and likely N+1 patterns, and keeps per-route totals for
+/api/metrics/db-queries. With SQL_QUERY_BUDGET set (as the test suite does)
+any request issuing more statements than the budget fails loudly.
+"""
+import contextvars
+import logging
+import re
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised when a request issues more SQL statements than SQL_QUERY_BUDGET."""
+
+
+class RequestQueryStats:
+    """Statement count and DB time collected for a single request."""
+
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = {}  # normalized SQL -> times executed
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.seconds += elapsed
+        key = _WHITESPACE.sub(" ", statement).strip()
+        self.statements[key] = self.statements.get(key, 0) + 1
+
+    def repeated(self, threshold: int) -> dict:
+        """Statements executed at least `threshold` times (likely N+1 loops)."""
+        return {sql: n for sql, n in self.statements.items() if n >= threshold}
+
+
+_current_stats = contextvars.ContextVar("request_query_stats", default=None)
+
+# Route template -> aggregate counters. Only touched from the event loop
+# (the middleware), so plain dict updates are safe.
+_route_totals = {}
+
+
+def current_stats():
+    """Stats for the request being served, or None outside a request."""
+    return _current_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started_at"].pop()
+    elapsed = time.perf_counter() - started
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+    if elapsed * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        logger.warning("Slow SQL (%.1f ms): %s", elapsed * 1000, _WHITESPACE.sub(" ", statement)[:500])
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # Keep the timing stack balanced when a statement fails
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started_at"):
+        conn.info["query_started_at"].pop()
+
+
+def _record_route(route: str, stats: RequestQueryStats, n_plus_one: bool):
+    totals = _route_totals.get(route)
+    if totals is None:
+        totals = _route_totals[route] = {
+            "requests": 0,
+            "queries": 0,
+            "queries_max": 0,
+            "db_seconds": 0.0,
+            "n_plus_one_requests": 0,
+        }
+    totals["requests"] += 1
+    totals["queries"] += stats.count
+    totals["queries_max"] = max(totals["queries_max"], stats.count)
+    totals["db_seconds"] += stats.seconds
+    if n_plus_one:
+        totals["n_plus_one_requests"] += 1
+
+
+def get_query_stats() -> dict:
+    """Per-route statement counts and DB time since process start."""
+    return {
+        route: {
+            **totals,
+            "db_seconds": round(totals["db_seconds"], 6),
+            "queries_avg": round(totals["queries"] / totals["requests"], 2),
+        }
+        for route, totals in sorted(_route_totals.items())
+    }
+
+
+def reset_query_stats():
+    _route_totals.clear()
+
+
+class QueryStatsMiddleware:
+    """Pure ASGI middleware that scopes SQL statistics to each HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                budget = settings.SQL_QUERY_BUDGET
+                if budget and stats.count > budget:
+                    raise QueryBudgetExceeded(
+                        f"{scope['method']} {scope['path']} issued {stats.count} SQL statements "
+                        f"(budget {budget})"
+                    )
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.count)
+                headers["X-DB-Time-Ms"] = f"{stats.seconds * 1000:.2f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current_stats.reset(token)
+            repeated = stats.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD)
+            for sql, n in repeated.items():
+                logger.warning("Possible N+1 on %s %s: %d× %s", scope["method"], scope["path"], n, sql[:300])
+            if stats.count:
+                # Key by route template so /api/x/1 and /api/x/2 share a row
+                route = scope.get("route")
+                _record_route(getattr(route, "path", "<unmatched>"), stats, bool(repeated))
@@ -0,0 +1,25 @@
+"""
+Dialect upserts
+INSERT ... ON CONFLICT DO UPDATE (ON DUPLICATE KEY UPDATE on MySQL) for counters added to in SQL
+"""
+
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+
+def upsert(db: Session, table, conflict_columns):
+    """
+    (new, on_conflict) for an insert into `table` on the bound database.
+
+    `new` refers to the row being inserted (excluded / inserted), and
+    `on_conflict(values)` returns the statement that applies `values` when
+    a row with the same `conflict_columns` (a unique key) already exists.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("mysql", "mariadb"):
+        stmt = mysql_insert(table)
+        return stmt.inserted, lambda values: stmt.on_duplicate_key_update(**values)
+    stmt = postgresql_insert(table) if dialect == "postgresql" else sqlite_insert(table)
+    return stmt.excluded, lambda values: stmt.on_conflict_do_update(index_elements=conflict_columns, set_=values)
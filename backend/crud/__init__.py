@@ -1,5 +1,6 @@
 from .music_crud import *
 from .time_crud import *
+from .settings_crud import *
 
 __all__ = [
     # From music_crud
@@ -11,5 +12,11 @@ __all__ = [
     # From time_crud
     'get_time_method', 'get_time_method_by_type', 'get_all_time_methods', 'create_time_method',
     'get_user_preference', 'create_user_preference', 'update_user_preference',
-    'create_work_session', 'get_user_sessions', 'get_user_session_stats', 'recommend_time_method'
+    'create_work_session', 'create_work_sessions_bulk', 'get_user_sessions', 'get_user_session_stats',
+    'get_productivity_analytics', 'compare_time_methods', 'recommend_time_method',
+
+    # From settings_crud
+    'create_default_settings', 'create_default_break_activities', 'get_settings', 'update_settings',
+    'get_break_activities', 'create_break_activity', 'update_break_activity', 'delete_break_activity',
+    'create_study_session', 'end_study_session'
 ]
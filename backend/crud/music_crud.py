@@ -3,12 +3,12 @@ from sqlalchemy import func, and_
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import os
-import shutil
 from pathlib import Path
 
 from ..models.music_models import Track, Playlist, UserCustomTrack, TrackSourceType, playlist_track
 from ..schemas.music_schemas import TrackCreate, PlaylistCreate, PlaylistUpdate, UserCustomTrackCreate, UserCustomTrackUpdate
 from ..core.config import settings
+from ..services.uploads import save_upload, UploadTooLarge
 
 def get_track(db: Session, track_id: int) -> Optional[Track]:
     """Get a track by ID"""
@@ -230,13 +230,13 @@ def reorder_tracks_in_playlist(
     db.commit()
     return True
 
-def create_user_custom_track(
+async def create_user_custom_track(
     db: Session,
     track_data: UserCustomTrackCreate,
     user_id: int,
     file
 ) -> Optional[UserCustomTrack]:
-    """Create a new user-uploaded track"""
+    """Create a new user-uploaded track; raises UploadTooLarge past MAX_CONTENT_LENGTH"""
     # Create the track record
     track = Track(
         title=track_data.title,
@@ -262,24 +262,23 @@ def create_user_custom_track(
     
     # Save the file
     try:
-        # Ensure upload directory exists
         upload_dir = Path(settings.UPLOAD_DIR) / "music" / str(user_id)
-        upload_dir.mkdir(parents=True, exist_ok=True)
         
         # Save file with track ID as filename to avoid conflicts
         file_extension = Path(track_data.file_path).suffix
         filename = f"{track.id}{file_extension}"
-        file_path = upload_dir / filename
+        stored = await save_upload(file, upload_dir, filename=filename)
         
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Update file path in the database
+        # Update file path and size in the database
         custom_track.file_path = str(Path("music") / str(user_id) / filename)
+        custom_track.file_size = stored.size
         
         db.commit()
         db.refresh(track)
         return track
+    except UploadTooLarge:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         print(f"Error saving track file: {e}")
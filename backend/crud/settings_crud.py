@@ -2,6 +2,9 @@ from sqlalchemy.orm import Session
 from datetime import datetime
 from backend.models import models
 from backend.schemas import schemas
+from backend.services.study_totals import record_session
+from backend.services.settings_cache import invalidate_settings_cache
+from backend.services.reference_data import reference_snapshot
 
 def create_default_settings(db: Session):
     """Create default user settings if they don't exist"""
@@ -30,11 +33,12 @@ def create_default_break_activities(db: Session):
     ]
     
     # Only add default activities if none exist
-    if not db.query(models.BreakActivity).first():
+    if not reference_snapshot(db).default_activities and not db.query(models.BreakActivity).first():
         for activity in default_activities:
             db_activity = models.BreakActivity(**activity)
             db.add(db_activity)
         db.commit()
+        invalidate_settings_cache()
     return db.query(models.BreakActivity).all()
 
 def get_settings(db: Session):
@@ -49,6 +53,7 @@ def update_settings(db: Session, settings: schemas.UserSettingsCreate):
         for key, value in settings.model_dump().items():
             setattr(db_settings, key, value)
     db.commit()
+    invalidate_settings_cache()
     db.refresh(db_settings)
     return db_settings
 
@@ -67,6 +72,7 @@ def create_break_activity(db: Session, activity: schemas.BreakActivityCreate):
     db_activity = models.BreakActivity(**activity.model_dump(), settings_id=settings.id)
     db.add(db_activity)
     db.commit()
+    invalidate_settings_cache()
     db.refresh(db_activity)
     return db_activity
 
@@ -76,6 +82,7 @@ def update_break_activity(db: Session, activity_id: int, activity: schemas.Break
         for key, value in activity.model_dump().items():
             setattr(db_activity, key, value)
         db.commit()
+        invalidate_settings_cache()
         db.refresh(db_activity)
         return db_activity
     return None
@@ -85,29 +92,25 @@ def delete_break_activity(db: Session, activity_id: int):
     if activity:
         db.delete(activity)
         db.commit()
+        invalidate_settings_cache()
         return True
     return False
 
-def create_study_session(db: Session, session: schemas.StudySessionCreate):
-    db_session = models.StudySession(**session.dict())
+def create_study_session(db: Session, session: schemas.StudySessionCreate, user_id: int = None):
+    # Time spent on the assignment is reported by timer heartbeats
+    # (POST /api/assignments/{id}/heartbeat), not guessed here
+    db_session = models.StudySession(**session.dict(), user_id=user_id)
     db.add(db_session)
-    
-    # If it's a work session, update the assignment's time_spent
-    if session.session_type == 'work' and session.assignment_id:
-        assignment = db.query(models.Assignment).filter(models.Assignment.id == session.assignment_id).first()
-        if assignment:
-            # For simplicity, we'll just increment by 1 minute for now
-            # In a real app, you'd want to track the actual time spent
-            assignment.time_spent = (assignment.time_spent or 0) + 1
-    
     db.commit()
     db.refresh(db_session)
     return db_session
 
 def end_study_session(db: Session, session_id: int):
     db_session = db.query(models.StudySession).filter(models.StudySession.id == session_id).first()
-    if db_session:
+    if db_session and db_session.end_time is None:
         db_session.end_time = datetime.utcnow()
+        # Ending is the only time a session's duration enters the daily totals
+        record_session(db, db_session)
         db.commit()
         db.refresh(db_session)
     return db_session
@@ -1,7 +1,13 @@
+import numpy as np
+from pydantic import ValidationError
+from sqlalchemy import and_, case, func, insert, or_
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
-from ..models.time_models import TimeMethod, UserMethodPreference, WorkSession, TimeMethodType
+from ..models.time_models import TimeMethod, UserMethodPreference, WorkSession, UserMethodStats, TimeMethodType
+from ..core.cache import LRUCache
+from ..core.upsert import upsert
+from ..services.reference_data import reference_snapshot
 from ..schemas.time_schemas import TimeMethodCreate, WorkSessionBase, UserMethodPreferenceCreate, UserMethodPreferenceUpdate
 
 def get_time_method(db: Session, method_id: int) -> Optional[TimeMethod]:
@@ -9,12 +15,12 @@ def get_time_method(db: Session, method_id: int) -> Optional[TimeMethod]:
     return db.query(TimeMethod).filter(TimeMethod.id == method_id).first()
 
 def get_time_method_by_type(db: Session, method_type: TimeMethodType) -> Optional[TimeMethod]:
-    """Get a time method by type"""
-    return db.query(TimeMethod).filter(TimeMethod.method_type == method_type).first()
+    """Get a time method by type (a read-only record from the reference snapshot)"""
+    return reference_snapshot(db).methods_by_type.get(method_type)
 
 def get_all_time_methods(db: Session, skip: int = 0, limit: int = 100) -> List[TimeMethod]:
-    """Get all time methods with pagination"""
-    return db.query(TimeMethod).offset(skip).limit(limit).all()
+    """Get all time methods with pagination (read-only records from the reference snapshot)"""
+    return list(reference_snapshot(db).time_methods[skip:skip + limit])
 
 def create_time_method(db: Session, method: TimeMethodCreate) -> TimeMethod:
     """Create a new time method"""
@@ -55,10 +61,89 @@ def create_work_session(db: Session, session: WorkSessionBase) -> WorkSession:
     """Create a new work session record"""
     db_session = WorkSession(**session.dict())
     db.add(db_session)
+    _record_method_stats(db, session.user_id, [session])
     db.commit()
     db.refresh(db_session)
     return db_session
 
+def create_work_sessions_bulk(db: Session, user_id: int, items: List[Any]) -> Dict[str, Any]:
+    """
+    Validate and insert many work sessions for one user in a single transaction.
+
+    Method ids are checked against the reference snapshot and valid rows go
+    in as one executemany; each new id is returned with the index of the
+    item it came from. Items that fail are reported by index and skipped.
+    """
+    errors = []
+    sessions = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"index": index, "detail": "each session must be an object"})
+            continue
+        try:
+            # The owner always comes from the caller, never from the payload
+            sessions.append((index, WorkSessionBase(**dict(item, user_id=user_id))))
+        except ValidationError as e:
+            detail = "; ".join(f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors())
+            errors.append({"index": index, "detail": detail})
+
+    known = {method.id for method in reference_snapshot(db).time_methods}
+    valid = []
+    for index, session in sessions:
+        if session.method_id in known:
+            valid.append((index, session))
+        else:
+            errors.append({"index": index, "detail": f"method_id: time method {session.method_id} not found"})
+
+    created = []
+    if valid:
+        ids = db.scalars(insert(WorkSession).returning(WorkSession.id), [session.dict() for _, session in valid])
+        # RETURNING order isn't guaranteed, but the integer key is assigned in
+        # VALUES order and batches run in order, so ascending ids match `valid`.
+        # (sort_by_parameter_order would make SQLite insert one row at a time.)
+        created = [{"index": index, "id": id_} for (index, _), id_ in zip(valid, sorted(ids))]
+        _record_method_stats(db, user_id, [session for _, session in valid])
+        db.commit()
+
+    return {"created": len(created), "sessions": created, "errors": sorted(errors, key=lambda e: e["index"])}
+
+def _record_method_stats(db: Session, user_id: int, sessions):
+    """
+    Fold new sessions into the user's running totals for their methods.
+
+    The batch is summed per method and added in one upsert, so the
+    increments happen in SQL and concurrent writers can't lose each other's.
+    """
+    totals = {}
+    for session in sessions:
+        row = totals.setdefault(session.method_id, {
+            "user_id": user_id, "method_id": session.method_id,
+            "sessions": 0, "completed": 0, "focus_sum": 0.0, "duration_sum": 0, "last_started_at": None,
+        })
+        row["sessions"] += 1
+        if session.completed:
+            row["completed"] += 1
+            row["focus_sum"] += session.focus_score or 0.0
+            row["duration_sum"] += session.actual_duration or 0
+        if session.started_at and (row["last_started_at"] is None or session.started_at > row["last_started_at"]):
+            row["last_started_at"] = session.started_at
+    if not totals:
+        return
+
+    table = UserMethodStats.__table__
+    new, on_conflict = upsert(db, table, [table.c.user_id, table.c.method_id])
+    db.execute(on_conflict({
+        "sessions": table.c.sessions + new.sessions,
+        "completed": table.c.completed + new.completed,
+        "focus_sum": table.c.focus_sum + new.focus_sum,
+        "duration_sum": table.c.duration_sum + new.duration_sum,
+        "last_started_at": case(
+            (or_(table.c.last_started_at.is_(None), new.last_started_at > table.c.last_started_at),
+             new.last_started_at),
+            else_=table.c.last_started_at,
+        ),
+    }), list(totals.values()))
+
 def get_user_sessions(
     db: Session, 
     user_id: int, 
@@ -77,51 +162,327 @@ def get_user_sessions(
     
     return query.order_by(WorkSession.started_at.desc()).offset(offset).limit(limit).all()
 
+def _session_fingerprint(db: Session, user_id: int, before: datetime = None) -> tuple:
+    """
+    (newest session id, session count); changes whenever the user records a
+    session, or with `before` only when one started before that time is recorded
+    """
+    query = db.query(func.max(WorkSession.id), func.count(WorkSession.id)).filter(WorkSession.user_id == user_id)
+    if before is not None:
+        query = query.filter(WorkSession.started_at < before)
+    return tuple(query.one())
+
+# Per-method totals for a user's closed days; today's rows are always re-read.
+# Keys carry the fingerprint of the user's sessions started before today, so
+# a back-dated session recorded by any worker makes the entry miss while
+# today's sessions leave it alone.
+_closed_day_stats = LRUCache(maxsize=1024)
+
+# Heatmaps and trends per user. Keys carry the user's newest session id and
+# session count, so a session recorded by any worker makes the entry miss.
+_analytics_cache = LRUCache(maxsize=512)
+
+def clear_session_stats_cache():
+    _closed_day_stats.clear()
+    _analytics_cache.clear()
+
+def _method_totals(db: Session, user_id: int, start: datetime, end: datetime) -> Dict[int, tuple]:
+    """method_id -> (name, sessions, completed, duration_sum, focus_sum, focus_count) in [start, end)"""
+    completed = WorkSession.completed == True
+    scored = and_(completed, WorkSession.focus_score.isnot(None))
+    rows = db.query(
+        WorkSession.method_id,
+        TimeMethod.name,
+        func.count(WorkSession.id),
+        func.sum(case((completed, 1), else_=0)),
+        func.sum(case((completed, func.coalesce(WorkSession.actual_duration, 0)), else_=0)),
+        func.sum(case((scored, WorkSession.focus_score), else_=0)),
+        func.sum(case((scored, 1), else_=0)),
+    ).join(TimeMethod, TimeMethod.id == WorkSession.method_id).filter(
+        WorkSession.user_id == user_id,
+        WorkSession.started_at >= start,
+        WorkSession.started_at < end,
+    ).group_by(WorkSession.method_id, TimeMethod.name).all()
+    return {row[0]: (row[1], row[2], row[3] or 0, row[4] or 0, row[5] or 0.0, row[6] or 0) for row in rows}
+
 def get_user_session_stats(
     db: Session, 
     user_id: int, 
     days: int = 30
 ) -> Dict[str, Any]:
-    """Get user's work session statistics"""
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=days)
-    
-    sessions = get_user_sessions(db, user_id, start_date, end_date)
-    
-    if not sessions:
+    """
+    Get user's work session statistics for today and the previous `days` full days.
+
+    Aggregated in SQL over the whole window; the closed days come from a
+    cache, so a repeat call only checks the session fingerprint and
+    re-aggregates today's sessions.
+    """
+    now = datetime.utcnow()
+    today = datetime.combine(now.date(), datetime.min.time())
+    start_date = today - timedelta(days=days)
+
+    key = (user_id, *_session_fingerprint(db, user_id, before=today), start_date, today)
+    closed = _closed_day_stats.get(key)
+    if closed is None:
+        closed = _method_totals(db, user_id, start_date, today)
+        _closed_day_stats.set(key, closed)
+    current = _method_totals(db, user_id, today, now + timedelta(seconds=1))
+
+    by_method = {}
+    for totals in (closed, current):
+        for method_id, (name, *values) in totals.items():
+            merged = by_method.setdefault(method_id, [name, 0, 0, 0, 0.0, 0])
+            for i, value in enumerate(values, start=1):
+                merged[i] += value
+
+    total_sessions = sum(m[1] for m in by_method.values())
+    if not total_sessions:
         return {
             "total_sessions": 0,
+            "completed_sessions": 0,
             "total_duration_minutes": 0,
             "avg_duration_minutes": 0,
             "completion_rate": 0,
             "preferred_method": None,
             "focus_score_avg": 0
         }
-    
-    completed_sessions = [s for s in sessions if s.completed]
-    total_duration = sum(s.actual_duration or 0 for s in completed_sessions)
-    
-    # Get most used method
-    method_counts = {}
-    for s in sessions:
-        method_counts[s.method_id] = method_counts.get(s.method_id, 0) + 1
-    
-    preferred_method_id = max(method_counts, key=method_counts.get) if method_counts else None
-    preferred_method = get_time_method(db, preferred_method_id).name if preferred_method_id else None
-    
-    # Calculate focus score average (only for completed sessions with focus score)
-    focus_scores = [s.focus_score for s in completed_sessions if s.focus_score is not None]
-    avg_focus = sum(focus_scores) / len(focus_scores) if focus_scores else 0
-    
+
+    completed_sessions = sum(m[2] for m in by_method.values())
+    total_duration = sum(m[3] for m in by_method.values())
+    focus_sum = sum(m[4] for m in by_method.values())
+    focus_count = sum(m[5] for m in by_method.values())
+    # Most used method; ties go to the lower id so the answer is stable
+    preferred = max(sorted(by_method.items()), key=lambda item: item[1][1])[1][0]
+
     return {
-        "total_sessions": len(sessions),
-        "completed_sessions": len(completed_sessions),
+        "total_sessions": total_sessions,
+        "completed_sessions": completed_sessions,
         "total_duration_minutes": total_duration,
-        "avg_duration_minutes": total_duration / len(completed_sessions) if completed_sessions else 0,
-        "completion_rate": len(completed_sessions) / len(sessions) if sessions else 0,
-        "preferred_method": preferred_method,
-        "focus_score_avg": avg_focus
+        "avg_duration_minutes": total_duration / completed_sessions if completed_sessions else 0,
+        "completion_rate": completed_sessions / total_sessions,
+        "preferred_method": preferred,
+        "focus_score_avg": focus_sum / focus_count if focus_count else 0
+    }
+
+def _session_columns(db: Session, user_id: int, first_day, last_day) -> tuple:
+    """started_at, actual minutes and focus (NaN if unscored) of sessions started in [first_day, last_day]"""
+    rows = db.query(WorkSession.started_at, WorkSession.actual_duration, WorkSession.focus_score).filter(
+        WorkSession.user_id == user_id,
+        WorkSession.started_at >= datetime.combine(first_day, datetime.min.time()),
+        WorkSession.started_at < datetime.combine(last_day + timedelta(days=1), datetime.min.time()),
+    ).all()
+    return (
+        np.array([row[0] for row in rows], dtype="datetime64[s]"),
+        np.array([row[1] or 0 for row in rows], dtype=float),
+        np.array([np.nan if row[2] is None else row[2] for row in rows], dtype=float),
+    )
+
+def _trailing_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Sum of each element and the `window - 1` before it"""
+    totals = np.concatenate(([0.0], np.cumsum(values)))
+    ends = np.arange(1, len(values) + 1)
+    return totals[ends] - totals[np.maximum(ends - window, 0)]
+
+def _nan_to_none(values: np.ndarray, decimals: int = 3) -> list:
+    return np.where(np.isnan(values), None, values.round(decimals)).tolist()
+
+def bin_sessions(
+    started_at: np.ndarray,
+    minutes: np.ndarray,
+    focus: np.ndarray,
+    first_day: np.datetime64,
+    days: int,
+    window: int
+) -> Dict[str, np.ndarray]:
+    """
+    Bin sessions into weekday x hour matrices (Monday first) and per-day
+    series with trailing `window`-day averages. `started_at` is
+    datetime64[s] and `focus` is NaN for sessions without a score; cells
+    and days with no scored session come back as NaN.
+    """
+    day = started_at.astype("datetime64[D]")
+    hour = (started_at - day).astype("timedelta64[h]").astype(np.int64)
+    # 1970-01-01 was a Thursday; shift so Monday is 0 like datetime.weekday()
+    weekday = (day.astype(np.int64) + 3) % 7
+    cell = weekday * 24 + hour
+    scored = (~np.isnan(focus)).astype(float)
+    focus_values = np.nan_to_num(focus)
+
+    focus_sum = np.bincount(cell, weights=focus_values, minlength=7 * 24).reshape(7, 24)
+    focus_count = np.bincount(cell, weights=scored, minlength=7 * 24).reshape(7, 24)
+
+    day_index = (day - first_day).astype(np.int64)
+    daily_minutes = np.bincount(day_index, weights=minutes, minlength=days)
+    rolling_focus_sum = _trailing_sum(np.bincount(day_index, weights=focus_values, minlength=days), window)
+    rolling_focus_count = _trailing_sum(np.bincount(day_index, weights=scored, minlength=days), window)
+    # The first days only have a partial window behind them
+    days_in_window = np.minimum(np.arange(1, days + 1), window)
+
+    return {
+        "minutes": np.bincount(cell, weights=minutes, minlength=7 * 24).reshape(7, 24),
+        "sessions": np.bincount(cell, minlength=7 * 24).reshape(7, 24),
+        "focus": np.divide(focus_sum, focus_count, out=np.full((7, 24), np.nan), where=focus_count > 0),
+        "daily_minutes": daily_minutes,
+        "rolling_minutes": _trailing_sum(daily_minutes, window) / days_in_window,
+        "rolling_focus": np.divide(
+            rolling_focus_sum, rolling_focus_count, out=np.full(days, np.nan), where=rolling_focus_count > 0
+        ),
+    }
+
+def get_productivity_analytics(db: Session, user_id: int, days: int = 90, window: int = 7) -> Dict[str, Any]:
+    """
+    Hour-of-day by weekday heatmaps and daily trends for today and the
+    previous `days - 1` days.
+
+    The sessions are read with one projection query and binned with NumPy;
+    the result is cached until the user records another session.
+    """
+    today = datetime.utcnow().date()
+    first_day = today - timedelta(days=days - 1)
+
+    key = ("analytics", user_id, *_session_fingerprint(db, user_id), first_day, days, window)
+    cached = _analytics_cache.get(key)
+    if cached is not None:
+        return cached
+
+    started_at, minutes, focus = _session_columns(db, user_id, first_day, today)
+    binned = bin_sessions(started_at, minutes, focus, np.datetime64(first_day, "D"), days, window)
+
+    result = {
+        "start_date": first_day.isoformat(),
+        "end_date": today.isoformat(),
+        "window_days": window,
+        "heatmap": {
+            "minutes": binned["minutes"].round(1).tolist(),
+            "sessions": binned["sessions"].tolist(),
+            "focus": _nan_to_none(binned["focus"]),
+        },
+        "trend": {
+            "dates": [(first_day + timedelta(days=i)).isoformat() for i in range(days)],
+            "minutes": binned["daily_minutes"].round(1).tolist(),
+            "rolling_minutes": binned["rolling_minutes"].round(1).tolist(),
+            "rolling_focus": _nan_to_none(binned["rolling_focus"]),
+        },
+    }
+    _analytics_cache.set(key, result)
+    return result
+
+def simulate_methods(
+    budget: np.ndarray,
+    work: np.ndarray,
+    short_break: np.ndarray,
+    long_break: np.ndarray,
+    cycles: np.ndarray
+) -> tuple:
+    """
+    Split each day's minutes into work and breaks under every method at once.
+
+    `budget` holds minutes per day (D,) and the method parameters are (M,);
+    returns (work_minutes, break_minutes), both (M, D). A day is filled with
+    whole rounds of `cycles` work intervals ending in a long break, then
+    whatever part of a round still fits.
+    """
+    budget = budget[np.newaxis, :]
+    work, short_break, long_break, cycles = (a[:, np.newaxis] for a in (work, short_break, long_break, cycles))
+    round_length = cycles * work + (cycles - 1) * short_break + long_break
+    rounds = np.floor(budget / round_length)
+    rest = budget - rounds * round_length
+    pairs = np.minimum(np.floor(rest / (work + short_break)), cycles - 1)
+    tail = rest - pairs * (work + short_break)
+    work_minutes = (rounds * cycles + pairs) * work + np.minimum(tail, work)
+    return work_minutes, budget - work_minutes
+
+def expected_focus(durations: np.ndarray, focus: np.ndarray, interval: np.ndarray) -> np.ndarray:
+    """
+    Focus the user's history predicts for each work interval length: a
+    straight-line fit of focus against session length, evaluated within the
+    observed lengths. Without scored sessions every interval gets 1.0.
+    """
+    scored = ~np.isnan(focus) & (durations > 0)
+    if not scored.any():
+        return np.ones_like(interval)
+    durations, focus = durations[scored], focus[scored]
+    if np.ptp(durations) == 0:
+        return np.full_like(interval, focus.mean())
+    slope, intercept = np.polyfit(durations, focus, 1)
+    return np.clip(intercept + slope * np.clip(interval, durations.min(), durations.max()), 0, 1)
+
+def compare_time_methods(db: Session, user_id: int, days: int = 365) -> Dict[str, Any]:
+    """
+    Replay the user's last `days` days of sessions under every time method.
+
+    Each active day's session minutes are re-split into the method's work
+    intervals and breaks, and the work is weighted by the focus expected for
+    that interval length. Cached until the user records another session.
+    """
+    snapshot = reference_snapshot(db)
+    today = datetime.utcnow().date()
+    first_day = today - timedelta(days=days - 1)
+
+    key = ("simulation", user_id, *_session_fingerprint(db, user_id), snapshot.version, first_day, days)
+    cached = _analytics_cache.get(key)
+    if cached is not None:
+        return cached
+
+    started_at, minutes, focus = _session_columns(db, user_id, first_day, today)
+    day_index = (started_at.astype("datetime64[D]") - np.datetime64(first_day, "D")).astype(np.int64)
+    budget = np.bincount(day_index, weights=minutes, minlength=days)
+    budget = budget[budget > 0]
+    active_days = len(budget)
+
+    # Flowtime has no fixed interval: use the user's typical session and a 1:5 break
+    typical = float(np.median(minutes[minutes > 0])) if (minutes > 0).any() else 25.0
+    methods = snapshot.time_methods
+    work = np.array([m.work_duration or typical for m in methods], dtype=float)
+    short_break = np.array([
+        m.break_duration if m.break_duration is not None else w / 5 for m, w in zip(methods, work)
+    ], dtype=float)
+    long_break = np.array([
+        m.long_break_duration if m.long_break_duration is not None else b for m, b in zip(methods, short_break)
+    ], dtype=float)
+    cycles = np.array([m.cycles_before_long_break or 1 for m in methods], dtype=float)
+
+    work_minutes, break_minutes = simulate_methods(budget, work, short_break, long_break, cycles)
+    method_focus = expected_focus(minutes, focus, work)
+    per_day = max(active_days, 1)
+    work_per_day = work_minutes.sum(axis=1) / per_day
+    break_per_day = break_minutes.sum(axis=1) / per_day
+    focused_per_day = work_per_day * method_focus
+
+    results = [{
+        "method_id": method.id,
+        "name": method.name,
+        "work_interval": round(float(work[i]), 1),
+        "expected_focus": round(float(method_focus[i]), 3),
+        "focused_minutes_per_day": round(float(focused_per_day[i]), 1),
+        "work_minutes_per_day": round(float(work_per_day[i]), 1),
+        "break_minutes_per_day": round(float(break_per_day[i]), 1),
+        "break_overhead": round(float(break_per_day[i] / (budget.sum() / per_day)), 3) if active_days else 0.0,
+    } for i, method in enumerate(methods)]
+    results.sort(key=lambda r: -r["focused_minutes_per_day"])
+
+    result = {
+        "start_date": first_day.isoformat(),
+        "end_date": today.isoformat(),
+        "active_days": active_days,
+        "minutes_per_day": round(float(budget.sum() / per_day), 1),
+        "methods": results,
     }
+    _analytics_cache.set(key, result)
+    return result
+
+def score_methods(completed: np.ndarray, focus_sum: np.ndarray, duration_sum: np.ndarray):
+    """
+    Score every method at once from its totals: 60% average focus, 40%
+    average completed duration (capped at an hour). Returns (scores,
+    average focus); methods without a completed session score -1.
+    """
+    has_completed = completed > 0
+    safe_count = np.where(has_completed, completed, 1)
+    avg_focus = np.where(has_completed, focus_sum / safe_count, 0.0)
+    avg_duration = np.where(has_completed, duration_sum / safe_count, 0.0)
+    scores = avg_focus * 0.6 + np.minimum(avg_duration / 60, 1) * 0.4
+    return np.where(has_completed, scores, -1.0), avg_focus
 
 def recommend_time_method(db: Session, user_id: int) -> Dict[str, Any]:
     """Recommend a time management method based on user's history and preferences"""
@@ -134,12 +495,12 @@ def recommend_time_method(db: Session, user_id: int) -> Dict[str, Any]:
             "reason": "Based on your current preference"
         }
     
-    # Get recent sessions (last 30 days)
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=30)
-    sessions = get_user_sessions(db, user_id, start_date, end_date)
+    # One row per method the user has tried, most recently used first
+    stats = db.query(UserMethodStats).filter(
+        UserMethodStats.user_id == user_id
+    ).order_by(UserMethodStats.last_started_at.desc()).all()
     
-    if not sessions:
+    if not stats:
         # Default to Pomodoro for new users
         default_method = get_time_method_by_type(db, TimeMethodType.POMODORO)
         return {
@@ -148,56 +509,25 @@ def recommend_time_method(db: Session, user_id: int) -> Dict[str, Any]:
             "reason": "Great for getting started with time management"
         }
     
-    # Analyze session data
-    completed_sessions = [s for s in sessions if s.completed]
-    if not completed_sessions:
+    completed = np.array([s.completed for s in stats], dtype=float)
+    if not completed.any():
         # If no completed sessions, suggest the most recent method tried
-        recent_method = sessions[0].method
         return {
-            "method": recent_method,
+            "method": get_time_method(db, stats[0].method_id),
             "confidence": 0.6,
             "reason": "You've tried this method recently"
         }
     
-    # Calculate success rate and focus for each method
-    method_stats = {}
-    for session in completed_sessions:
-        method_id = session.method_id
-        if method_id not in method_stats:
-            method_stats[method_id] = {
-                "count": 0,
-                "total_focus": 0,
-                "total_duration": 0,
-                "completed": 0,
-                "method": session.method
-            }
-        
-        stats = method_stats[method_id]
-        stats["count"] += 1
-        stats["total_duration"] += session.actual_duration or 0
-        
-        if session.focus_score:
-            stats["total_focus"] += session.focus_score
-    
-    # Find the best method based on focus score and completion rate
-    best_method = None
-    best_score = -1
-    best_reason = ""
-    
-    for method_id, stats in method_stats.items():
-        avg_focus = stats["total_focus"] / stats["count"] if stats["count"] > 0 else 0
-        avg_duration = stats["total_duration"] / stats["count"] if stats["count"] > 0 else 0
-        
-        # Simple scoring: 60% focus, 40% duration (normalized)
-        score = (avg_focus * 0.6) + (min(avg_duration / 60, 1) * 0.4)
-        
-        if score > best_score:
-            best_score = score
-            best_method = stats["method"]
-            best_reason = f"Your focus score with this method is {avg_focus:.1f}/1.0"
+    scores, avg_focus = score_methods(
+        completed,
+        np.array([s.focus_sum for s in stats], dtype=float),
+        np.array([s.duration_sum for s in stats], dtype=float),
+    )
+    # argmax keeps the first (most recently used) method on ties
+    best = int(np.argmax(scores))
     
     return {
-        "method": best_method,
-        "confidence": min(best_score, 0.95),  # Cap confidence at 0.95
-        "reason": best_reason
+        "method": get_time_method(db, stats[best].method_id),
+        "confidence": min(float(scores[best]), 0.95),  # Cap confidence at 0.95
+        "reason": f"Your focus score with this method is {avg_focus[best]:.1f}/1.0"
     }
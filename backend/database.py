@@ -1,30 +1,233 @@
 from sqlalchemy import create_engine
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
-import os
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool, StaticPool
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
-SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./timeflow.db")
+from backend.core.config import settings
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
+
+
+class PoolMetrics:
+    """Checkout wait time and saturation counters for one connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.overflow_checkouts = 0  # checkouts served beyond pool_size
+        self.saturated_checkouts = 0  # checkouts that left no free connection
+        self.peak_checked_out = 0
+
+    def record_checkout(self, waited: float, checked_out: int, pool_size: int, capacity: int):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            if waited > self.wait_seconds_max:
+                self.wait_seconds_max = waited
+            if checked_out > pool_size:
+                self.overflow_checkouts += 1
+            if checked_out >= capacity:
+                self.saturated_checkouts += 1
+            if checked_out > self.peak_checked_out:
+                self.peak_checked_out = checked_out
+
+    def record_timeout(self, waited: float):
+        with self._lock:
+            self.timeouts += 1
+            self.wait_seconds_total += waited
+            if waited > self.wait_seconds_max:
+                self.wait_seconds_max = waited
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "overflow_checkouts": self.overflow_checkouts,
+                "saturated_checkouts": self.saturated_checkouts,
+                "peak_checked_out": self.peak_checked_out,
+            }
+
+
+class _InstrumentedPoolMixin:
+    """Records how long callers wait for a connection from a QueuePool."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            conn = super().connect()
+        except sa_exc.TimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - started)
+            raise
+        self.metrics.record_checkout(
+            time.perf_counter() - started,
+            self.checkedout(),
+            self.size(),
+            self.size() + max(self._max_overflow, 0),
+        )
+        return conn
+
+    def recreate(self):
+        # Keep counters across engine.dispose() so metrics stay cumulative
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        return new_pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# Async driver used for each backend when deriving the async URL
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+    "mysql": "aiomysql",
+    "mariadb": "aiomysql",
+}
+
+
+def _connect_args_for(backend: str, driver: str = None) -> dict:
+    """Driver-level connection arguments for the given backend name."""
+    if backend == "sqlite":
+        # Sessions are handed between threadpool workers by FastAPI
+        return {"check_same_thread": False, "timeout": settings.DB_CONNECT_TIMEOUT}
+    if backend == "postgresql" and driver == "asyncpg":
+        return {"timeout": settings.DB_CONNECT_TIMEOUT, "server_settings": {"application_name": settings.PROJECT_NAME}}
+    if backend == "postgresql":
+        return {"connect_timeout": settings.DB_CONNECT_TIMEOUT, "application_name": settings.PROJECT_NAME}
+    if backend in ("mysql", "mariadb"):
+        return {"connect_timeout": settings.DB_CONNECT_TIMEOUT}
+    return {}
+
+
+def _engine_options(url, pool_class) -> dict:
+    """create_engine keyword arguments shared by the sync and async engines."""
+    backend = url.get_backend_name()
+    options = {
+        "echo": settings.DB_ECHO,
+        "connect_args": _connect_args_for(backend, url.get_driver_name()),
+    }
+    if backend == "sqlite" and url.database in (None, "", ":memory:"):
+        options["poolclass"] = StaticPool
+    else:
+        options.update(
+            poolclass=pool_class,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    return options
+
+
+def create_db_engine(database_url: str = None, **overrides):
+    """
+    Create an engine for ``database_url`` configured from ``backend.core.config``.
+
+    SQLite in-memory databases share a single connection (StaticPool); every
+    other URL gets an instrumented QueuePool sized by the DB_POOL_* settings.
+    Keyword ``overrides`` are passed straight to ``create_engine``.
+    """
+    url = make_url(database_url or SQLALCHEMY_DATABASE_URL)
+    options = _engine_options(url, InstrumentedQueuePool)
+    options.update(overrides)
+    return create_engine(url, **options)
+
+
+def to_async_url(database_url: str):
+    """Swap the driver of a sync database URL for its asyncio counterpart."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for backend '{backend}'")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def create_async_db_engine(database_url: str = None, **overrides):
+    """Async counterpart of ``create_db_engine`` with the same pool settings."""
+    url = make_url(database_url or settings.ASYNC_DATABASE_URL or to_async_url(SQLALCHEMY_DATABASE_URL))
+    options = _engine_options(url, InstrumentedAsyncQueuePool)
+    options.update(overrides)
+    return create_async_engine(url, **options)
+
+
+def get_pool_stats(bind=None) -> dict:
+    """Current occupancy and checkout metrics of an engine's pool."""
+    # AsyncEngine wraps a regular Engine that owns the pool
+    pool = getattr(bind or engine, "sync_engine", bind or engine).pool
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        size = pool.size()
+        max_overflow = max(pool._max_overflow, 0)
+        checked_out = pool.checkedout()
+        stats.update({
+            "pool_size": size,
+            "max_overflow": max_overflow,
+            "checked_out": checked_out,
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "saturation": round(checked_out / (size + max_overflow), 4) if size + max_overflow else 0.0,
+        })
+    if isinstance(pool, _InstrumentedPoolMixin):
+        stats.update(pool.metrics.snapshot())
+    return stats
+
+
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# The async engine is created on first use so the async driver is only
+# required by processes that actually serve async routes.
+_async_engine = None
+AsyncSessionLocal = None
+
+
+def get_async_engine():
+    """Return the shared async engine, creating it on first call."""
+    global _async_engine, AsyncSessionLocal
+    if _async_engine is None:
+        _async_engine = create_async_db_engine()
+        AsyncSessionLocal = async_sessionmaker(
+            _async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
 def init_db():
     """Initialize the database by importing all models and creating tables."""
     # Import all models to ensure they are registered with SQLAlchemy
     from backend.models.user_models import User, Achievement, UserAchievement
-    from backend.models.time_models import TimeMethod, UserMethodPreference, WorkSession, TimeMethodType
+    from backend.models.time_models import TimeMethod, UserMethodPreference, WorkSession, TimeMethodType, UserMethodStats, UserTimerState
     from backend.models.music_models import Track, Playlist, TrackSourceType, UserCustomTrack
-    from backend.models.calendar_models import CalendarBlock
+    from backend.models.calendar_models import CalendarBlock, RecurringBlock, CalendarFeed
     from backend.models.notification_models import NotificationRule, Notification, NotificationPreference
-    from backend.models.limit_models import DailyLimitSetting
+    from backend.models.limit_models import DailyLimitSetting, DailyStudyTotal
     from backend.models.sprint_models import Sprint, Task
-    
+
     # Create all tables
     Base.metadata.create_all(bind=engine)
 
@@ -34,4 +237,10 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """Dependency to get an AsyncSession for async route handlers."""
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
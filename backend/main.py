@@ -17,9 +17,13 @@ music_uploads_dir = uploads_dir / "music"
 os.makedirs(music_uploads_dir, exist_ok=True)
 
 # Import routers after setting up paths
-from backend.routes import music, time_routes, auth_routes, break_routes, calendar_routes, limit_routes, notification_routes
-from backend.database import init_db, SessionLocal, Base, engine
-from backend.scripts.seed_time_methods import seed_time_methods, seed_default_tracks
+from backend.routes import music, music_routes, time_routes, auth_routes, break_routes, calendar_routes, limit_routes, notification_routes, metrics_routes
+from backend.database import engine
+from backend.bootstrap import bootstrap
+from backend.database import SessionLocal
+from backend.services.reference_data import load_reference_snapshot
+from backend.core.query_stats import QueryStatsMiddleware
+from backend.core.metrics import RequestMetricsMiddleware
 
 app = FastAPI(
     title="TimeFlow API",
@@ -35,15 +39,21 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
 
 # Include routers
 app.include_router(time_routes.router)
 app.include_router(music.router)
+# Track/playlist detail and streaming (/tracks/{id}/play); the paths it shares
+# with music.router above keep music.router's handlers, which match first
+app.include_router(music_routes.router)
 app.include_router(auth_routes.router)
 app.include_router(break_routes.router)
 app.include_router(calendar_routes.router)
 app.include_router(limit_routes.router)
 app.include_router(notification_routes.router)
+app.include_router(metrics_routes.router)
 
 # Serve static files (for uploaded music)
 app.mount("/uploads", StaticFiles(directory=str(uploads_dir)), name="uploads")
@@ -59,38 +69,29 @@ async def root():
 async def startup_event():
     """Initialize the application on startup"""
     try:
-        # Initialize the database
-        init_db()
-
-        # Seed initial data
-        db = SessionLocal()
-        try:
-            # Seed time management methods
-            seed_time_methods()
-
-            # Seed default tracks and playlist
-            seed_default_tracks(db)
-
-            print("\n=== TimeFlow API Started Successfully ===")
-            print(f"Database: {engine.url}")
-            print("\nAvailable endpoints:")
-            print("  - GET    /api/time-methods/")
-            print("  - GET    /api/time-methods/user-preferences?user_id=1")
-            print("  - PUT    /api/time-methods/user-preferences")
-            print("  - GET    /api/music/playlists?user_id=1")
-            print("  - POST   /api/music/playlists")
-            print("  - POST   /api/music/tracks/upload")
-            print("  - GET    /api/music/playlists/{playlist_id}/tracks")
-            print("  - DELETE /api/music/tracks/{track_id}")
-            print("\nAPI documentation available at /docs or /redoc")
-        except Exception as e:
-            print(f"Error during startup: {e}")
-        finally:
-            db.close()
+        # Create and seed the database unless the stored versions are current
+        applied = bootstrap()
+        with SessionLocal() as db:
+            load_reference_snapshot(db)
     except Exception as e:
         print(f"Failed to initialize database: {e}")
         raise
 
+    print("\n=== TimeFlow API Started Successfully ===")
+    print(f"Database: {engine.url}")
+    print(f"Bootstrap: schema {'applied' if applied['schema'] else 'current'}, seed {'applied' if applied['seed'] else 'current'}")
+    print("\nAvailable endpoints:")
+    print("  - GET    /api/time-methods/")
+    print("  - GET    /api/time-methods/user-preferences?user_id=1")
+    print("  - PUT    /api/time-methods/user-preferences")
+    print("  - GET    /api/music/playlists?user_id=1")
+    print("  - POST   /api/music/playlists")
+    print("  - POST   /api/music/tracks/upload")
+    print("  - GET    /api/music/playlists/{playlist_id}/tracks")
+    print("  - DELETE /api/music/tracks/{track_id}")
+    print("  - GET    /api/music/tracks/{track_id}/play")
+    print("\nAPI documentation available at /docs or /redoc")
+
 
 # Add a simple health check endpoint
 @app.get("/health")
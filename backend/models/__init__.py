@@ -4,12 +4,13 @@ from sqlalchemy.orm import relationship
 # Import all models
 from .user_models import User, Achievement, UserAchievement
 from .models import Assignment, UserSettings, BreakActivity, StudySession, create_tables
-from .calendar_models import CalendarBlock
-from .limit_models import DailyLimitSetting
+from .calendar_models import CalendarBlock, RecurringBlock, CalendarFeed
+from .limit_models import DailyLimitSetting, DailyStudyTotal
 from .sprint_models import Sprint, Task
 from .notification_models import NotificationRule, Notification, NotificationPreference, create_default_notification_rules
 from .music_models import Playlist, Track, UserCustomTrack
-from .time_models import TimeMethod, UserMethodPreference, WorkSession
+from .time_models import TimeMethod, UserMethodPreference, WorkSession, UserMethodStats, UserTimerState
+from .meta_models import AppMeta
 
 def setup_relationships():
     """Set up all model relationships to avoid circular imports"""
@@ -37,10 +38,10 @@ setup_relationships()
 __all__ = [
     'Base', 'engine', 'SessionLocal',
     'Assignment', 'UserSettings', 'BreakActivity', 'StudySession',
-    'CalendarBlock', 'DailyLimitSetting', 'Sprint', 'Task',
+    'CalendarBlock', 'RecurringBlock', 'CalendarFeed', 'DailyLimitSetting', 'DailyStudyTotal', 'Sprint', 'Task',
     'User', 'Achievement', 'UserAchievement',
     'NotificationRule', 'Notification', 'NotificationPreference',
-    'Playlist', 'Track', 'TimeMethod', 'UserMethodPreference', 'WorkSession',
-    'UserCustomTrack',
+    'Playlist', 'Track', 'TimeMethod', 'UserMethodPreference', 'WorkSession', 'UserMethodStats', 'UserTimerState',
+    'UserCustomTrack', 'AppMeta',
     'create_default_notification_rules', 'create_tables', 'setup_relationships'
 ]
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from datetime import datetime
 from sqlalchemy.orm import relationship
 from backend.database import Base
 
 class CalendarBlock(Base):
     __tablename__ = "calendar_blocks"
+    __table_args__ = (
+        Index("ix_calendar_blocks_user_start", "user_id", "start_datetime"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -11,5 +15,31 @@ class CalendarBlock(Base):
     end_datetime = Column(DateTime, nullable=False)
     block_type = Column(String, nullable=False)  # 'busy' or 'study'
     assignment_id = Column(Integer, ForeignKey('assignments.id'), nullable=True)
+    # Owner; NULL for blocks created without a login (shared anonymous calendar)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=True)
 
     assignment = relationship("Assignment", backref="calendar_blocks", foreign_keys=[assignment_id])
+
+
+class RecurringBlock(Base):
+    """A repeating block stored once; occurrences are expanded per requested window."""
+    __tablename__ = "recurring_blocks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    title = Column(String, nullable=False)
+    block_type = Column(String, nullable=False)  # 'busy', 'study' or 'break'
+    start_datetime = Column(DateTime, nullable=False)  # first occurrence
+    duration_minutes = Column(Integer, nullable=False)
+    rrule = Column(String(200), nullable=False)  # e.g. "FREQ=WEEKLY;BYDAY=MO,WE"
+    assignment_id = Column(Integer, ForeignKey('assignments.id'), nullable=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=True, index=True)
+
+
+class CalendarFeed(Base):
+    """Secret per-user token for the subscribable .ics feed, plus a version bumped on every change."""
+    __tablename__ = "calendar_feeds"
+
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    token = Column(String(64), unique=True, nullable=False, index=True)
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
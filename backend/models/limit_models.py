@@ -1,9 +1,17 @@
-from sqlalchemy import Column, Integer
-from backend.models.models import Base, engine  # reuse existing Base/engine
+from sqlalchemy import Column, Integer, Date, ForeignKey, UniqueConstraint
+from backend.models.models import Base  # reuse existing Base
 
 class DailyLimitSetting(Base):
     __tablename__ = "daily_limit_setting"
     id = Column(Integer, primary_key=True, index=True)
     daily_limit_minutes = Column(Integer, nullable=False, default=180)
 
-Base.metadata.create_all(bind=engine)
+class DailyStudyTotal(Base):
+    """Finished study time per user per day, maintained as sessions end"""
+    __tablename__ = "daily_study_totals"
+    __table_args__ = (UniqueConstraint("user_id", "day", name="uq_daily_study_totals_user_day"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # None: sessions started while logged out
+    day = Column(Date, nullable=False)
+    seconds = Column(Integer, nullable=False, default=0)
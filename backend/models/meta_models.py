@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime
+from backend.database import Base
+
+class AppMeta(Base):
+    """Key/value store for application bookkeeping such as schema and seed versions"""
+    __tablename__ = "app_meta"
+
+    key = Column(String(50), primary_key=True)
+    value = Column(String(200), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
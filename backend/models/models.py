@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Float
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from typing import List
@@ -44,6 +44,10 @@ class StudySession(Base):
     end_time = Column(DateTime)
     session_type = Column(String(20), nullable=False)  # 'work', 'short_break', 'long_break'
     assignment_id = Column(Integer, ForeignKey('assignments.id'), nullable=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=True)
+
+    # Finds a user's running sessions without scanning their history
+    __table_args__ = (Index("ix_study_sessions_user_end", "user_id", "end_time"),)
     
     # Relationships
     assignment = relationship("Assignment", back_populates="study_sessions")
@@ -75,9 +79,11 @@ class Assignment(Base):
     study_sessions = relationship("StudySession", back_populates="assignment")
 
 # Create all tables
-def create_tables():
+def create_tables(db=None):
     # Create default user settings if they don't exist
-    db = SessionLocal()
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
     try:
         settings = db.query(UserSettings).first()
         if not settings:
@@ -108,5 +114,8 @@ def create_tables():
     except Exception as e:
         print(f"Error creating default settings: {e}")
         db.rollback()
+        if not own_session:
+            raise  # let the caller (e.g. bootstrap) see the seed failed
     finally:
-        db.close()
+        if own_session:
+            db.close()
@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text
 from sqlalchemy.orm import relationship
-from backend.models.models import Base, engine
+from backend.models.models import Base
 from datetime import datetime
 
 class Sprint(Base):
@@ -44,6 +44,3 @@ class Task(Base):
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-
-# Create tables
-Base.metadata.create_all(bind=engine)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -40,6 +40,7 @@ class UserMethodPreference(Base):
 class WorkSession(Base):
     """Record of completed work sessions for recommendations"""
     __tablename__ = "work_sessions"
+    __table_args__ = (Index("ix_work_sessions_user_started", "user_id", "started_at"),)
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -56,6 +57,43 @@ class WorkSession(Base):
     user = relationship("User", back_populates="work_sessions")
     method = relationship("TimeMethod")
 
+class UserMethodStats(Base):
+    """Running totals of a user's work sessions with one method, kept for recommendations"""
+    __tablename__ = "user_method_stats"
+    __table_args__ = (UniqueConstraint("user_id", "method_id", name="uq_user_method_stats"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    method_id = Column(Integer, ForeignKey("time_methods.id"), nullable=False)
+    sessions = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    focus_sum = Column(Float, nullable=False, default=0.0)  # over completed sessions
+    duration_sum = Column(Integer, nullable=False, default=0)  # minutes, over completed sessions
+    last_started_at = Column(DateTime, nullable=True)
+
+class UserTimerState(Base):
+    """
+    A user's focus timer, stored as phase + start timestamp.
+
+    Remaining time is derived on read (backend/services/timer_state.py), so a
+    running timer is never written to until its state actually changes.
+    """
+    __tablename__ = "timer_states"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    method = Column(String(50), nullable=False, default="pomodoro")
+    phase = Column(String(20), nullable=False, default="work")  # 'work', 'short_break', 'long_break'
+    status = Column(String(10), nullable=False, default="idle")  # 'idle', 'running', 'paused'
+    started_at = Column(DateTime, nullable=True)  # while running: now minus time already elapsed
+    elapsed_seconds = Column(Integer, nullable=False, default=0)  # while paused
+    work_seconds = Column(Integer, nullable=True)  # None counts up (Flowtime)
+    short_break_seconds = Column(Integer, nullable=False, default=5 * 60)
+    long_break_seconds = Column(Integer, nullable=False, default=15 * 60)
+    cycles_before_long_break = Column(Integer, nullable=False, default=4)
+    completed_intervals = Column(Integer, nullable=False, default=0)
+    version = Column(Integer, nullable=False, default=1)  # bumped on every transition
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 # Update User model relationships
 # class User:
 #     # ... existing fields ...
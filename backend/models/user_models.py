@@ -74,11 +74,13 @@ class UserAchievement(Base):
     achievement = relationship("Achievement", back_populates="user_achievements")
 
 
-def create_default_achievements():
+def create_default_achievements(db=None):
     """Create default achievements for the gamification system"""
     from backend.models.models import SessionLocal
 
-    db = SessionLocal()
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
     try:
         # Check if achievements already exist
         existing = db.query(Achievement).first()
@@ -169,5 +171,8 @@ def create_default_achievements():
     except Exception as e:
         print(f"Error creating default achievements: {e}")
         db.rollback()
+        if not own_session:
+            raise  # let the caller (e.g. bootstrap) see the seed failed
     finally:
-        db.close()
+        if own_session:
+            db.close()
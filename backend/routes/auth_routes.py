@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Form
-from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse
+from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse, Response
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from backend.database import get_db
-from backend.models.user_models import User, Achievement, UserAchievement
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from backend.database import get_db, get_async_db
+from backend.models.user_models import User, UserAchievement
 from backend.models.models import Assignment
 from backend.models.notification_models import create_default_notification_rules
+from backend.services.reference_data import reference_snapshot
 from datetime import datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -50,6 +53,19 @@ def get_current_user(request: Request, db: Session = Depends(get_db)):
     return user
 
 
+async def get_current_user_async(request: Request, db: AsyncSession, *options):
+    """Async variant of get_current_user for handlers using an AsyncSession.
+
+    Extra loader ``options`` (e.g. selectinload) are applied to the User load,
+    since relationships cannot be lazy-loaded on an AsyncSession.
+    """
+    session_token = request.cookies.get("session_token")
+    if not session_token or session_token not in active_sessions:
+        return None
+
+    return await db.get(User, active_sessions[session_token], options=options)
+
+
 def require_login(request: Request, db: Session = Depends(get_db)):
     """Require user to be logged in"""
     user = get_current_user(request, db)
@@ -68,7 +84,7 @@ def check_and_award_achievements(user: User, db: Session):
     ).count()
 
     # Get all achievements
-    achievements = db.query(Achievement).all()
+    achievements = reference_snapshot(db).achievements
 
     # Get achievements user already has
     user_achievement_ids = [ua.achievement_id for ua in user.achievements]
@@ -258,9 +274,11 @@ async def logout(request: Request):
 
 
 @router.get("/api/profile")
-async def get_profile(request: Request, db: Session = Depends(get_db)):
+async def get_profile(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get current user's profile with gamification stats"""
-    user = get_current_user(request, db)
+    user = await get_current_user_async(
+        request, db, selectinload(User.achievements).selectinload(UserAchievement.achievement)
+    )
     if not user:
         raise HTTPException(status_code=401, detail="Not logged in")
 
@@ -288,9 +306,10 @@ async def get_profile(request: Request, db: Session = Depends(get_db)):
 
 
 @router.get("/profile", response_class=HTMLResponse)
-async def profile_page(request: Request, db: Session = Depends(get_db)):
+async def profile_page(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Show user profile page"""
-    user = get_current_user(request, db)
+    # The template counts achievements, which can't be lazy-loaded here
+    user = await get_current_user_async(request, db, selectinload(User.achievements))
     if not user:
         return RedirectResponse(url="/login", status_code=303)
 
@@ -305,34 +324,47 @@ async def profile_page(request: Request, db: Session = Depends(get_db)):
 
 
 @router.get("/api/leaderboard")
-async def get_leaderboard(db: Session = Depends(get_db)):
+async def get_leaderboard(db: AsyncSession = Depends(get_async_db)):
     """Get leaderboard of top users by points"""
-    users = db.query(User).order_by(User.total_points.desc()).limit(20).all()
+    # Counts come from correlated subqueries so the page costs one query
+    # instead of one per listed user.
+    assignments_completed = (
+        select(func.count(Assignment.id))
+        .where(Assignment.user_id == User.id, Assignment.completed == True)
+        .correlate(User)
+        .scalar_subquery()
+    )
+    achievements_count = (
+        select(func.count(UserAchievement.id))
+        .where(UserAchievement.user_id == User.id)
+        .correlate(User)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(User, assignments_completed, achievements_count)
+        .order_by(User.total_points.desc())
+        .limit(20)
+    )
 
     leaderboard = []
-    for rank, user in enumerate(users, start=1):
-        assignments_completed = db.query(Assignment).filter(
-            Assignment.user_id == user.id,
-            Assignment.completed == True
-        ).count()
-
+    for rank, (user, completed, achievements) in enumerate(result.all(), start=1):
         leaderboard.append({
             "rank": rank,
             "username": user.username,
             "total_points": user.total_points,
             "current_streak": user.current_streak,
             "longest_streak": user.longest_streak,
-            "assignments_completed": assignments_completed,
-            "achievements_count": len(user.achievements)
+            "assignments_completed": completed,
+            "achievements_count": achievements
         })
 
     return leaderboard
 
 
 @router.get("/leaderboard", response_class=HTMLResponse)
-async def leaderboard_page(request: Request, db: Session = Depends(get_db)):
+async def leaderboard_page(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Show leaderboard page"""
-    user = get_current_user(request, db)
+    user = await get_current_user_async(request, db)
     if not user:
         return RedirectResponse(url="/login", status_code=303)
 
@@ -347,19 +379,10 @@ async def leaderboard_page(request: Request, db: Session = Depends(get_db)):
 
 
 @router.get("/api/achievements")
-async def get_all_achievements(db: Session = Depends(get_db)):
+async def get_all_achievements(db: AsyncSession = Depends(get_async_db)):
     """Get all available achievements"""
-    achievements = db.query(Achievement).all()
-
-    return [{
-        "id": ach.id,
-        "name": ach.name,
-        "description": ach.description,
-        "icon": ach.icon,
-        "points": ach.points,
-        "requirement_type": ach.requirement_type,
-        "requirement_value": ach.requirement_value
-    } for ach in achievements]
+    snapshot = await db.run_sync(reference_snapshot)
+    return Response(content=snapshot.achievements_json, media_type="application/json")
 
 
 @router.get("/forgot-password", response_class=HTMLResponse)
@@ -435,9 +458,9 @@ async def reset_password(
 # Account Settings Endpoints
 
 @router.get("/account-settings", response_class=HTMLResponse)
-async def account_settings_page(request: Request, db: Session = Depends(get_db)):
+async def account_settings_page(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Show account settings page"""
-    user = get_current_user(request, db)
+    user = await get_current_user_async(request, db)
     if not user:
         return RedirectResponse(url="/login", status_code=303)
 
@@ -452,9 +475,9 @@ async def account_settings_page(request: Request, db: Session = Depends(get_db))
 
 
 @router.get("/api/account")
-async def get_account_info(request: Request, db: Session = Depends(get_db)):
+async def get_account_info(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get current user's account information"""
-    user = get_current_user(request, db)
+    user = await get_current_user_async(request, db)
     if not user:
         raise HTTPException(status_code=401, detail="Not logged in")
 
@@ -1,23 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import timezone
 
 # Import using absolute paths
 from backend.models import models
+from backend.models.time_models import UserTimerState
 from backend.schemas import schemas
 from backend import crud
 from backend.database import get_db
+from backend.routes.auth_routes import get_current_user
+from backend.services.settings_cache import read_through, etag_for
+from backend.services.timer_state import ACTIONS as TIMER_ACTIONS, apply_action, evaluate, new_timer_state
 
 router = APIRouter()
 
 # Settings endpoints
+def _cached_response(request: Request, entry):
+    """The cached payload as JSON, or 304 when the client already has this version"""
+    etag = etag_for(entry)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(entry.payload, headers=headers)
+
 @router.get("/settings/", response_model=schemas.UserSettings)
-def read_settings(db: Session = Depends(get_db)):
-    settings = crud.get_settings(db)
-    if not settings:
-        # Create default settings if they don't exist
-        settings = crud.update_settings(db, schemas.UserSettingsCreate())
-    return settings
+def read_settings(request: Request, db: Session = Depends(get_db)):
+    def load():
+        settings = crud.get_settings(db)
+        if not settings:
+            # Create default settings if they don't exist
+            settings = crud.update_settings(db, schemas.UserSettingsCreate())
+        return schemas.UserSettings.model_validate(settings).model_dump(mode="json")
+    return _cached_response(request, read_through("settings", load))
 
 @router.put("/settings/", response_model=schemas.UserSettings)
 def update_user_settings(settings: schemas.UserSettingsCreate, db: Session = Depends(get_db)):
@@ -25,8 +42,11 @@ def update_user_settings(settings: schemas.UserSettingsCreate, db: Session = Dep
 
 # Break activities endpoints
 @router.get("/break-activities/", response_model=List[schemas.BreakActivity])
-def list_break_activities(activity_type: str = None, db: Session = Depends(get_db)):
-    return crud.get_break_activities(db, activity_type)
+def list_break_activities(request: Request, activity_type: str = None, db: Session = Depends(get_db)):
+    def load():
+        return [schemas.BreakActivity.model_validate(a).model_dump(mode="json")
+                for a in crud.get_break_activities(db, activity_type)]
+    return _cached_response(request, read_through(("break_activities", activity_type), load))
 
 @router.post("/break-activities/", response_model=schemas.BreakActivity)
 def create_break_activity(activity: schemas.BreakActivityCreate, db: Session = Depends(get_db)):
@@ -47,8 +67,9 @@ def delete_break_activity(activity_id: int, db: Session = Depends(get_db)):
 
 # Study sessions endpoints
 @router.post("/study-sessions/", response_model=schemas.StudySession)
-def create_study_session(session: schemas.StudySessionCreate, db: Session = Depends(get_db)):
-    return crud.create_study_session(db, session)
+def create_study_session(session: schemas.StudySessionCreate, request: Request, db: Session = Depends(get_db)):
+    user = get_current_user(request, db)
+    return crud.create_study_session(db, session, user_id=user.id if user else None)
 
 @router.post("/study-sessions/{session_id}/end", response_model=schemas.StudySession)
 def end_study_session(session_id: int, db: Session = Depends(get_db)):
@@ -58,14 +79,51 @@ def end_study_session(session_id: int, db: Session = Depends(get_db)):
     return session
 
 # Timer state endpoints
+def _timer_response(request: Request, state: UserTimerState):
+    """The timer evaluated now, with UTC timestamps and an ETag of its version and evaluated status"""
+    snapshot = evaluate(state)
+    for key in ("started_at", "ends_at"):
+        if snapshot[key] is not None:
+            snapshot[key] = snapshot[key].replace(tzinfo=timezone.utc)
+    # A running phase turns complete without a write, so the version alone can't validate the body
+    etag = f'"timer-{state.user_id}-{state.version}-{snapshot["status"]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    body = schemas.TimerState(**snapshot).model_dump(mode="json")
+    return JSONResponse(body, headers=headers)
+
 @router.get("/timer/state", response_model=schemas.TimerState)
-def get_timer_state():
-    # In a real app, you'd get this from a persistent store or WebSocket
-    return {
-        "is_running": False,
-        "is_break": False,
-        "is_long_break": False,
-        "time_remaining": 0,
-        "current_interval": 0,
-        "total_intervals": 0
-    }
+def get_timer_state(request: Request, db: Session = Depends(get_db)):
+    """
+    The user's timer evaluated at request time. One primary-key lookup and
+    no writes, so open tabs can resync cheaply (304 while nothing changed).
+    """
+    user = get_current_user(request, db)
+    state = (db.get(UserTimerState, user.id) if user else None) or new_timer_state(user.id if user else None)
+    return _timer_response(request, state)
+
+@router.post("/timer/{action}", response_model=schemas.TimerState)
+def timer_action(action: str, request: Request, payload: Optional[schemas.TimerAction] = None,
+                 db: Session = Depends(get_db)):
+    """Apply start / pause / reset / next to the user's timer"""
+    if action not in TIMER_ACTIONS:
+        raise HTTPException(status_code=404, detail="Unknown timer action")
+    user = get_current_user(request, db)
+    if not user:
+        raise HTTPException(status_code=401, detail="Login required")
+    payload = payload or schemas.TimerAction()
+
+    state = db.get(UserTimerState, user.id)
+    if state is None:
+        state = new_timer_state(user.id)
+        db.add(state)
+    if payload.version is not None and payload.version != state.version:
+        raise HTTPException(status_code=409, detail="Timer changed in another tab; reload its state")
+    try:
+        apply_action(state, action, config=payload.model_dump(exclude={"version"}))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    db.commit()
+    return _timer_response(request, state)
@@ -1,13 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from sqlalchemy import Date, Integer, cast, extract, func, literal, text, union_all
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 from backend.database import get_db
 from backend.models.models import Assignment
-from backend.models.calendar_models import CalendarBlock
+from backend.models.calendar_models import CalendarBlock, RecurringBlock, CalendarFeed
 from backend.routes.auth_routes import get_current_user
+from backend.services.calendar_scheduler import auto_schedule
+from backend.services.calendar_index import load_window_index, load_series_index, busy_bitmaps
+from backend.services.recurrence import RecurrenceRule
+from backend.services.calendar_feed import (
+    get_or_create_feed, rotate_feed_token, touch_feeds, cached_feed_body, stream_feed
+)
 from pathlib import Path
+import base64
 
 router = APIRouter()
 
@@ -15,6 +24,35 @@ router = APIRouter()
 TEMPLATES_DIR = Path(__file__).resolve().parent.parent.parent / "templates"
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
+FREEBUSY_SLOT_MINUTES = (5, 10, 15, 20, 30, 60)
+FREEBUSY_MAX_DAYS = 62
+
+def parse_iso(s: str) -> datetime:
+    """Parse naive 'YYYY-MM-DDTHH:MM:SS' (local) or ISO with 'Z' (UTC, tzinfo dropped)."""
+    if s.endswith("Z"):
+        return datetime.fromisoformat(s.replace("Z", "+00:00")).replace(tzinfo=None)
+    return datetime.fromisoformat(s)
+
+def block_owner_id(request: Request, db: Session):
+    """Calendar partition for this request: the user's id, or None when logged out"""
+    user = get_current_user(request, db)
+    return user.id if user else None
+
+def owned_by(user_id, model=CalendarBlock):
+    return model.user_id.is_(None) if user_id is None else model.user_id == user_id
+
+def serialize_block(r) -> dict:
+    return {
+        "id": r.id,
+        "title": r.title,
+        "start": r.start_datetime.isoformat(),
+        "end": r.end_datetime.isoformat(),
+        "block_type": r.block_type,
+        "assignment_id": r.assignment_id,
+        # Set on occurrences expanded from a recurring series (id is then None)
+        "recurring_id": getattr(r, "recurring_id", None)
+    }
+
 @router.get("/calendar", response_class=HTMLResponse)
 def calendar_page(request: Request, db: Session = Depends(get_db)):
     user = get_current_user(request, db)
@@ -23,52 +61,29 @@ def calendar_page(request: Request, db: Session = Depends(get_db)):
     return templates.TemplateResponse(request=request, name="calendar.html", context={"request": request, "user": user})
 
 @router.get("/api/calendar/blocks")
-def list_blocks(start: str, end: str, db: Session = Depends(get_db)):
+def list_blocks(request: Request, start: str, end: str, db: Session = Depends(get_db)):
     """
-    Return blocks between [start, end).
+    Return the current user's blocks between [start, end).
     Accepts naive 'YYYY-MM-DDTHH:MM:SS' (local) or ISO with 'Z' (UTC).
     """
-    def parse_iso(s: str) -> datetime:
-        if s.endswith("Z"):
-            # treat as UTC, convert to naive by dropping tzinfo
-            return datetime.fromisoformat(s.replace("Z", "+00:00")).replace(tzinfo=None)
-        return datetime.fromisoformat(s)
-
     try:
         start_dt = parse_iso(start)
         end_dt = parse_iso(end)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid start/end format")
 
-    rows = db.query(CalendarBlock).filter(
-        CalendarBlock.end_datetime > start_dt,
-        CalendarBlock.start_datetime < end_dt
-    ).all()
-
-    return [
-        {
-            "id": r.id,
-            "title": r.title,
-            "start": r.start_datetime.isoformat(),
-            "end": r.end_datetime.isoformat(),
-            "block_type": r.block_type,
-            "assignment_id": r.assignment_id
-        }
-        for r in rows
-    ]
+    index = load_window_index(db, block_owner_id(request, db), start_dt, end_dt)
+    return [serialize_block(r) for r in index.overlapping(start_dt, end_dt)]
 
-@router.post("/api/calendar/blocks")
-def create_block(payload: dict, db: Session = Depends(get_db)):
+def block_from_payload(payload: dict) -> CalendarBlock:
+    """Validate a block payload and build an unsaved CalendarBlock"""
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Block must be an object")
     required = ["title", "start", "end", "block_type"]
     for k in required:
         if k not in payload:
             raise HTTPException(status_code=400, detail=f"Missing field: {k}")
 
-    def parse_iso(s: str) -> datetime:
-        if s.endswith("Z"):
-            return datetime.fromisoformat(s.replace("Z", "+00:00")).replace(tzinfo=None)
-        return datetime.fromisoformat(s)
-
     try:
         start_dt = parse_iso(payload["start"])
         end_dt = parse_iso(payload["end"])
@@ -81,40 +96,415 @@ def create_block(payload: dict, db: Session = Depends(get_db)):
     if block_type not in ("busy", "study", "break"):
         raise HTTPException(status_code=400, detail="block_type must be 'busy', 'study', or 'break'")
 
-    assignment_id = payload.get("assignment_id")
-    if assignment_id is not None:
-        if not db.query(Assignment).filter(Assignment.id == assignment_id).first():
-            raise HTTPException(status_code=404, detail="Assignment not found")
-
-    # Overlap guard
-    exists = db.query(CalendarBlock).filter(
-        CalendarBlock.end_datetime > start_dt,
-        CalendarBlock.start_datetime < end_dt
-    ).first()
-    if exists:
-        raise HTTPException(status_code=409, detail="Overlaps an existing block")
-
-    row = CalendarBlock(
+    return CalendarBlock(
         title=payload["title"],
         start_datetime=start_dt,
         end_datetime=end_dt,
         block_type=block_type,
-        assignment_id=assignment_id
+        assignment_id=payload.get("assignment_id")
+    )
+
+def find_overlaps(new_blocks: list, existing: list) -> list:
+    """
+    Single sorted sweep over new and existing blocks.
+    Returns (new index, conflicting block) pairs; the conflicting block is either
+    an existing CalendarBlock or another new one (as its index in new_blocks).
+    """
+    events = sorted(
+        [(b.start_datetime, b.end_datetime, i, None) for i, b in enumerate(new_blocks)] +
+        [(b.start_datetime, b.end_datetime, None, b) for b in existing],
+        key=lambda e: (e[0], e[1])
+    )
+    conflicts = []
+    active = None  # interval with the latest end seen so far
+    for event in events:
+        start, end, index, row = event
+        if active is not None and start < active[1] and (index is not None or active[2] is not None):
+            if index is not None:
+                conflicts.append((index, active[3] if active[3] is not None else active[2]))
+            else:
+                conflicts.append((active[2], row))
+        if active is None or end > active[1]:
+            active = event
+    return conflicts
+
+def _day_expr(column, dialect: str):
+    """SQL expression for the calendar day (as a date or 'YYYY-MM-DD') of a datetime column"""
+    if dialect == "sqlite":
+        return func.date(column)
+    return cast(column, Date)
+
+def _minutes_expr(start, end, dialect: str):
+    """SQL expression for the whole minutes between two datetime columns"""
+    if dialect == "sqlite":
+        return cast(func.round((func.julianday(end) - func.julianday(start)) * 1440), Integer)
+    if dialect in ("mysql", "mariadb"):
+        return func.timestampdiff(text("MINUTE"), start, end)
+    return cast(extract("epoch", end - start) / 60, Integer)
+
+@router.get("/api/calendar/summary")
+def month_summary(request: Request, month: str, db: Session = Depends(get_db)):
+    """
+    Per-day block counts and minutes by type, plus assignments due, for the
+    6-week month grid (Sunday before the 1st, 42 days). month is YYYY-MM.
+    """
+    try:
+        month_start = datetime.strptime(month, "%Y-%m")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="month must be YYYY-MM")
+    grid_start = month_start - timedelta(days=(month_start.weekday() + 1) % 7)
+    grid_end = grid_start + timedelta(days=42)
+
+    user = get_current_user(request, db)
+    user_id = user.id if user else None
+    dialect = db.get_bind().dialect.name
+
+    # Blocks grouped by (day, type) and assignments grouped by due day, in one statement
+    block_day = _day_expr(CalendarBlock.start_datetime, dialect)
+    blocks = db.query(
+        block_day.label("day"),
+        CalendarBlock.block_type.label("kind"),
+        func.count(CalendarBlock.id).label("count"),
+        func.sum(_minutes_expr(CalendarBlock.start_datetime, CalendarBlock.end_datetime, dialect)).label("minutes")
+    ).filter(
+        owned_by(user_id),
+        CalendarBlock.start_datetime >= grid_start,
+        CalendarBlock.start_datetime < grid_end
+    ).group_by(block_day, CalendarBlock.block_type)
+
+    due_day = _day_expr(Assignment.due_date, dialect)
+    due = db.query(
+        due_day.label("day"),
+        literal("due").label("kind"),
+        func.count(Assignment.id).label("count"),
+        literal(0).label("minutes")
+    ).filter(
+        Assignment.completed == False,
+        Assignment.due_date >= grid_start,
+        Assignment.due_date < grid_end
     )
+    if user_id is not None:
+        due = due.filter(Assignment.user_id == user_id)
+    due = due.group_by(due_day)
+
+    days = {}
+    for day, kind, count, minutes in db.execute(union_all(blocks.statement, due.statement)):
+        key = day if isinstance(day, str) else day.isoformat()
+        entry = days.setdefault(key, {})
+        if kind == "due":
+            entry["due"] = count
+        else:
+            entry[kind] = {"count": count, "minutes": int(minutes or 0)}
+
+    # Recurring occurrences aren't rows, so they come from the expanded series
+    index = load_series_index(db, user_id)
+    for occ in index.occurrences(grid_start, grid_end):
+        if occ.start_datetime < grid_start:
+            continue
+        entry = days.setdefault(occ.start_datetime.strftime("%Y-%m-%d"), {})
+        totals = entry.setdefault(occ.block_type, {"count": 0, "minutes": 0})
+        totals["count"] += 1
+        totals["minutes"] += int((occ.end_datetime - occ.start_datetime).total_seconds() // 60)
+
+    return {
+        "month": month_start.strftime("%Y-%m"),
+        "start": grid_start.strftime("%Y-%m-%d"),
+        "end": grid_end.strftime("%Y-%m-%d"),
+        "days": days
+    }
+
+@router.get("/api/calendar/freebusy")
+def free_busy(request: Request, start: str, end: str, slot: int = 15, db: Session = Depends(get_db)):
+    """
+    Busy bitmaps for the days [start, end) (YYYY-MM-DD). Each day is base64 of
+    24*60/slot bits, most significant bit first; a set bit means the slot is taken.
+    """
+    if slot not in FREEBUSY_SLOT_MINUTES:
+        raise HTTPException(status_code=400, detail=f"slot must be one of {FREEBUSY_SLOT_MINUTES}")
+    try:
+        first_day = datetime.strptime(start, "%Y-%m-%d")
+        end_day = datetime.strptime(end, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start/end must be YYYY-MM-DD")
+    days = (end_day - first_day).days
+    if not 0 < days <= FREEBUSY_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range must cover 1 to {FREEBUSY_MAX_DAYS} days")
+
+    index = load_window_index(db, block_owner_id(request, db), first_day, end_day)
+    bitmaps = busy_bitmaps(index, first_day, days, slot)
+    return {
+        "slot_minutes": slot,
+        "slots_per_day": 24 * 60 // slot,
+        "days": {
+            (first_day + timedelta(days=i)).strftime("%Y-%m-%d"): base64.b64encode(bitmap).decode("ascii")
+            for i, bitmap in enumerate(bitmaps)
+        }
+    }
+
+@router.post("/api/calendar/blocks")
+def create_block(request: Request, payload: dict, db: Session = Depends(get_db)):
+    row = block_from_payload(payload)
+    row.user_id = block_owner_id(request, db)
+
+    if row.assignment_id is not None:
+        if not db.query(Assignment).filter(Assignment.id == row.assignment_id).first():
+            raise HTTPException(status_code=404, detail="Assignment not found")
+
+    # Overlap guard (only against this user's own blocks in the new block's window)
+    window = load_window_index(db, row.user_id, row.start_datetime, row.end_datetime)
+    if window.first_overlap(row.start_datetime, row.end_datetime):
+        raise HTTPException(status_code=409, detail="Overlaps an existing block")
+
     db.add(row)
     db.commit()
     db.refresh(row)
     return {"id": row.id}
 
+@router.post("/api/calendar/blocks/bulk")
+def create_blocks_bulk(request: Request, payload: dict, db: Session = Depends(get_db)):
+    """
+    Create many blocks at once: {"blocks": [block payload, ...]}.
+    All-or-nothing; overlaps within the batch or with existing blocks return 409.
+    """
+    items = payload.get("blocks")
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail="blocks must be a non-empty list")
+
+    rows = []
+    for i, item in enumerate(items):
+        try:
+            rows.append(block_from_payload(item))
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code, detail=f"blocks[{i}]: {e.detail}")
+
+    user_id = block_owner_id(request, db)
+    for r in rows:
+        r.user_id = user_id
+
+    assignment_ids = {r.assignment_id for r in rows if r.assignment_id is not None}
+    if assignment_ids:
+        found = {a for (a,) in db.query(Assignment.id).filter(Assignment.id.in_(assignment_ids))}
+        missing = sorted(assignment_ids - found)
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Assignment not found: {missing}")
+
+    # One range query covers every existing block the batch could touch
+    batch_start = min(r.start_datetime for r in rows)
+    batch_end = max(r.end_datetime for r in rows)
+    existing = load_window_index(db, user_id, batch_start, batch_end).overlapping(batch_start, batch_end)
+    conflicts = find_overlaps(rows, existing)
+    if conflicts:
+        raise HTTPException(status_code=409, detail={
+            "message": "Overlapping blocks",
+            "conflicts": [
+                {"index": i, "with_index": other} if isinstance(other, int)
+                else {"index": i, "with_recurring_id": other.recurring_id} if other.recurring_id
+                else {"index": i, "with_id": other.id}
+                for i, other in conflicts
+            ]
+        })
+
+    try:
+        db.add_all(rows)
+        db.flush()
+        ids = [r.id for r in rows]
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {"ids": ids}
+
+@router.post("/api/calendar/blocks/bulk-delete")
+def delete_blocks_bulk(request: Request, payload: dict, db: Session = Depends(get_db)):
+    """
+    Delete the current user's blocks in one statement, by {"ids": [...]} or by
+    range {"start": ..., "end": ...} (blocks overlapping [start, end)).
+    """
+    user_id = block_owner_id(request, db)
+    query = db.query(CalendarBlock).filter(owned_by(user_id))
+    if payload.get("ids") is not None:
+        ids = payload["ids"]
+        if not isinstance(ids, list):
+            raise HTTPException(status_code=400, detail="ids must be a list")
+        query = query.filter(CalendarBlock.id.in_(ids))
+    elif payload.get("start") and payload.get("end"):
+        try:
+            start_dt = parse_iso(payload["start"])
+            end_dt = parse_iso(payload["end"])
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid start/end format")
+        query = query.filter(
+            CalendarBlock.end_datetime > start_dt,
+            CalendarBlock.start_datetime < end_dt
+        )
+    else:
+        raise HTTPException(status_code=400, detail="Provide ids or start/end")
+
+    deleted = query.delete(synchronize_session=False)
+    # Bulk DELETE skips flush events, so bump the feed version explicitly
+    touch_feeds(db.connection(), {user_id})
+    db.commit()
+    return {"deleted": deleted}
+
+@router.post("/api/calendar/auto-schedule")
+def auto_schedule_assignments(request: Request, payload: dict = None, db: Session = Depends(get_db)):
+    """
+    Plan study/break blocks for every unscheduled assignment in one transaction.
+    Optional payload: {"start": ISO datetime} to plan from (never earlier than now).
+    """
+    start_dt = None
+    if payload and payload.get("start"):
+        try:
+            start_dt = parse_iso(payload["start"])
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid start format")
+
+    user_id = block_owner_id(request, db)
+    try:
+        result = auto_schedule(db, user_id=user_id, start=start_dt)
+        response = {
+            "assignments": result["assignments"],
+            "blocks": [serialize_block(b) for b in result["blocks"]]
+        }
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return response
+
 @router.delete("/api/calendar/blocks/{block_id}")
-def delete_block(block_id: int, db: Session = Depends(get_db)):
-    row = db.query(CalendarBlock).get(block_id)
+def delete_block(request: Request, block_id: int, db: Session = Depends(get_db)):
+    user_id = block_owner_id(request, db)
+    row = db.query(CalendarBlock).filter(CalendarBlock.id == block_id, owned_by(user_id)).first()
     if not row:
         raise HTTPException(status_code=404, detail="Block not found")
     db.delete(row)
     db.commit()
     return {"status": "ok"}
 
+@router.get("/api/calendar/recurring")
+def list_recurring_blocks(request: Request, db: Session = Depends(get_db)):
+    """List the current user's recurring series"""
+    user_id = block_owner_id(request, db)
+    rows = db.query(RecurringBlock).filter(
+        owned_by(user_id, RecurringBlock)
+    ).order_by(RecurringBlock.start_datetime).all()
+    return [
+        {
+            "id": r.id,
+            "title": r.title,
+            "block_type": r.block_type,
+            "start": r.start_datetime.isoformat(),
+            "end": (r.start_datetime + timedelta(minutes=r.duration_minutes)).isoformat(),
+            "rrule": r.rrule,
+            "assignment_id": r.assignment_id
+        }
+        for r in rows
+    ]
+
+@router.post("/api/calendar/recurring")
+def create_recurring_block(request: Request, payload: dict, db: Session = Depends(get_db)):
+    """
+    Create a recurring series: a block payload (start/end of the first occurrence)
+    plus "rrule", e.g. "FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20261218".
+    """
+    if not payload.get("rrule"):
+        raise HTTPException(status_code=400, detail="Missing field: rrule")
+    first = block_from_payload(payload)
+    try:
+        rule = RecurrenceRule.parse(payload["rrule"])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid rrule: {e}")
+
+    if first.assignment_id is not None:
+        if not db.query(Assignment).filter(Assignment.id == first.assignment_id).first():
+            raise HTTPException(status_code=404, detail="Assignment not found")
+
+    user_id = block_owner_id(request, db)
+    row = RecurringBlock(
+        title=first.title,
+        block_type=first.block_type,
+        start_datetime=first.start_datetime,
+        duration_minutes=int((first.end_datetime - first.start_datetime).total_seconds() // 60),
+        rrule=str(rule),
+        assignment_id=first.assignment_id,
+        user_id=user_id
+    )
+    if row.duration_minutes < 1:
+        raise HTTPException(status_code=400, detail="Occurrences must last at least a minute")
+    db.add(row)
+    db.commit()
+    db.refresh(row)
+    return {"id": row.id, "rrule": row.rrule}
+
+@router.delete("/api/calendar/recurring/{recurring_id}")
+def delete_recurring_block(request: Request, recurring_id: int, db: Session = Depends(get_db)):
+    user_id = block_owner_id(request, db)
+    row = db.query(RecurringBlock).filter(
+        RecurringBlock.id == recurring_id,
+        owned_by(user_id, RecurringBlock)
+    ).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Recurring block not found")
+    db.delete(row)
+    db.commit()
+    return {"status": "ok"}
+
+def _feed_info(request: Request, feed: CalendarFeed) -> dict:
+    return {"url": str(request.url_for("calendar_feed_ics", token=feed.token)), "version": feed.version}
+
+@router.get("/api/calendar/feed")
+def get_calendar_feed(request: Request, db: Session = Depends(get_db)):
+    """Return the current user's subscription URL, creating it on first use"""
+    user = get_current_user(request, db)
+    if not user:
+        raise HTTPException(status_code=401, detail="Login required")
+    return _feed_info(request, get_or_create_feed(db, user.id))
+
+@router.post("/api/calendar/feed/rotate")
+def rotate_calendar_feed(request: Request, db: Session = Depends(get_db)):
+    """Replace the subscription URL, revoking the old one"""
+    user = get_current_user(request, db)
+    if not user:
+        raise HTTPException(status_code=401, detail="Login required")
+    return _feed_info(request, rotate_feed_token(db, user.id))
+
+@router.get("/api/calendar/feed/{token}.ics", name="calendar_feed_ics")
+def calendar_feed_ics(token: str, request: Request, db: Session = Depends(get_db)):
+    """
+    iCalendar feed for calendar apps. Unchanged feeds answer 304 from the
+    ETag / If-Modified-Since check after a single indexed lookup.
+    """
+    feed = db.query(CalendarFeed).filter(CalendarFeed.token == token).first()
+    if not feed:
+        raise HTTPException(status_code=404, detail="Feed not found")
+
+    etag = f'"{feed.user_id}-{feed.version}"'
+    last_modified = feed.updated_at.replace(microsecond=0, tzinfo=timezone.utc)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": "private, max-age=300",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if etag in [t.strip() for t in if_none_match.split(",")] or if_none_match.strip() == "*":
+            return Response(status_code=304, headers=headers)
+    elif request.headers.get("if-modified-since"):
+        try:
+            since = parsedate_to_datetime(request.headers["if-modified-since"])
+        except (TypeError, ValueError):
+            since = None
+        if since is not None and since.tzinfo is not None and last_modified <= since:
+            return Response(status_code=304, headers=headers)
+
+    media_type = "text/calendar; charset=utf-8"
+    body = cached_feed_body(feed)
+    if body is not None:
+        return Response(body, media_type=media_type, headers=headers)
+    return StreamingResponse(stream_feed(db, feed), media_type=media_type, headers=headers)
+
 @router.get("/api/assignments")
 def list_assignments(request: Request, db: Session = Depends(get_db)):
     """List all assignments with full details"""
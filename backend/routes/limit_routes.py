@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from datetime import datetime
 from backend.database import get_db
 from backend.models.limit_models import DailyLimitSetting
-from backend.models.models import StudySession
+from backend.routes.auth_routes import get_current_user
+from backend.services.study_totals import day_totals, limit_forecast
 
 router = APIRouter()
 
+MAX_RANGE_DAYS = 366
+
 def _get_or_create_setting(db: Session) -> DailyLimitSetting:
     row = db.query(DailyLimitSetting).first()
     if not row:
@@ -33,33 +36,49 @@ def set_limit_setting(payload: dict, db: Session = Depends(get_db)):
     db.refresh(row)
     return {"daily_limit_minutes": row.daily_limit_minutes}
 
-@router.get("/limits/progress")
-def daily_progress(date: str, db: Session = Depends(get_db)):
-    """
-    Return total minutes of study time for the given local date (YYYY-MM-DD),
-    summing StudySession durations and including any currently-running sessions.
-    """
+def _parse_day(value: str):
     try:
-        day = datetime.strptime(date, "%Y-%m-%d").date()
+        return datetime.strptime(value, "%Y-%m-%d").date()
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid date format, expected YYYY-MM-DD")
 
-    start = datetime.combine(day, datetime.min.time())
-    end = datetime.combine(day, datetime.max.time())
+def _current_user_id(request: Request, db: Session):
+    user = get_current_user(request, db)
+    return user.id if user else None
+
+@router.get("/limits/progress")
+def daily_progress(date: str, request: Request, db: Session = Depends(get_db)):
+    """
+    Return the current user's total minutes of study time for the given local
+    date (YYYY-MM-DD), including any currently-running sessions.
+    """
+    day = _parse_day(date)
+    totals = day_totals(db, _current_user_id(request, db), day, day)
+    return {"minutes": int(totals[day] // 60)}
+
+@router.get("/limits/progress/range")
+def progress_range(start: str, end: str, request: Request, db: Session = Depends(get_db)):
+    """Minutes studied on every day from start to end (inclusive), in one call"""
+    first_day, last_day = _parse_day(start), _parse_day(end)
+    if last_day < first_day:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (last_day - first_day).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_RANGE_DAYS} days")
 
-    sessions = db.query(StudySession).filter(
-        StudySession.start_time <= end,
-        (StudySession.end_time == None) | (StudySession.end_time >= start)
-    ).all()
+    totals = day_totals(db, _current_user_id(request, db), first_day, last_day)
+    return {"days": [{"date": day.isoformat(), "minutes": int(seconds // 60)} for day, seconds in totals.items()]}
 
-    total_seconds = 0
-    now = datetime.utcnow()
-    for s in sessions:
-        s_start = s.start_time
-        s_end = s.end_time or now
-        seg_start = max(s_start, start)
-        seg_end = min(s_end, end)
-        if seg_end > seg_start:
-            total_seconds += (seg_end - seg_start).total_seconds()
+def _utc_iso(value):
+    return value.isoformat() + "Z" if value else None
 
-    return {"minutes": int(total_seconds // 60)}
+@router.get("/limits/forecast")
+def daily_limit_forecast(request: Request, db: Session = Depends(get_db)):
+    """
+    Remaining budget for today and the UTC time the running session will hit
+    the daily limit, so a client can set one timer instead of polling.
+    """
+    row = _get_or_create_setting(db)
+    forecast = limit_forecast(db, _current_user_id(request, db), row.daily_limit_minutes)
+    forecast["limit_at"] = _utc_iso(forecast["limit_at"])
+    forecast["resets_at"] = _utc_iso(forecast["resets_at"])
+    return forecast
@@ -0,0 +1,47 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from backend import database
+from backend.database import get_pool_stats
+from backend.core.metrics import PROMETHEUS_CONTENT_TYPE, render_request_metrics, render_gauges
+from backend.core.query_stats import get_query_stats
+
+router = APIRouter()
+
+
+def _pool_stats_by_engine() -> dict:
+    stats = {"sync": get_pool_stats(database.engine)}
+    # Only present once an async route has opened the async engine
+    if database._async_engine is not None:
+        stats["async"] = get_pool_stats(database._async_engine)
+    return stats
+
+
+@router.get("/api/metrics/db-pool")
+def db_pool_metrics():
+    """Connection pool occupancy plus checkout wait and saturation counters."""
+    stats = _pool_stats_by_engine()
+    return {"sync": stats["sync"], "async": stats.get("async")}
+
+
+@router.get("/api/metrics/db-queries")
+def db_query_metrics():
+    """Per-route SQL statement counts and database time."""
+    return get_query_stats()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Request, latency and connection pool metrics for Prometheus."""
+    lines = render_request_metrics()
+
+    pools = _pool_stats_by_engine()
+    for field, help_text in (
+        ("checked_out", "Connections currently checked out of the pool."),
+        ("pool_size", "Configured persistent pool size."),
+        ("overflow", "Connections open beyond pool_size."),
+    ):
+        samples = [({"engine": name}, stats[field]) for name, stats in pools.items() if field in stats]
+        if samples:
+            lines += render_gauges(f"timeflow_db_pool_{field}", help_text, samples)
+
+    return Response("\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE)
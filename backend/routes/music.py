@@ -1,17 +1,17 @@
 import os
-import shutil
-from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from ..database import get_db
 from ..models.music_models import Playlist, Track
 from ..schemas import music_schemas
+from ..services.uploads import save_upload, UploadLimitRoute, UploadTooLarge
 
 router = APIRouter(
     prefix="/api/music",
     tags=["music"],
     responses={404: {"description": "Not found"}},
+    route_class=UploadLimitRoute,  # oversized uploads are refused before they are spooled
 )
 
 # Configuration
@@ -70,19 +70,18 @@ async def upload_track(
     if not playlist:
         raise HTTPException(status_code=404, detail="Playlist not found or access denied")
     
-    # Save the file
+    # Stream the file to disk under a name of its own (content hash plus a random part)
     file_ext = os.path.splitext(file.filename)[1]
-    filename = f"{int(datetime.utcnow().timestamp())}{file_ext}"
-    file_path = os.path.join(UPLOAD_FOLDER, filename)
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    try:
+        stored = await save_upload(file, UPLOAD_FOLDER, suffix=file_ext)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     
     # Create track record
     track = Track(
         title=title,
         artist=artist,
-        source=file_path,
+        source=str(stored.path),
         duration=0,  # You might want to extract duration using a library like mutagen
         is_custom=True,
         playlist_id=playlist_id
@@ -125,9 +124,11 @@ def delete_track(
     if not track:
         raise HTTPException(status_code=404, detail="Track not found or access denied")
     
-    # Delete the file
+    # Delete the file, unless another track still plays it (uploads stored
+    # before names were made unique can share one)
     try:
-        if track.is_custom and os.path.exists(track.source):
+        shared = db.query(Track.id).filter(Track.source == track.source, Track.id != track.id).first()
+        if track.is_custom and not shared and os.path.exists(track.source):
             os.remove(track.source)
     except Exception as e:
         print(f"Error deleting file: {e}")
@@ -1,5 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import os
@@ -18,9 +17,11 @@ from ..schemas.music_schemas import (
 from ..crud import music_crud
 from ..core.dependencies import get_current_user, get_current_user_optional
 from ..core.config import settings
+from ..core.file_responses import RangeFileResponse
+from ..services.uploads import UploadLimitRoute, UploadTooLarge
 from ..models.user_models import User
 
-router = APIRouter(prefix="/api/music", tags=["music"])
+router = APIRouter(prefix="/api/music", tags=["music"], route_class=UploadLimitRoute)
 
 # Tracks
 @router.get("/tracks", response_model=List[TrackSchema])
@@ -87,11 +88,12 @@ def get_track(
 @router.get("/tracks/{track_id}/play")
 def play_track(
     track_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user_optional),
     db: Session = Depends(get_db)
 ):
     """
-    Stream a track file
+    Stream a track file; supports Range requests so the player can seek
     """
     track = music_crud.get_track(db, track_id=track_id)
     if not track:
@@ -112,7 +114,10 @@ def play_track(
         if not mime_type:
             mime_type = "audio/mpeg"  # Default to MP3 if unknown
         
-        return FileResponse(
+        # Uploads are stored under their track id and never rewritten, so
+        # browsers may keep them; the validators cover anything unexpected
+        return RangeFileResponse(
+            request,
             file_path,
             media_type=mime_type,
             filename=file_path.name
@@ -274,12 +279,15 @@ async def upload_track(
     )
     
     # Save the track
-    track = await music_crud.create_user_custom_track(
-        db=db,
-        track_data=track_data,
-        user_id=current_user.id,
-        file=file
-    )
+    try:
+        track = await music_crud.create_user_custom_track(
+            db=db,
+            track_data=track_data,
+            user_id=current_user.id,
+            file=file
+        )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
     
     if not track:
         raise HTTPException(
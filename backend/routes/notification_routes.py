@@ -1,13 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import JSONResponse
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime
-from backend.database import get_db
+from backend.database import get_db, get_async_db
 from backend.models.notification_models import (
     NotificationRule, Notification, NotificationPreference,
     create_default_notification_rules
 )
-from backend.routes.auth_routes import get_current_user
+from backend.routes.auth_routes import get_current_user, get_current_user_async
 
 router = APIRouter()
 
@@ -17,19 +19,20 @@ async def get_notifications(
     request: Request,
     unread_only: bool = False,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get user's notifications"""
-    user = get_current_user(request, db)
+    user = await get_current_user_async(request, db)
     if not user:
         raise HTTPException(status_code=401, detail="Not logged in")
     
-    query = db.query(Notification).filter(Notification.user_id == user.id)
+    query = select(Notification).where(Notification.user_id == user.id)
     
     if unread_only:
-        query = query.filter(Notification.is_read == False)
+        query = query.where(Notification.is_read == False)
     
-    notifications = query.order_by(Notification.delivered_at.desc()).limit(limit).all()
+    result = await db.execute(query.order_by(Notification.delivered_at.desc()).limit(limit))
+    notifications = result.scalars().all()
     
     return [{
         "id": n.id,
@@ -48,43 +51,53 @@ async def get_notifications(
 
 
 @router.get("/api/notifications/unread-count")
-async def get_unread_count(request: Request, db: Session = Depends(get_db)):
+async def get_unread_count(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get count of unread notifications"""
-    user = get_current_user(request, db)
+    user = await get_current_user_async(request, db)
     if not user:
         raise HTTPException(status_code=401, detail="Not logged in")
     
-    count = db.query(Notification).filter(
-        Notification.user_id == user.id,
-        Notification.is_read == False,
-        Notification.is_dismissed == False
-    ).count()
+    count = await db.scalar(
+        select(func.count(Notification.id)).where(
+            Notification.user_id == user.id,
+            Notification.is_read == False,
+            Notification.is_dismissed == False
+        )
+    )
     
     return {"count": count}
 
 
+async def _get_user_notification(notification_id: int, user_id: int, db: AsyncSession):
+    """Load one of the user's notifications or raise 404"""
+    notification = await db.scalar(
+        select(Notification).where(
+            Notification.id == notification_id,
+            Notification.user_id == user_id
+        )
+    )
+    
+    if not notification:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    return notification
+
+
 @router.post("/api/notifications/{notification_id}/read")
 async def mark_notification_read(
     notification_id: int,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark a notification as read"""
-    user = get_current_user(request, db)
+    user = await get_current_user_async(request, db)
     if not user:
         raise HTTPException(status_code=401, detail="Not logged in")
     
-    notification = db.query(Notification).filter(
-        Notification.id == notification_id,
-        Notification.user_id == user.id
-    ).first()
-    
-    if not notification:
-        raise HTTPException(status_code=404, detail="Notification not found")
+    notification = await _get_user_notification(notification_id, user.id, db)
     
     notification.is_read = True
     notification.read_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
     
     return {"status": "success"}
 
@@ -93,40 +106,35 @@ async def mark_notification_read(
 async def dismiss_notification(
     notification_id: int,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Dismiss a notification"""
-    user = get_current_user(request, db)
+    user = await get_current_user_async(request, db)
     if not user:
         raise HTTPException(status_code=401, detail="Not logged in")
     
-    notification = db.query(Notification).filter(
-        Notification.id == notification_id,
-        Notification.user_id == user.id
-    ).first()
-    
-    if not notification:
-        raise HTTPException(status_code=404, detail="Notification not found")
+    notification = await _get_user_notification(notification_id, user.id, db)
     
     notification.is_dismissed = True
-    db.commit()
+    await db.commit()
     
     return {"status": "success"}
 
 
 @router.post("/api/notifications/mark-all-read")
-async def mark_all_read(request: Request, db: Session = Depends(get_db)):
+async def mark_all_read(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Mark all notifications as read"""
-    user = get_current_user(request, db)
+    user = await get_current_user_async(request, db)
     if not user:
         raise HTTPException(status_code=401, detail="Not logged in")
     
-    db.query(Notification).filter(
-        Notification.user_id == user.id,
-        Notification.is_read == False
-    ).update({"is_read": True, "read_at": datetime.utcnow()})
+    await db.execute(
+        update(Notification)
+        .where(Notification.user_id == user.id, Notification.is_read == False)
+        .values(is_read=True, read_at=datetime.utcnow())
+    )
     
-    db.commit()
+    await db.commit()
     
     return {"status": "success"}
 
@@ -135,23 +143,17 @@ async def mark_all_read(request: Request, db: Session = Depends(get_db)):
 async def delete_notification(
     notification_id: int,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a notification"""
-    user = get_current_user(request, db)
+    user = await get_current_user_async(request, db)
     if not user:
         raise HTTPException(status_code=401, detail="Not logged in")
     
-    notification = db.query(Notification).filter(
-        Notification.id == notification_id,
-        Notification.user_id == user.id
-    ).first()
-    
-    if not notification:
-        raise HTTPException(status_code=404, detail="Notification not found")
+    notification = await _get_user_notification(notification_id, user.id, db)
     
-    db.delete(notification)
-    db.commit()
+    await db.delete(notification)
+    await db.commit()
     
     return {"status": "success"}
 
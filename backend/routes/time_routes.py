@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime, timedelta
 
 from ..database import get_db
@@ -12,14 +12,18 @@ from ..schemas.time_schemas import (
     UserMethodPreference as UserMethodPreferenceSchema,
     UserMethodPreferenceCreate,
     UserMethodPreferenceUpdate,
-    TimeMethodRecommendation
+    TimeMethodRecommendation,
+    WorkSessionBulkResult
 )
 from ..crud import time_crud
 from ..core.dependencies import get_current_user
+from ..services.reference_data import reference_snapshot, time_methods_page
 from ..models.user_models import User
 
 router = APIRouter(prefix="/api/time", tags=["time"])
 
+MAX_BULK_SESSIONS = 500
+
 # Time Methods
 @router.get("/methods", response_model=List[TimeMethodSchema])
 def list_time_methods(
@@ -30,7 +34,8 @@ def list_time_methods(
     """
     Get all available time management methods
     """
-    return time_crud.get_all_time_methods(db, skip=skip, limit=limit)
+    body = time_methods_page(reference_snapshot(db), skip=skip, limit=limit)
+    return Response(content=body, media_type="application/json")
 
 @router.get("/methods/{method_id}", response_model=TimeMethodSchema)
 def get_time_method(method_id: int, db: Session = Depends(get_db)):
@@ -145,6 +150,26 @@ def create_work_session(
     
     return db_session
 
+@router.post("/sessions/bulk", response_model=WorkSessionBulkResult)
+def create_work_sessions_bulk(
+    sessions: List[Any] = Body(...),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Record many work sessions at once, e.g. when an offline client syncs.
+    Valid sessions are stored together and returned as `sessions`, each new
+    id paired with its position in the request; invalid ones (including
+    items that aren't objects) are listed in `errors` by position.
+    """
+    if len(sessions) > MAX_BULK_SESSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_SESSIONS} sessions per request"
+        )
+    
+    return time_crud.create_work_sessions_bulk(db, user_id=current_user.id, items=sessions)
+
 @router.get("/sessions", response_model=List[WorkSessionSchema])
 def list_work_sessions(
     start_date: Optional[datetime] = None,
@@ -183,6 +208,29 @@ def get_work_session_stats(
     
     return time_crud.get_user_session_stats(db, user_id=current_user.id, days=days)
 
+@router.get("/sessions/analytics")
+def get_work_session_analytics(
+    days: int = 90,
+    window: int = 7,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get weekday by hour-of-day heatmaps and rolling trends of the user's work sessions
+    """
+    if days < 1 or days > 365:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Days must be between 1 and 365"
+        )
+    if window < 1 or window > days:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Window must be between 1 and the number of days"
+        )
+    
+    return time_crud.get_productivity_analytics(db, user_id=current_user.id, days=days, window=window)
+
 # Recommendations
 @router.get("/recommendations", response_model=TimeMethodRecommendation)
 def get_time_method_recommendation(
@@ -201,3 +249,21 @@ def get_time_method_recommendation(
         )
     
     return recommendation
+
+@router.get("/recommendations/simulation")
+def get_time_method_simulation(
+    days: int = 365,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Replay the user's session history under every time method and compare
+    projected focused minutes per day and break overhead
+    """
+    if days < 1 or days > 365:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Days must be between 1 and 365"
+        )
+    
+    return time_crud.compare_time_methods(db, user_id=current_user.id, days=days)
@@ -77,6 +77,14 @@ class Assignment(AssignmentBase):
 
 # Timer State
 class TimerState(BaseModel):
+    method: str = "pomodoro"
+    phase: str = "work"  # 'work', 'short_break', 'long_break'
+    status: str = "idle"  # 'idle', 'running', 'paused', 'complete'
+    phase_duration: Optional[int] = None  # in seconds, None when counting up
+    elapsed: int = 0  # in seconds
+    started_at: Optional[datetime] = None  # UTC, set while running
+    ends_at: Optional[datetime] = None  # UTC, set while running a fixed-length phase
+    version: int = 0
     is_running: bool = False
     is_break: bool = False
     is_long_break: bool = False
@@ -84,3 +92,11 @@ class TimerState(BaseModel):
     current_interval: int = 0
     total_intervals: int = 0
     current_activity: Optional[BreakActivity] = None
+
+class TimerAction(BaseModel):
+    version: Optional[int] = None  # rejected with 409 if the timer has moved on since
+    method: Optional[str] = Field(None, max_length=50)
+    work_seconds: Optional[int] = Field(None, ge=1, le=24 * 3600)
+    short_break_seconds: Optional[int] = Field(None, ge=1, le=24 * 3600)
+    long_break_seconds: Optional[int] = Field(None, ge=1, le=24 * 3600)
+    cycles_before_long_break: Optional[int] = Field(None, ge=1, le=24)
@@ -52,6 +52,19 @@ class WorkSession(WorkSessionBase):
     class Config:
         orm_mode = True
 
+class WorkSessionBulkError(BaseModel):
+    index: int  # position of the rejected item in the request
+    detail: str
+
+class WorkSessionBulkCreated(BaseModel):
+    index: int  # position of the stored item in the request
+    id: int
+
+class WorkSessionBulkResult(BaseModel):
+    created: int
+    sessions: List[WorkSessionBulkCreated]
+    errors: List[WorkSessionBulkError]
+
 class UserMethodPreferenceBase(BaseModel):
     method_id: int
     custom_work_duration: Optional[int] = Field(None, gt=0, description="Custom work duration in minutes")
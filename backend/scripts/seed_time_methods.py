@@ -170,9 +170,6 @@ def seed_default_tracks(db: Session) -> None:
             # Create the playlist
             playlist = Playlist(
                 name="Default Study Mix",
-                description="A mix of default study tracks",
-                is_public=True,
-                track_count=len(tracks),
                 user_id=1  # Default user ID
             )
             db.add(playlist)
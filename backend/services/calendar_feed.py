@@ -0,0 +1,182 @@
+"""
+Calendar Feed Service
+Builds each user's subscribable iCalendar (.ics) feed and keeps it cached per feed version
+"""
+
+import secrets
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+from backend.core.cache import LRUCache
+from backend.models.models import Assignment
+from backend.models.calendar_models import CalendarBlock, RecurringBlock, CalendarFeed
+
+PRODID = "-//TimeFlow//Calendar Feed//EN"
+
+# user id -> CachedFeed; one entry per user, replaced when the version moves on
+CachedFeed = namedtuple("CachedFeed", "version body events")
+_feed_cache = LRUCache(maxsize=512)
+
+
+def get_or_create_feed(db: Session, user_id: int) -> CalendarFeed:
+    feed = db.get(CalendarFeed, user_id)
+    if feed is None:
+        feed = CalendarFeed(user_id=user_id, token=secrets.token_urlsafe(24), version=1, updated_at=datetime.utcnow())
+        db.add(feed)
+        db.commit()
+    return feed
+
+
+def rotate_feed_token(db: Session, user_id: int) -> CalendarFeed:
+    """Issue a new secret URL; the old one stops working immediately"""
+    feed = get_or_create_feed(db, user_id)
+    feed.token = secrets.token_urlsafe(24)
+    db.commit()
+    return feed
+
+
+def touch_feeds(connection, user_ids):
+    """Bump the feed version of every given user (no-op for users without a feed)"""
+    user_ids = {u for u in user_ids if u is not None}
+    if user_ids:
+        connection.execute(
+            update(CalendarFeed)
+            .where(CalendarFeed.user_id.in_(user_ids))
+            .values(version=CalendarFeed.version + 1, updated_at=datetime.utcnow())
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_feed_versions(session, flush_context):
+    # Any flushed change to a block, series or assignment makes its owner's feed stale
+    user_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (CalendarBlock, RecurringBlock, Assignment)):
+            user_ids.add(obj.user_id)
+    if user_ids - {None}:
+        touch_feeds(session.connection(), user_ids)
+
+
+def _escape(text: str) -> str:
+    return (text or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _fold(line: str) -> str:
+    """Fold a content line to 75 octets as RFC 5545 requires"""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts = []
+    while len(data) > 75:
+        cut = 75 if not parts else 74
+        # Don't split a multi-byte character
+        while cut > 0 and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode("utf-8"))
+        data = data[cut:]
+    parts.append(data.decode("utf-8"))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _local(dt: datetime) -> str:
+    # Blocks are stored as naive local times, so they are emitted as floating times
+    return dt.strftime("%Y%m%dT%H%M%S")
+
+
+def _vevent(uid: str, stamp: str, summary: str, lines: list) -> str:
+    return "".join(_fold(line) for line in (
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{stamp}",
+        f"SUMMARY:{_escape(summary)}",
+        *lines,
+        "END:VEVENT",
+    ))
+
+
+def _feed_events(db: Session, user_id: int):
+    """(uid, fingerprint, render) for every event in the user's feed"""
+    blocks = db.query(
+        CalendarBlock.id, CalendarBlock.title, CalendarBlock.start_datetime,
+        CalendarBlock.end_datetime, CalendarBlock.block_type
+    ).filter(CalendarBlock.user_id == user_id).order_by(CalendarBlock.start_datetime).all()
+    for row in blocks:
+        yield f"block-{row.id}@timeflow", tuple(row), lambda stamp, r=row: _vevent(
+            f"block-{r.id}@timeflow", stamp, r.title,
+            [f"DTSTART:{_local(r.start_datetime)}", f"DTEND:{_local(r.end_datetime)}", f"CATEGORIES:{r.block_type.upper()}"]
+        )
+
+    series = db.query(
+        RecurringBlock.id, RecurringBlock.title, RecurringBlock.start_datetime,
+        RecurringBlock.duration_minutes, RecurringBlock.rrule, RecurringBlock.block_type
+    ).filter(RecurringBlock.user_id == user_id).all()
+    for row in series:
+        yield f"series-{row.id}@timeflow", tuple(row), lambda stamp, r=row: _vevent(
+            f"series-{r.id}@timeflow", stamp, r.title,
+            [f"DTSTART:{_local(r.start_datetime)}",
+             f"DTEND:{_local(r.start_datetime + timedelta(minutes=r.duration_minutes))}",
+             f"RRULE:{r.rrule}", f"CATEGORIES:{r.block_type.upper()}"]
+        )
+
+    due = db.query(Assignment.id, Assignment.name, Assignment.due_date).filter(
+        Assignment.user_id == user_id, Assignment.completed == False
+    ).all()
+    for row in due:
+        yield f"due-{row.id}@timeflow", tuple(row), lambda stamp, r=row: _vevent(
+            f"due-{r.id}@timeflow", stamp, f"Due: {r.name}",
+            [f"DTSTART;VALUE=DATE:{r.due_date:%Y%m%d}",
+             f"DTEND;VALUE=DATE:{r.due_date + timedelta(days=1):%Y%m%d}",
+             "CATEGORIES:DEADLINE"]
+        )
+
+
+def cached_feed_body(feed: CalendarFeed):
+    """The rendered feed if this version is already cached, else None"""
+    cached = _feed_cache.get(feed.user_id)
+    if cached is not None and cached.version == feed.version:
+        return cached.body
+    return None
+
+
+def stream_feed(db: Session, feed: CalendarFeed):
+    """
+    Yield the feed in chunks and cache it under the feed's version when done.
+
+    Rows are read up front so the session is free before streaming starts.
+    Event text from the previous cached version is reused for any event whose
+    fields haven't changed, so a rebuild only renders what was edited.
+    """
+    user_id, version = feed.user_id, feed.version
+    stamp = feed.updated_at.strftime("%Y%m%dT%H%M%SZ")
+    previous = _feed_cache.get(user_id)
+    previous_events = previous.events if previous is not None else {}
+    events = list(_feed_events(db, user_id))
+
+    def generate():
+        rendered = {}
+        chunks = []
+        header = "".join(_fold(line) for line in (
+            "BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}",
+            "CALSCALE:GREGORIAN", "X-WR-CALNAME:TimeFlow",
+        )).encode("utf-8")
+        chunks.append(header)
+        yield header
+        for uid, fingerprint, render in events:
+            old = previous_events.get(uid)
+            # DTSTAMP is part of the text, so reuse only needs the same fields
+            text = old[1] if old is not None and old[0] == fingerprint else render(stamp)
+            rendered[uid] = (fingerprint, text)
+            chunk = text.encode("utf-8")
+            chunks.append(chunk)
+            yield chunk
+        footer = b"END:VCALENDAR\r\n"
+        chunks.append(footer)
+        yield footer
+        _feed_cache.set(user_id, CachedFeed(version, b"".join(chunks), rendered))
+
+    return generate()
+
+
+def clear_feed_cache():
+    _feed_cache.clear()
@@ -0,0 +1,138 @@
+"""
+Per-user Calendar Interval Index
+Holds a user's blocks in a queried window as a sorted interval list for O(log n) overlap and range lookups,
+plus their recurring series, which are expanded only for the window being queried
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import timedelta
+from sqlalchemy.orm import Session
+from backend.models.calendar_models import CalendarBlock, RecurringBlock
+from backend.services.recurrence import expand_window
+
+# Same attribute names as CalendarBlock so either can be serialized the same way.
+# Occurrences of a recurring series have no id of their own, only recurring_id.
+BlockSpan = namedtuple(
+    "BlockSpan", "id title start_datetime end_datetime block_type assignment_id recurring_id",
+    defaults=(None,)
+)
+SeriesSpec = namedtuple("SeriesSpec", "id title block_type assignment_id rrule start_datetime duration_minutes")
+
+
+def _day_floor(t):
+    return t.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class BlockIntervalIndex:
+    """
+    Blocks sorted by start with a running maximum of end times.
+
+    The running maximum is non-decreasing, so the first block that can reach
+    past `start` is found by bisection, as is the last block starting before
+    `end`; only that slice is inspected.
+    """
+
+    def __init__(self, spans, series=()):
+        self.series = list(series)
+        self.spans = sorted(spans, key=lambda b: (b.start_datetime, b.end_datetime))
+        self.starts = [b.start_datetime for b in self.spans]
+        self.max_ends = []
+        latest = None
+        for b in self.spans:
+            latest = b.end_datetime if latest is None or b.end_datetime > latest else latest
+            self.max_ends.append(latest)
+
+    def __len__(self):
+        return len(self.spans)
+
+    def _candidates(self, start, end):
+        lo = bisect_right(self.max_ends, start)
+        hi = bisect_left(self.starts, end)
+        return self.spans[lo:hi]
+
+    def occurrences(self, start, end) -> list:
+        """Occurrences of the recurring series intersecting [start, end)."""
+        if not self.series:
+            return []
+        # Expand over whole days so nearby queries share cached expansions
+        window_start = _day_floor(start)
+        window_end = _day_floor(end) + (timedelta(days=1) if end != _day_floor(end) else timedelta(0))
+        spans = []
+        for s in self.series:
+            for occ_start, occ_end in expand_window(s.rrule, s.start_datetime, s.duration_minutes, window_start, window_end):
+                if occ_start < end and occ_end > start:
+                    spans.append(BlockSpan(None, s.title, occ_start, occ_end, s.block_type, s.assignment_id, s.id))
+        return spans
+
+    def overlapping(self, start, end) -> list:
+        """Blocks and recurring occurrences intersecting [start, end), ordered by start."""
+        spans = [b for b in self._candidates(start, end) if b.end_datetime > start]
+        if self.series:
+            spans = sorted(spans + self.occurrences(start, end), key=lambda b: (b.start_datetime, b.end_datetime))
+        return spans
+
+    def first_overlap(self, start, end):
+        for b in self._candidates(start, end):
+            if b.end_datetime > start:
+                return b
+        occurrences = self.occurrences(start, end)
+        return occurrences[0] if occurrences else None
+
+
+def busy_bitmaps(index: BlockIntervalIndex, first_day, days: int, slot_minutes: int) -> list:
+    """
+    One bitmap per day (bytes, most significant bit first) with bit i set when
+    any block touches the i-th `slot_minutes` slot after midnight.
+    """
+    slots = 24 * 60 // slot_minutes
+    slot = timedelta(minutes=slot_minutes)
+    start = _day_floor(first_day)
+    masks = [0] * days
+    for b in index.overlapping(start, start + timedelta(days=days)):
+        block_start = max(b.start_datetime, start)
+        block_end = min(b.end_datetime, start + timedelta(days=days))
+        day = (_day_floor(block_start) - start).days
+        while day < days:
+            day_start = start + timedelta(days=day)
+            lo = max(0, (block_start - day_start) // slot)
+            # Round the end up so a partially covered slot counts as busy
+            hi = min(slots, -((day_start - block_end) // slot))
+            if hi > lo:
+                masks[day] |= ((1 << (hi - lo)) - 1) << (slots - hi)
+            if block_end <= day_start + timedelta(days=1):
+                break
+            day += 1
+    length = (slots + 7) // 8
+    pad = length * 8 - slots
+    return [(mask << pad).to_bytes(length, "big") for mask in masks]
+
+
+def _owner(model, user_id):
+    return model.user_id.is_(None) if user_id is None else model.user_id == user_id
+
+
+def _load_series(db: Session, user_id) -> list:
+    return [SeriesSpec(*row) for row in db.query(
+        RecurringBlock.id, RecurringBlock.title, RecurringBlock.block_type, RecurringBlock.assignment_id,
+        RecurringBlock.rrule, RecurringBlock.start_datetime, RecurringBlock.duration_minutes
+    ).filter(_owner(RecurringBlock, user_id))]
+
+
+def load_window_index(db: Session, user_id, start, end) -> BlockIntervalIndex:
+    """
+    Index of `user_id`'s blocks intersecting [start, end) and their series,
+    read from the database on every call. Nothing is cached per worker, so
+    a write made on any worker shows up in the next read, and a write
+    validated in the caller's transaction sees what is actually stored.
+    """
+    rows = db.query(
+        CalendarBlock.id, CalendarBlock.title, CalendarBlock.start_datetime,
+        CalendarBlock.end_datetime, CalendarBlock.block_type, CalendarBlock.assignment_id
+    ).filter(_owner(CalendarBlock, user_id), CalendarBlock.start_datetime < end, CalendarBlock.end_datetime > start)
+    return BlockIntervalIndex((BlockSpan(*row) for row in rows), _load_series(db, user_id))
+
+
+def load_series_index(db: Session, user_id) -> BlockIntervalIndex:
+    """Index holding only `user_id`'s recurring series, for callers that get plain blocks elsewhere."""
+    return BlockIntervalIndex((), _load_series(db, user_id))
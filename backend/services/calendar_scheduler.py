@@ -0,0 +1,230 @@
+"""
+Calendar Auto-Scheduling Service
+Plans study and break blocks for unscheduled assignments on the server
+"""
+
+import math
+import random
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from backend.models.models import Assignment, UserSettings, BreakActivity
+from backend.models.calendar_models import CalendarBlock
+from backend.services.calendar_index import load_window_index
+
+# Same bounds as the calendar day view (static/js/calendar.js)
+START_HOUR = 6
+END_HOUR = 22
+SLOT_MIN = 30
+
+MAX_SPREAD_DAYS = 14  # days used to spread sessions over when pacing an assignment
+DEFAULT_HORIZON_DAYS = 7  # planning window for assignments without a future due date
+
+
+class FreeSlotIndex:
+    """
+    Sorted, merged busy intervals supporting "earliest free start" lookups.
+
+    Lookups bisect to the first relevant busy interval and only walk the
+    intervals that actually collide with the requested span, instead of
+    rescanning every block for each candidate slot.
+    """
+
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(intervals):
+            if self.ends and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        i = bisect_right(self.starts, start) - 1
+        if i >= 0 and self.ends[i] > start:
+            return False
+        return i + 1 >= len(self.starts) or self.starts[i + 1] >= end
+
+    def earliest_start(self, start: datetime, duration: timedelta, step: timedelta) -> datetime:
+        """First time >= start on the `step` grid anchored at `start` where `duration` fits."""
+        def align(t):
+            if t <= start:
+                return start
+            return start + math.ceil((t - start) / step) * step
+
+        candidate = start
+        i = bisect_right(self.starts, candidate) - 1
+        if i < 0 or self.ends[i] <= candidate:
+            i += 1
+        while i < len(self.starts) and self.starts[i] < candidate + duration:
+            if self.ends[i] > candidate:
+                candidate = align(self.ends[i])
+            i += 1
+        return candidate
+
+    def reserve(self, start: datetime, end: datetime):
+        """Mark [start, end) busy; callers only reserve spans they found free."""
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+
+
+def _ceil_to_slot(t: datetime) -> datetime:
+    t = t.replace(second=0, microsecond=0)
+    remainder = t.minute % SLOT_MIN
+    return t + timedelta(minutes=SLOT_MIN - remainder) if remainder else t
+
+
+def _break_title(activities: dict, is_long: bool) -> str:
+    names = activities.get("long" if is_long else "short")
+    if not names:
+        return "🌿 Break" if is_long else "🌿 Short Break"
+    return f"🌿 {random.choice(names)}"
+
+
+def _scheduling_preferences(settings_row) -> dict:
+    """UserSettings values used by the planner, with the calendar page's fallbacks."""
+    defaults = {
+        "work_interval": 25,
+        "short_break": 5,
+        "long_break": 15,
+        "preferred_start_hour": START_HOUR,
+        "preferred_end_hour": END_HOUR,
+    }
+    prefs = {}
+    for key, default in defaults.items():
+        value = getattr(settings_row, key, None)
+        # Hour 0 is a valid preference; a zero-length interval is not
+        prefs[key] = value if value is not None and (value or key.endswith("_hour")) else default
+    return prefs
+
+
+def _plan_assignment(assignment, prefs: dict, index: FreeSlotIndex, start: datetime, activities: dict, user_id=None):
+    """Plan one assignment into `index`; returns (blocks, unscheduled minutes)."""
+    work = timedelta(minutes=prefs["work_interval"])
+    short_break = timedelta(minutes=prefs["short_break"])
+    long_break = timedelta(minutes=prefs["long_break"])
+    pref_start, pref_end = prefs["preferred_start_hour"], prefs["preferred_end_hour"]
+    step = timedelta(minutes=SLOT_MIN)
+
+    today = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    due = assignment.due_date.replace(hour=23, minute=59, second=59, microsecond=0) if assignment.due_date else None
+    if due is None or due < today:
+        due = today + timedelta(days=DEFAULT_HORIZON_DAYS)
+
+    total_minutes = assignment.estimated_time or 0
+    days_available = max(1, math.ceil((due - today) / timedelta(days=1)))
+    days_to_use = max(1, min(days_available, MAX_SPREAD_DAYS))
+    total_sessions = math.ceil(total_minutes / prefs["work_interval"])
+    sessions_per_day = min(4, max(2, math.ceil(total_sessions / days_to_use)))
+    # Urgent work may run past the preferred end hour, up to END_HOUR
+    fits_preferred = total_minutes <= (pref_end - pref_start) * 60 * days_available * 0.7
+    day_end_hour = pref_end if fits_preferred else END_HOUR
+
+    blocks = []
+    remaining = total_minutes
+    session_count = 0
+    day = today
+    cursor = max(_ceil_to_slot(start), today.replace(hour=pref_start))
+
+    while remaining > 0 and day <= due:
+        day_end = min(day.replace(hour=day_end_hour), day.replace(hour=END_HOUR), due)
+        sessions_today = 0
+
+        while remaining > 0 and sessions_today < sessions_per_day:
+            length = min(work, timedelta(minutes=remaining))
+            session_start = index.earliest_start(cursor, length, step)
+            session_end = session_start + length
+            if session_end > day_end:
+                break
+
+            index.reserve(session_start, session_end)
+            blocks.append(CalendarBlock(
+                title=assignment.name,
+                start_datetime=session_start,
+                end_datetime=session_end,
+                block_type="study",
+                assignment_id=assignment.id,
+                user_id=user_id,
+            ))
+            remaining -= int(length.total_seconds() // 60)
+            session_count += 1
+            sessions_today += 1
+            cursor = session_end
+
+            # Long break after every fourth session, short break otherwise
+            is_long = session_count % 4 == 0
+            break_end = cursor + (long_break if is_long else short_break)
+            if break_end > day.replace(hour=END_HOUR):
+                break
+            if index.is_free(cursor, break_end):
+                index.reserve(cursor, break_end)
+                blocks.append(CalendarBlock(
+                    title=_break_title(activities, is_long),
+                    start_datetime=cursor,
+                    end_datetime=break_end,
+                    block_type="break",
+                    user_id=user_id,
+                ))
+            cursor = break_end
+
+        day += timedelta(days=1)
+        cursor = day.replace(hour=pref_start)
+
+    return blocks, remaining
+
+
+def auto_schedule(db: Session, user_id=None, start: datetime = None) -> dict:
+    """
+    Schedule every incomplete assignment that has no calendar blocks yet.
+
+    The user's existing blocks in the planning window come from their cached
+    interval index and seed a FreeSlotIndex; all new blocks are flushed together and left for the
+    caller to commit as a single transaction.
+    """
+    prefs = _scheduling_preferences(db.query(UserSettings).first())
+
+    now = datetime.now()
+    start = max(start or now, now)
+
+    scheduled_ids = db.query(CalendarBlock.assignment_id).filter(CalendarBlock.assignment_id.isnot(None))
+    query = db.query(Assignment).filter(
+        Assignment.completed == False,
+        Assignment.id.notin_(scheduled_ids)
+    )
+    if user_id is not None:
+        query = query.filter(Assignment.user_id == user_id)
+    assignments = query.order_by(Assignment.id).all()
+
+    if not assignments:
+        return {"assignments": [], "blocks": []}
+
+    today = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    horizon = max(
+        [a.due_date for a in assignments if a.due_date] + [today + timedelta(days=DEFAULT_HORIZON_DAYS)]
+    ) + timedelta(days=1)
+    # Planned blocks are written, so read the busy time from the database, not the cache
+    existing = load_window_index(db, user_id, today, horizon).overlapping(today, horizon)
+    index = FreeSlotIndex((b.start_datetime, b.end_datetime) for b in existing)
+
+    activities = {}
+    for activity in db.query(BreakActivity).all():
+        activities.setdefault(activity.activity_type, []).append(activity.name)
+
+    summary = []
+    new_blocks = []
+    for assignment in assignments:
+        blocks, remaining = _plan_assignment(assignment, prefs, index, start, activities, user_id)
+        new_blocks.extend(blocks)
+        summary.append({
+            "assignment_id": assignment.id,
+            "name": assignment.name,
+            "sessions": sum(1 for b in blocks if b.block_type == "study"),
+            "unscheduled_minutes": remaining,
+        })
+
+    # Flush assigns ids; the caller commits the whole plan as one transaction
+    db.add_all(new_blocks)
+    db.flush()
+    return {"assignments": summary, "blocks": new_blocks}
@@ -55,15 +55,26 @@ class NotificationScheduler:
                 NotificationRule.is_enabled == True
             ).all()
             
+            # Load owners and preferences for every rule up front rather than per rule
+            user_ids = {rule.user_id for rule in rules}
+            users = {
+                user.id: user
+                for user in db.query(User).filter(User.id.in_(user_ids)).all()
+            } if user_ids else {}
+            prefs = {
+                pref.user_id: pref
+                for pref in db.query(NotificationPreference).filter(
+                    NotificationPreference.user_id.in_(user_ids)
+                ).all()
+            } if user_ids else {}
+            
             for rule in rules:
                 # Check if user has notifications enabled
-                user = db.query(User).filter(User.id == rule.user_id).first()
+                user = users.get(rule.user_id)
                 if not user:
                     continue
                 
-                pref = db.query(NotificationPreference).filter(
-                    NotificationPreference.user_id == rule.user_id
-                ).first()
+                pref = prefs.get(rule.user_id)
                 
                 if pref and not pref.notifications_enabled:
                     continue
@@ -233,7 +244,7 @@ class NotificationScheduler:
     
     async def _check_streak_notifications(self, rule, db, current_time):
         """Check and create notifications for streak maintenance"""
-        user = db.query(User).filter(User.id == rule.user_id).first()
+        user = db.get(User, rule.user_id)  # already in the identity map
         if not user or user.current_streak == 0:
             return
         
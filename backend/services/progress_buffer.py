@@ -0,0 +1,219 @@
+"""
+Assignment Progress Buffer
+Coalesces timer heartbeats and progress posts in memory and writes them in batched transactions
+"""
+
+import asyncio
+import logging
+import threading
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+from backend.core.config import settings
+from backend.database import SessionLocal
+from backend.models.models import Assignment
+from backend.models.user_models import User
+
+logger = logging.getLogger(__name__)
+
+MAX_HEARTBEAT_SECONDS = 10 * 60  # longest gap one heartbeat may report
+
+
+class PendingProgress:
+    """Unwritten changes to one assignment's time_spent"""
+
+    __slots__ = ("minutes", "seconds")
+
+    def __init__(self):
+        self.minutes = None  # absolute time_spent from a progress post, if any
+        self.seconds = 0  # heartbeat time on top of that
+
+    def merge(self, other: "PendingProgress"):
+        # Used to put back a batch that failed to write, ahead of newer updates
+        if self.minutes is None:
+            self.minutes = other.minutes
+            self.seconds += other.seconds
+
+
+class ProgressBuffer:
+    """
+    Write-behind buffer for Assignment.time_spent.
+
+    Updates are merged per assignment, so a flush writes each touched
+    assignment once however many heartbeats arrived. A background task
+    flushes every PROGRESS_FLUSH_INTERVAL seconds; callers that need their
+    update on disk before answering wait for the next flush instead of
+    committing on their own.
+    """
+
+    def __init__(self):
+        self._pending = {}  # assignment id -> PendingProgress
+        self._carry = {}  # assignment id -> heartbeat seconds short of a whole minute
+        self._lock = threading.Lock()
+        self._wake = None
+        self._waiters = []
+        self.running = False
+
+    def add_seconds(self, assignment_id: int, seconds: int):
+        with self._lock:
+            self._pending.setdefault(assignment_id, PendingProgress()).seconds += seconds
+
+    def set_minutes(self, assignment_id: int, minutes: int):
+        with self._lock:
+            entry = self._pending.setdefault(assignment_id, PendingProgress())
+            # An explicit total replaces any time reported before it
+            entry.minutes = minutes
+            entry.seconds = 0
+            self._carry.pop(assignment_id, None)
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            self._carry.clear()
+
+    def flush(self, db: Session = None) -> int:
+        """Write everything buffered in one transaction; returns assignments updated"""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        own_session = db is None
+        db = db or SessionLocal()
+        carried = {}
+        try:
+            found = set(db.scalars(select(Assignment.id).where(Assignment.id.in_(batch))))
+            totals, increments = [], []
+            with self._lock:
+                # Kept so a failed write can put the carried seconds back exactly
+                carried = {assignment_id: self._carry.get(assignment_id) for assignment_id in found}
+                for assignment_id in found:
+                    entry = batch[assignment_id]
+                    seconds = self._carry.pop(assignment_id, 0) + entry.seconds
+                    if seconds % 60:
+                        self._carry[assignment_id] = seconds % 60
+                    if entry.minutes is not None:
+                        totals.append({"b_id": assignment_id, "b_minutes": entry.minutes + seconds // 60})
+                    elif seconds >= 60:
+                        increments.append({"b_id": assignment_id, "b_minutes": seconds // 60})
+
+            table = Assignment.__table__
+            if totals:
+                db.execute(
+                    update(table).where(table.c.id == bindparam("b_id")).values(time_spent=bindparam("b_minutes")),
+                    totals,
+                )
+            if increments:
+                # Added in SQL, so concurrent workers' heartbeats don't overwrite each other
+                db.execute(
+                    update(table).where(table.c.id == bindparam("b_id"))
+                    .values(time_spent=func.coalesce(table.c.time_spent, 0) + bindparam("b_minutes")),
+                    increments,
+                )
+
+            assignments = db.scalars(
+                select(Assignment).where(Assignment.id.in_(found)).execution_options(populate_existing=True)
+            ).all()
+            completed_users = set()
+            for assignment in assignments:
+                if self._update_status(assignment) and assignment.user_id:
+                    completed_users.add(assignment.user_id)
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                for assignment_id, seconds in carried.items():
+                    if seconds is None:
+                        self._carry.pop(assignment_id, None)
+                    else:
+                        self._carry[assignment_id] = seconds
+                for assignment_id, entry in batch.items():
+                    self._pending.setdefault(assignment_id, PendingProgress()).merge(entry)
+            if own_session:
+                db.close()
+            raise
+
+        try:
+            if completed_users:
+                self._award_achievements(db, completed_users)
+        finally:
+            if own_session:
+                db.close()
+        return len(assignments)
+
+    @staticmethod
+    def _update_status(assignment) -> bool:
+        """Same completion rule as the progress endpoint; True if it just completed"""
+        was_completed = assignment.completed
+        if (assignment.time_spent or 0) >= assignment.estimated_time:
+            assignment.completed = True
+            assignment.status = 'completed'
+        elif (assignment.time_spent or 0) > 0:
+            assignment.status = 'in_progress'
+        return assignment.completed and not was_completed
+
+    @staticmethod
+    def _award_achievements(db: Session, user_ids):
+        from backend.routes.auth_routes import check_and_award_achievements
+
+        for user in db.query(User).filter(User.id.in_(user_ids)).all():
+            check_and_award_achievements(user, db)
+
+    async def start(self):
+        """Flush on an interval, or sooner when a caller is waiting"""
+        self.running = True
+        self._wake = asyncio.Event()
+        logger.info("Progress buffer flusher started")
+
+        while self.running:
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.PROGRESS_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            await self._flush_and_notify()
+        await self._flush_and_notify()
+
+    async def _flush_and_notify(self):
+        self._wake.clear()
+        waiters, self._waiters = self._waiters, []
+        error = None
+        try:
+            # The ORM work is blocking, so keep it off the event loop
+            await asyncio.to_thread(self.flush)
+        except Exception as e:
+            logger.error(f"Error flushing assignment progress: {e}")
+            error = e
+        for waiter in waiters:
+            if not waiter.done():
+                if error is None:
+                    waiter.set_result(None)
+                else:
+                    waiter.set_exception(error)
+
+    async def flush_now(self, db: Session = None):
+        """
+        Wait until everything buffered so far is committed.
+
+        Concurrent callers share one transaction. Without a running flusher
+        (scripts, tests) the flush happens inline on `db`.
+        """
+        if not self.running or self._wake is None:
+            self.flush(db)
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._wake.set()
+        await waiter
+
+    def stop(self):
+        """Stop the flusher; it writes whatever is left before exiting"""
+        self.running = False
+        if self._wake is not None:
+            self._wake.set()
+        logger.info("Progress buffer flusher stopped")
+
+
+# Global buffer instance
+progress_buffer = ProgressBuffer()
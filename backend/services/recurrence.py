@@ -0,0 +1,140 @@
+"""
+Recurrence Rules
+RRULE-style rules for recurring calendar blocks, expanded lazily per window
+"""
+
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+FREQUENCIES = ("DAILY", "WEEKLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+
+class RecurrenceRule:
+    """
+    Parsed subset of RFC 5545 RRULE: FREQ=DAILY|WEEKLY, INTERVAL, BYDAY (weekly
+    only), COUNT and UNTIL, e.g. "FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20261218".
+    """
+
+    __slots__ = ("freq", "interval", "byday", "count", "until")
+
+    def __init__(self, freq, interval=1, byday=(), count=None, until=None):
+        self.freq = freq
+        self.interval = interval
+        self.byday = tuple(byday)
+        self.count = count
+        self.until = until
+
+    @classmethod
+    def parse(cls, text: str) -> "RecurrenceRule":
+        """Parse an RRULE string; raises ValueError on anything unsupported"""
+        if text.upper().startswith("RRULE:"):
+            text = text[6:]
+        parts = {}
+        for part in filter(None, text.strip().split(";")):
+            key, sep, value = part.partition("=")
+            if not sep or not value:
+                raise ValueError(f"Malformed rule part: {part}")
+            parts[key.strip().upper()] = value.strip().upper()
+
+        freq = parts.pop("FREQ", None)
+        if freq not in FREQUENCIES:
+            raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+
+        interval = int(parts.pop("INTERVAL", 1))
+        if interval < 1:
+            raise ValueError("INTERVAL must be at least 1")
+
+        byday = ()
+        if "BYDAY" in parts:
+            if freq != "WEEKLY":
+                raise ValueError("BYDAY is only supported with FREQ=WEEKLY")
+            days = parts.pop("BYDAY").split(",")
+            if any(d not in WEEKDAYS for d in days):
+                raise ValueError(f"BYDAY values must be in {','.join(WEEKDAYS)}")
+            byday = sorted({WEEKDAYS.index(d) for d in days})
+
+        count = int(parts.pop("COUNT")) if "COUNT" in parts else None
+        if count is not None and count < 1:
+            raise ValueError("COUNT must be at least 1")
+
+        until = None
+        if "UNTIL" in parts:
+            value = parts.pop("UNTIL").rstrip("Z")
+            until = datetime.strptime(value, "%Y%m%dT%H%M%S" if "T" in value else "%Y%m%d")
+            if "T" not in value:
+                until = until.replace(hour=23, minute=59, second=59)
+        if count is not None and until is not None:
+            raise ValueError("COUNT and UNTIL cannot both be set")
+
+        if parts:
+            raise ValueError(f"Unsupported rule parts: {', '.join(sorted(parts))}")
+        return cls(freq, interval, byday, count, until)
+
+    def __str__(self):
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.byday:
+            parts.append("BYDAY=" + ",".join(WEEKDAYS[d] for d in self.byday))
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.until is not None:
+            parts.append(f"UNTIL={self.until:%Y%m%dT%H%M%S}")
+        return ";".join(parts)
+
+    def occurrences(self, dtstart: datetime, duration: timedelta, window_start: datetime, window_end: datetime):
+        """
+        (start, end) of every occurrence intersecting [window_start, window_end).
+
+        Jumps straight to the first period that can reach the window, so the
+        cost depends on the occurrences returned, not on how long ago the
+        series started.
+        """
+        if self.freq == "DAILY":
+            base = dtstart
+            period = timedelta(days=self.interval)
+            offsets = [timedelta(0)]
+        else:
+            base = dtstart - timedelta(days=dtstart.weekday())
+            period = timedelta(weeks=self.interval)
+            offsets = [timedelta(days=d) for d in (self.byday or (dtstart.weekday(),))]
+
+        # Occurrences in the first period that fall before dtstart don't count
+        first_period = [o for o in offsets if base + o >= dtstart]
+
+        results = []
+        p = max(0, (window_start - duration - base) // period)
+        while True:
+            period_start = base + p * period
+            if period_start >= window_end:
+                break
+            if self.until is not None and period_start > self.until:
+                break
+            for j, offset in enumerate(first_period if p == 0 else offsets):
+                start = period_start + offset
+                number = j if p == 0 else len(first_period) + (p - 1) * len(offsets) + j
+                if self.count is not None and number >= self.count:
+                    return results
+                if self.until is not None and start > self.until:
+                    return results
+                if start >= window_end:
+                    break
+                if start + duration > window_start:
+                    results.append((start, start + duration))
+            p += 1
+        return results
+
+
+@lru_cache(maxsize=4096)
+def expand_window(rule: str, dtstart: datetime, duration_minutes: int, window_start: datetime, window_end: datetime) -> tuple:
+    """
+    Cached expansion of one series over one window.
+
+    Every input that affects the result is part of the key, so editing a
+    series simply produces a new key and nothing has to be invalidated.
+    """
+    occurrences = RecurrenceRule.parse(rule).occurrences(
+        dtstart, timedelta(minutes=duration_minutes), window_start, window_end
+    )
+    return tuple(occurrences)
@@ -0,0 +1,153 @@
+"""
+Reference Data Snapshot
+Immutable in-process copy of time methods, achievements and default break activities, reloaded on a version bump
+"""
+
+import enum
+import json
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from itertools import chain
+from types import MappingProxyType
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+from backend.core.config import settings
+from backend.models.meta_models import AppMeta
+from backend.models.models import BreakActivity
+from backend.models.time_models import TimeMethod
+from backend.models.user_models import Achievement
+
+VERSION_KEY = "reference_version"  # app_meta row bumped whenever reference rows change
+
+
+def _record_type(model):
+    return namedtuple(f"{model.__name__}Record", [column.key for column in model.__table__.columns])
+
+
+# Read-only stand-ins for the ORM rows: same attribute names, no session attached
+TimeMethodRecord = _record_type(TimeMethod)
+AchievementRecord = _record_type(Achievement)
+BreakActivityRecord = _record_type(BreakActivity)
+
+ReferenceSnapshot = namedtuple(
+    "ReferenceSnapshot",
+    "version time_methods methods_by_type achievements default_activities time_methods_json achievements_json"
+)
+
+_snapshot = None
+_checked_at = 0.0  # monotonic time the stored version was last compared
+_generation = 0  # bumped on every invalidation so stale loads are discarded
+_lock = threading.Lock()
+
+
+def to_json(records) -> bytes:
+    """Serialize records the way JSONResponse would, enums as their values"""
+    return json.dumps(
+        [{key: value.value if isinstance(value, enum.Enum) else value for key, value in record._asdict().items()}
+         for record in records],
+        ensure_ascii=False, separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _stored_version(db: Session) -> int:
+    value = db.execute(select(AppMeta.value).where(AppMeta.key == VERSION_KEY)).scalar()
+    return int(value) if value else 0
+
+
+def load_reference_snapshot(db: Session, version: int = None) -> ReferenceSnapshot:
+    """Read every reference row and replace the snapshot; called at startup and on a version change"""
+    global _snapshot, _checked_at
+    generation = _generation
+    if version is None:
+        version = _stored_version(db)
+
+    methods = tuple(TimeMethodRecord(*row) for row in db.execute(select(TimeMethod.__table__).order_by(TimeMethod.id)))
+    achievements = tuple(AchievementRecord(*row) for row in db.execute(select(Achievement.__table__).order_by(Achievement.id)))
+    activities = tuple(BreakActivityRecord(*row) for row in db.execute(
+        select(BreakActivity.__table__).where(BreakActivity.settings_id.is_(None)).order_by(BreakActivity.id)
+    ))
+    snapshot = ReferenceSnapshot(
+        version=version,
+        time_methods=methods,
+        methods_by_type=MappingProxyType({method.method_type: method for method in methods}),
+        achievements=achievements,
+        default_activities=activities,
+        time_methods_json=to_json(methods),
+        achievements_json=to_json(achievements),
+    )
+    with _lock:
+        # A change was committed while loading; serve this result but don't keep it
+        if _generation == generation:
+            _snapshot = snapshot
+            _checked_at = time.monotonic()
+    return snapshot
+
+
+def reference_snapshot(db: Session) -> ReferenceSnapshot:
+    """
+    The current snapshot, reloaded if the stored version has moved on.
+
+    The version is compared at most every REFERENCE_CHECK_INTERVAL seconds,
+    so other workers' changes appear within that window; changes committed
+    in this worker drop the snapshot immediately.
+    """
+    global _checked_at
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - _checked_at < settings.REFERENCE_CHECK_INTERVAL:
+        return snapshot
+
+    version = _stored_version(db)
+    if snapshot is not None and snapshot.version == version:
+        _checked_at = time.monotonic()
+        return snapshot
+    return load_reference_snapshot(db, version)
+
+
+def time_methods_page(snapshot: ReferenceSnapshot, skip: int = 0, limit: int = 100) -> bytes:
+    """JSON for a page of time methods; the full list is already serialized"""
+    if skip <= 0 and limit >= len(snapshot.time_methods):
+        return snapshot.time_methods_json
+    return to_json(snapshot.time_methods[max(skip, 0):max(skip, 0) + limit])
+
+
+def invalidate_reference_snapshot():
+    global _snapshot, _generation
+    with _lock:
+        _generation += 1
+        _snapshot = None
+
+
+def _is_reference_row(obj) -> bool:
+    return isinstance(obj, (TimeMethod, Achievement)) or (
+        isinstance(obj, BreakActivity) and obj.settings_id is None
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_reference_version(session, flush_context):
+    # Bump in the same transaction as the change, so other workers reload once it commits
+    if not any(_is_reference_row(obj) for obj in chain(session.new, session.dirty, session.deleted)):
+        return
+    connection = session.connection()
+    current = connection.execute(select(AppMeta.value).where(AppMeta.key == VERSION_KEY)).scalar()
+    if current is None:
+        connection.execute(insert(AppMeta).values(key=VERSION_KEY, value="1", updated_at=datetime.utcnow()))
+    else:
+        connection.execute(
+            update(AppMeta).where(AppMeta.key == VERSION_KEY)
+            .values(value=str(int(current) + 1), updated_at=datetime.utcnow())
+        )
+    session.info["reference_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_snapshot_on_commit(session):
+    if session.info.pop("reference_changed", False):
+        invalidate_reference_snapshot()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_reference_change(session):
+    session.info.pop("reference_changed", None)
@@ -0,0 +1,61 @@
+"""
+Settings Cache
+Read-through cache for the timer settings and break activities, tagged with a version for ETags
+"""
+
+import secrets
+import threading
+import time
+from collections import namedtuple
+from backend.core.config import settings
+
+# version is taken from a counter on every load, so it identifies the exact
+# payload; the per-process prefix keeps one worker's tag from matching another's
+CachedEntry = namedtuple("CachedEntry", "version loaded_at payload")
+
+_PROCESS_TAG = secrets.token_hex(4)
+_entries = {}  # key -> CachedEntry
+_counter = 0  # bumped on every load
+_generation = 0  # bumped on every invalidation so stale loads are discarded
+_lock = threading.Lock()
+
+
+def etag_for(entry: CachedEntry) -> str:
+    return f'"{_PROCESS_TAG}-{entry.version}"'
+
+
+def read_through(key, loader) -> CachedEntry:
+    """
+    Return the cached entry for `key`, calling `loader()` on a miss.
+
+    Entries expire after SETTINGS_CACHE_TTL so writes made by other workers
+    are picked up; writes in this worker invalidate immediately.
+    """
+    global _counter
+    entry = _entries.get(key)
+    if entry is not None and time.monotonic() - entry.loaded_at < settings.SETTINGS_CACHE_TTL:
+        return entry
+
+    previous = entry
+    generation = _generation
+    payload = loader()
+    with _lock:
+        if previous is not None and previous.payload == payload:
+            # Expired but unchanged: keep the version so clients still get 304s
+            version = previous.version
+        else:
+            _counter += 1
+            version = _counter
+        entry = CachedEntry(version, time.monotonic(), payload)
+        # An invalidation ran while loading; serve this result but don't keep it
+        if _generation == generation:
+            _entries[key] = entry
+    return entry
+
+
+def invalidate_settings_cache():
+    """Drop every entry after a committed write to settings or break activities"""
+    global _generation
+    with _lock:
+        _generation += 1
+        _entries.clear()
@@ -0,0 +1,111 @@
+"""
+Daily Study Totals
+Per-user study time per day, updated when a session ends instead of re-summed on every read
+"""
+
+from datetime import date, datetime, timedelta
+from sqlalchemy.orm import Session
+from backend.core.upsert import upsert
+from backend.models.models import StudySession
+from backend.models.limit_models import DailyStudyTotal
+
+
+def _owned_by(model, user_id):
+    return model.user_id.is_(None) if user_id is None else model.user_id == user_id
+
+
+def split_by_day(start: datetime, end: datetime):
+    """(day, seconds) for each calendar day [start, end) touches"""
+    while start < end:
+        next_midnight = datetime.combine(start.date() + timedelta(days=1), datetime.min.time())
+        segment_end = min(end, next_midnight)
+        yield start.date(), (segment_end - start).total_seconds()
+        start = segment_end
+
+
+def record_session(db: Session, session: StudySession):
+    """
+    Add a finished session to its owner's daily totals; the caller commits.
+
+    The seconds are added in SQL by an upsert, so workers ending sessions
+    for the same user and day can't lose an increment or collide on insert.
+    (Logged-out sessions have no user, so each gets its own rows; reads sum them.)
+    """
+    if session.end_time is None:
+        return
+    rows = [
+        {"user_id": session.user_id, "day": day, "seconds": int(seconds)}
+        for day, seconds in split_by_day(session.start_time, session.end_time)
+    ]
+    if not rows:
+        return
+    table = DailyStudyTotal.__table__
+    new, on_conflict = upsert(db, table, [table.c.user_id, table.c.day])
+    db.execute(on_conflict({"seconds": table.c.seconds + new.seconds}), rows)
+
+
+def day_totals(db: Session, user_id, first_day: date, last_day: date, now: datetime = None) -> dict:
+    """
+    Seconds studied on each day in [first_day, last_day], keyed by date.
+
+    Finished sessions come from the stored totals; sessions still running are
+    counted from their start time up to `now`, so nothing is written until
+    they end.
+    """
+    now = now or datetime.utcnow()
+    totals = {first_day + timedelta(days=i): 0 for i in range((last_day - first_day).days + 1)}
+
+    rows = db.query(DailyStudyTotal.day, DailyStudyTotal.seconds).filter(
+        _owned_by(DailyStudyTotal, user_id),
+        DailyStudyTotal.day >= first_day,
+        DailyStudyTotal.day <= last_day,
+    ).all()
+    for day, seconds in rows:
+        totals[day] += seconds
+
+    running = db.query(StudySession.start_time).filter(
+        _owned_by(StudySession, user_id), StudySession.end_time.is_(None)
+    ).all()
+    window_start = datetime.combine(first_day, datetime.min.time())
+    window_end = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+    for (start_time,) in running:
+        for day, seconds in split_by_day(max(start_time, window_start), min(now, window_end)):
+            totals[day] += int(seconds)
+    return totals
+
+
+def limit_forecast(db: Session, user_id, limit_minutes: int, now: datetime = None) -> dict:
+    """
+    Remaining daily budget and the moment running sessions will use it up.
+
+    `limit_at` is None while nothing is running: the answer can only change
+    when a session starts or stops, so clients ask again at that point.
+    """
+    now = now or datetime.utcnow()
+    today = now.date()
+    used = day_totals(db, user_id, today, today, now)[today]
+    running = db.query(StudySession.id).filter(
+        _owned_by(StudySession, user_id), StudySession.end_time.is_(None)
+    ).count()
+
+    limit_seconds = limit_minutes * 60
+    remaining = max(0, limit_seconds - used)
+    midnight = datetime.combine(today + timedelta(days=1), datetime.min.time())
+
+    limit_at = None
+    if running and remaining:
+        # Every running session accrues time, so overlapping sessions drain the budget faster
+        limit_at = now + timedelta(seconds=remaining / running)
+        if limit_at > midnight:
+            # The budget resets at midnight and is then drained from zero
+            limit_at = midnight + timedelta(seconds=limit_seconds / running)
+
+    return {
+        "daily_limit_minutes": limit_minutes,
+        "used_minutes": int(used // 60),
+        "remaining_seconds": int(remaining),
+        "running_sessions": running,
+        "limit_reached": remaining == 0,
+        "limit_at": limit_at,
+        "resets_at": midnight,
+    }
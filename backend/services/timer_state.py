@@ -0,0 +1,130 @@
+"""
+Timer State Machine
+Server-side focus timer kept as phase + start timestamp and evaluated lazily on read
+"""
+
+from datetime import datetime, timedelta
+from backend.models.time_models import UserTimerState
+
+ACTIONS = ("start", "pause", "reset", "next")
+DURATION_FIELDS = ("work_seconds", "short_break_seconds", "long_break_seconds", "cycles_before_long_break")
+DEFAULT_WORK_SECONDS = 25 * 60
+# Work length per method when a client picks one without sending a length; None counts up
+METHOD_WORK_SECONDS = {"pomodoro": 25 * 60, "52-17": 52 * 60, "ultradian": 90 * 60, "flowtime": None}
+
+
+def new_timer_state(user_id: int) -> UserTimerState:
+    """Idle Pomodoro timer with the same defaults as the timer page"""
+    return UserTimerState(
+        user_id=user_id, method="pomodoro", phase="work", status="idle", elapsed_seconds=0,
+        work_seconds=DEFAULT_WORK_SECONDS, short_break_seconds=5 * 60, long_break_seconds=15 * 60,
+        cycles_before_long_break=4, completed_intervals=0, version=1,
+    )
+
+
+def phase_duration(state: UserTimerState):
+    """Length of the current phase in seconds; None when it counts up"""
+    if state.phase == "short_break":
+        return state.short_break_seconds
+    if state.phase == "long_break":
+        return state.long_break_seconds
+    return state.work_seconds
+
+
+def _elapsed(state: UserTimerState, now: datetime) -> int:
+    if state.status == "running":
+        return max(0, int((now - state.started_at).total_seconds()))
+    if state.status == "paused":
+        return state.elapsed_seconds
+    return 0
+
+
+def evaluate(state: UserTimerState, now: datetime = None) -> dict:
+    """
+    Snapshot of the timer at `now`, computed from the stored fields alone.
+
+    A running phase that has passed its duration reads as complete with no
+    time remaining; nothing is written until a client acts on it.
+    """
+    now = now or datetime.utcnow()
+    duration = phase_duration(state)
+    elapsed = _elapsed(state, now)
+    complete = duration is not None and elapsed >= duration
+    if duration is not None:
+        elapsed = min(elapsed, duration)
+    running = state.status == "running" and not complete
+    return {
+        "method": state.method,
+        "phase": state.phase,
+        "status": "complete" if complete else state.status,
+        "phase_duration": duration,
+        "elapsed": elapsed,
+        "ends_at": state.started_at + timedelta(seconds=duration) if running and duration is not None else None,
+        "started_at": state.started_at if state.status == "running" else None,
+        "version": state.version,
+        "is_running": running,
+        "is_break": state.phase != "work",
+        "is_long_break": state.phase == "long_break",
+        "time_remaining": duration - elapsed if duration is not None else 0,
+        "current_interval": state.completed_intervals,
+        "total_intervals": state.cycles_before_long_break,
+    }
+
+
+def apply_action(state: UserTimerState, action: str, now: datetime = None, config: dict = None):
+    """
+    Move the timer through one transition; raises ValueError if `action`
+    isn't allowed from the current state. `config` (method and durations)
+    is only taken while the timer is idle or being reset.
+    """
+    now = now or datetime.utcnow()
+    config = {k: v for k, v in (config or {}).items() if v is not None}
+    complete = evaluate(state, now)["status"] == "complete"
+
+    if action == "start":
+        if state.status == "running" and not complete:
+            raise ValueError("Timer is already running")
+        if complete:
+            raise ValueError("Phase is complete; advance to the next phase first")
+        if state.status == "idle":
+            _configure(state, config)
+            state.started_at = now
+        else:
+            state.started_at = now - timedelta(seconds=state.elapsed_seconds)
+        state.status = "running"
+    elif action == "pause":
+        if state.status != "running" or complete:
+            raise ValueError("Timer is not running")
+        state.elapsed_seconds = _elapsed(state, now)
+        state.started_at = None
+        state.status = "paused"
+    elif action == "reset":
+        _configure(state, config)
+        _idle(state)
+    elif action == "next":
+        if state.phase == "work":
+            state.completed_intervals += 1
+            long_break = state.completed_intervals % max(1, state.cycles_before_long_break) == 0
+            state.phase = "long_break" if long_break else "short_break"
+        else:
+            state.phase = "work"
+        _idle(state)
+    else:
+        raise ValueError(f"Unknown timer action: {action}")
+    state.version += 1
+
+
+def _idle(state: UserTimerState):
+    state.status = "idle"
+    state.started_at = None
+    state.elapsed_seconds = 0
+
+
+def _configure(state: UserTimerState, config: dict):
+    if "method" in config:
+        state.method = config["method"]
+        # Switching methods mustn't keep the previous method's length (or Flowtime's None)
+        state.work_seconds = METHOD_WORK_SECONDS.get(state.method, DEFAULT_WORK_SECONDS)
+    for field in DURATION_FIELDS:
+        if field in config:
+            setattr(state, field, config[field])
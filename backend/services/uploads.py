@@ -0,0 +1,114 @@
+"""
+Upload Storage
+Streams uploaded files to disk in chunks, enforcing the size limit and hashing them off the event loop.
+UploadLimitRoute refuses oversized request bodies before the multipart parser spools them.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import uuid
+from collections import namedtuple
+from pathlib import Path
+from fastapi import HTTPException, Request, UploadFile
+from fastapi.routing import APIRoute
+from backend.core.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+MULTIPART_OVERHEAD = 1024 * 1024  # room for boundaries and the form's other fields
+
+StoredUpload = namedtuple("StoredUpload", "path size sha256")
+
+
+class UploadTooLarge(Exception):
+    """The upload went past the allowed size"""
+
+
+def _write_chunk(file, digest, chunk: bytes):
+    # hashlib releases the GIL on large buffers, so this runs in parallel with the loop
+    digest.update(chunk)
+    file.write(chunk)
+
+
+def _discard(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def save_upload(upload: UploadFile, directory, filename: str = None, suffix: str = "", max_bytes: int = None) -> StoredUpload:
+    """
+    Stream `upload` into `directory` and return its path, size and SHA-256.
+
+    The file is named `filename`, or after its content hash, a random part
+    and `suffix`, so identical uploads still get a file each and deleting
+    one never removes another's audio. Chunks go to a temporary file that
+    is renamed into place once complete; an upload over `max_bytes`
+    (MAX_CONTENT_LENGTH by default) is stopped as soon as it crosses the
+    limit and leaves nothing behind.
+    """
+    max_bytes = settings.MAX_CONTENT_LENGTH if max_bytes is None else max_bytes
+    directory = Path(directory)
+    await asyncio.to_thread(directory.mkdir, parents=True, exist_ok=True)
+    fd, temp_path = await asyncio.to_thread(tempfile.mkstemp, dir=directory, suffix=".part")
+    file = os.fdopen(fd, "wb")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        try:
+            while chunk := await upload.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File is larger than {max_bytes // (1024 * 1024)} MB")
+                await asyncio.to_thread(_write_chunk, file, digest, chunk)
+        finally:
+            await asyncio.to_thread(file.close)
+        path = directory / (filename or f"{digest.hexdigest()}-{uuid.uuid4().hex}{suffix}")
+        await asyncio.to_thread(os.replace, temp_path, path)
+    except BaseException:
+        await asyncio.to_thread(_discard, temp_path)
+        raise
+    return StoredUpload(path, size, digest.hexdigest())
+
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Request body is larger than {limit // (1024 * 1024)} MB")
+
+
+class UploadLimitRoute(APIRoute):
+    """
+    Route whose request body may not exceed MAX_CONTENT_LENGTH plus
+    MULTIPART_OVERHEAD.
+
+    FastAPI parses a form (spooling files to disk) before the endpoint runs,
+    so save_upload's limit alone would apply only after an oversized body
+    had been received in full. This answers 413 up front from Content-Length
+    when it is sent, and otherwise as soon as the streamed body crosses the limit.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def limited_handler(request: Request):
+            limit = settings.MAX_CONTENT_LENGTH + MULTIPART_OVERHEAD
+            length = request.headers.get("content-length")
+            if length is not None and length.isdigit() and int(length) > limit:
+                raise _too_large(limit)
+
+            receive = request.receive
+            received = 0
+
+            async def limited_receive():
+                nonlocal received
+                message = await receive()
+                if message["type"] == "http.request":
+                    received += len(message.get("body", b""))
+                    if received > limit:
+                        raise _too_large(limit)
+                return message
+
+            return await handler(Request(request.scope, limited_receive))
+
+        return limited_handler
@@ -0,0 +1,98 @@
+"""
+Startup-time benchmark for the versioned bootstrap
+Compares the old per-start work (create_all + every seed function) with
+backend.bootstrap on a fresh and on an already-bootstrapped database, and
+times a cold `import app` in a fresh interpreter.
+Uses a temporary SQLite database; the real timeflow.db is not touched.
+"""
+import sys
+import os
+import time
+import tempfile
+import subprocess
+import statistics
+import argparse
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+TEMP_DIR = tempfile.mkdtemp(prefix="timeflow-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEMP_DIR, 'bench.db')}"
+
+from sqlalchemy.orm import Session
+from backend.database import Base, engine
+from backend.bootstrap import bootstrap
+import backend.models  # noqa: F401
+
+
+def legacy_startup():
+    """What every worker start and `import app` used to do"""
+    from backend.models.user_models import create_default_achievements
+    from backend.models.models import create_tables
+    from backend.scripts.seed_time_methods import seed_time_methods, seed_default_tracks
+
+    Base.metadata.create_all(bind=engine)
+    create_default_achievements()
+    create_tables()
+    db = Session(bind=engine)
+    try:
+        seed_time_methods(db)
+        seed_default_tracks(db)
+    finally:
+        db.close()
+
+
+def time_runs(fn, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), min(samples)
+
+
+def time_cold_import(runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", "import app"],
+            cwd=project_root, env=os.environ.copy(),
+            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), min(samples)
+
+
+def main(runs):
+    print("\n" + "="*60)
+    print("STARTUP BENCHMARK")
+    print("="*60)
+    print(f"Database: {engine.url}   runs: {runs}\n")
+
+    started = time.perf_counter()
+    applied = bootstrap()
+    print(f"bootstrap (fresh database):       {(time.perf_counter() - started) * 1000:8.2f} ms   {applied}")
+
+    median, best = time_runs(lambda: bootstrap(), runs)
+    print(f"bootstrap (already current):      {median:8.2f} ms median, {best:.2f} ms best")
+
+    # Seed functions print progress; keep the table readable
+    devnull = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, devnull
+    try:
+        median_legacy, best_legacy = time_runs(legacy_startup, runs)
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+    print(f"legacy create_all + seeds:        {median_legacy:8.2f} ms median, {best_legacy:.2f} ms best")
+    print(f"   -> speedup x{median_legacy / median:.1f} per worker start\n")
+
+    median_import, best_import = time_cold_import(max(1, runs // 5))
+    print(f"cold `import app` (no DB work):   {median_import:8.2f} ms median, {best_import:.2f} ms best")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    main(parser.parse_args().runs)
@@ -0,0 +1,75 @@
+"""
+Load test for the AsyncSession routes
+Start ONE worker first (uvicorn app:app --workers 1), then run this script
+(requires httpx).
+Throughput should grow with concurrency on async routes instead of staying
+flat, which is what happened while every query blocked the event loop.
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+DEFAULT_PATHS = ["/api/leaderboard", "/api/achievements"]
+
+
+async def run_level(client, path, concurrency, total):
+    """Fire `total` GETs at `path` with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code >= 500:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+    return total / elapsed, p95, errors
+
+
+async def main(base_url, paths, levels, total):
+    print("\n" + "="*60)
+    print("ASYNC DB LOAD TEST")
+    print("="*60)
+    print(f"Target: {base_url}  requests per level: {total}\n")
+
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        for path in paths:
+            print(f"GET {path}")
+            baseline = None
+            for level in levels:
+                rps, p95, errors = await run_level(client, path, level, total)
+                baseline = baseline or rps
+                print(f"   concurrency {level:>3}: {rps:8.1f} req/s   p95 {p95*1000:7.1f} ms   "
+                      f"scaling x{rps / baseline:4.1f}   errors {errors}")
+            print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", action="append", dest="paths")
+    parser.add_argument("--levels", default="1,4,16,64")
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    levels = [int(x) for x in args.levels.split(",")]
+    asyncio.run(main(args.base_url, args.paths or DEFAULT_PATHS, levels, args.requests))
@@ -3,15 +3,16 @@
   const START_HOUR = 6;
   const END_HOUR = 22;
   const SLOT_MIN = 30; // minutes
+  const MONTH_DOT_TYPES = ['study', 'break', 'busy'];
 
   // --- State ---
   let currentView = 'month'; // 'month' or 'day'
   let currentMonth = new Date();
   let currentDay = new Date();
   let blocks = [];
+  let monthSummary = {}; // 'YYYY-MM-DD' -> { study|break|busy: {count, minutes}, due }
   let assignments = [];
   let settings = null;
-  let breakActivities = [];
 
   // Day view state
   let slots = [];
@@ -139,30 +140,40 @@
       dayNum.textContent = date.getDate();
       dayCell.appendChild(dayNum);
 
-      // Event dots
-      const dayBlocks = getBlocksForDay(date);
-      if (dayBlocks.length > 0) {
+      // Event dots (one per block, by type, from the month summary)
+      const summary = monthSummary[localDateStr(date)] || {};
+      const total = MONTH_DOT_TYPES.reduce((n, type) => n + (summary[type] ? summary[type].count : 0), 0);
+      if (total > 0 || summary.due) {
         const dotsContainer = document.createElement('div');
         dotsContainer.className = 'flex flex-wrap gap-1';
 
         const maxDots = 5;
-        for (let j = 0; j < Math.min(dayBlocks.length, maxDots); j++) {
-          const block = dayBlocks[j];
-          const isBreak = block.title && (block.title.toLowerCase().includes('break') || block.title.toLowerCase().includes('rest'));
-          const dotClass = isBreak ? 'break' : (block.block_type === 'busy' ? 'busy' : 'study');
-          const dot = document.createElement('span');
-          dot.className = `event-dot ${dotClass}`;
-          dot.title = block.title;
-          dotsContainer.appendChild(dot);
+        let shown = 0;
+        for (const type of MONTH_DOT_TYPES) {
+          const stats = summary[type];
+          if (!stats) continue;
+          for (let j = 0; j < stats.count && shown < maxDots; j++, shown++) {
+            const dot = document.createElement('span');
+            dot.className = `event-dot ${type}`;
+            dot.title = `${stats.count} ${type} block${stats.count === 1 ? '' : 's'} (${minutesToHM(stats.minutes)})`;
+            dotsContainer.appendChild(dot);
+          }
         }
 
-        if (dayBlocks.length > maxDots) {
+        if (total > maxDots) {
           const more = document.createElement('span');
           more.className = 'text-xs text-gray-500 dark:text-gray-400';
-          more.textContent = `+${dayBlocks.length - maxDots}`;
+          more.textContent = `+${total - maxDots}`;
           dotsContainer.appendChild(more);
         }
 
+        if (summary.due) {
+          const due = document.createElement('span');
+          due.className = 'text-xs text-red-500';
+          due.textContent = `${summary.due} due`;
+          dotsContainer.appendChild(due);
+        }
+
         dayCell.appendChild(dotsContainer);
       }
 
@@ -294,15 +305,13 @@
           del.addEventListener('click', async (ev)=>{
             ev.stopPropagation();
             ev.preventDefault();
-            if (!confirm('Delete this block?')) return;
-            const resp = await fetch(`/api/calendar/blocks/${b.id}`, { method: 'DELETE' });
+            // Occurrences of a recurring series are deleted as a whole series
+            const isRecurring = b.recurring_id != null;
+            if (!confirm(isRecurring ? 'Delete every occurrence of this recurring block?' : 'Delete this block?')) return;
+            const url = isRecurring ? `/api/calendar/recurring/${b.recurring_id}` : `/api/calendar/blocks/${b.id}`;
+            const resp = await fetch(url, { method: 'DELETE' });
             if (resp.ok){
-              await loadBlocks();
-              if (currentView === 'day') {
-                renderDayView();
-              } else {
-                renderMonthView();
-              }
+              await refreshCurrentView();
             }else{
               const ejson = await resp.json().catch(()=>({}));
               alert(ejson.detail || 'Failed to delete block');
@@ -426,21 +435,34 @@
   }
 
   // --- View Switching ---
-  function switchToMonthView() {
+  async function switchToMonthView() {
     currentView = 'month';
     monthView.classList.remove('hidden');
     dayView.classList.add('hidden');
+    await loadMonthSummary();
     renderMonthView();
   }
 
-  function switchToDayView() {
+  async function switchToDayView() {
     currentView = 'day';
     monthView.classList.add('hidden');
     dayView.classList.remove('hidden');
+    await loadBlocks();
     buildDayGrid();
     renderDayView();
   }
 
+  // Reload whatever the visible view needs and redraw it
+  async function refreshCurrentView() {
+    if (currentView === 'month') {
+      await loadMonthSummary();
+      renderMonthView();
+    } else {
+      await loadBlocks();
+      renderDayView();
+    }
+  }
+
   // --- Data Loading ---
   async function loadSettings(){
     try{
@@ -464,15 +486,18 @@
     }
   }
 
+  function monthGridRange(){
+    const calendarStart = getCalendarStart(getMonthStart(currentMonth));
+    return {
+      start: localDateTimeStr(calendarStart),
+      end: localDateTimeStr(addDays(calendarStart, 42))
+    };
+  }
+
   async function loadBlocks(){
     try {
       // Load blocks for entire month
-      const monthStart = getMonthStart(currentMonth);
-      const calendarStart = getCalendarStart(monthStart);
-      const calendarEnd = addDays(calendarStart, 42);
-
-      const start = localDateTimeStr(calendarStart);
-      const end = localDateTimeStr(calendarEnd);
+      const { start, end } = monthGridRange();
       const url = `/api/calendar/blocks?start=${encodeURIComponent(start)}&end=${encodeURIComponent(end)}`;
       const res = await fetch(url);
       blocks = await res.json();
@@ -482,242 +507,50 @@
     }
   }
 
-  async function loadBreakActivities(){
+  async function loadMonthSummary(){
     try {
-      const res = await fetch('/api/break-activities/');
-      breakActivities = await res.json();
+      const month = `${currentMonth.getFullYear()}-${fmt2(currentMonth.getMonth() + 1)}`;
+      const res = await fetch(`/api/calendar/summary?month=${month}`);
+      monthSummary = (await res.json()).days || {};
     } catch (e) {
-      console.error('Error loading break activities:', e);
-      breakActivities = [];
-    }
-  }
-
-  function getRandomBreakActivity(isLongBreak){
-    const type = isLongBreak ? 'long' : 'short';
-    const filtered = breakActivities.filter(a => a.activity_type === type);
-    if (filtered.length === 0) {
-      return isLongBreak ? 'Break' : 'Short Break';
+      console.error('Error loading month summary:', e);
+      monthSummary = {};
     }
-    const random = filtered[Math.floor(Math.random() * filtered.length)];
-    return random.name;
   }
 
   // --- Auto-schedule ---
+  // Planning runs server-side: one request schedules every unscheduled
+  // assignment and writes all study/break blocks in a single transaction.
   async function autoScheduleAssignments(){
-    if(!settings) await loadSettings();
-    if(!assignments.length) await loadAssignments();
-    if(!breakActivities.length) await loadBreakActivities();
-
-    const unscheduledAssignments = assignments.filter(a => {
-      return !blocks.some(b => b.assignment_id === a.id);
-    });
-
-    if(unscheduledAssignments.length === 0){
-      alert('All assignments are already scheduled!');
+    const monthStart = getMonthStart(currentMonth);
+    let result;
+    try{
+      const res = await fetch('/api/calendar/auto-schedule', {
+        method: 'POST',
+        headers: {'Content-Type':'application/json'},
+        body: JSON.stringify({ start: localDateTimeStr(monthStart) })
+      });
+      if(!res.ok) throw new Error(`HTTP ${res.status}`);
+      result = await res.json();
+    }catch(e){
+      console.error('Error auto-scheduling:', e);
+      alert('Failed to auto-schedule assignments');
       return;
     }
 
-    for(const assignment of unscheduledAssignments){
-      await scheduleAssignment(assignment);
-    }
-
-    await loadBlocks();
-    if (currentView === 'month') {
-      renderMonthView();
-    } else {
-      renderDayView();
-    }
-    alert('Assignments auto-scheduled successfully!');
-  }
-
-  async function scheduleAssignment(assignment){
-    const workInterval = settings.work_interval || 25;
-    const shortBreak = settings.short_break || 5;
-    const longBreak = settings.long_break || 15;
-    const totalMinutes = assignment.estimated_time;
-
-    // Get preferred work hours (with fallbacks to global START/END hours)
-    const preferredStartHour = settings.preferred_start_hour !== undefined ? settings.preferred_start_hour : START_HOUR;
-    const preferredEndHour = settings.preferred_end_hour !== undefined ? settings.preferred_end_hour : END_HOUR;
-
-    // Calculate how many days we have until due date
-    const now = new Date();
-    now.setHours(0, 0, 0, 0);
-
-    let dueDate = assignment.due_date ? new Date(assignment.due_date) : null;
-    if (dueDate) {
-      dueDate.setHours(23, 59, 59, 999);
-    }
-
-    // If no due date or due date is in the past, schedule starting from now over next 7 days
-    if (!dueDate || dueDate < now) {
-      dueDate = new Date(now);
-      dueDate.setDate(dueDate.getDate() + 7);
-    }
-
-    const daysAvailable = Math.ceil((dueDate - now) / (1000 * 60 * 60 * 24));
-    const daysToUse = Math.max(1, Math.min(daysAvailable, 14)); // Use up to 14 days max
-
-    // Calculate available work hours per day within preferred hours
-    const preferredWorkHoursPerDay = preferredEndHour - preferredStartHour;
-    const maxPreferredMinutesPerDay = preferredWorkHoursPerDay * 60;
-
-    // Calculate sessions needed
-    const totalSessions = Math.ceil(totalMinutes / workInterval);
-
-    // Prioritize multiple small blocks: aim for 2-4 sessions per day
-    const idealSessionsPerDay = Math.min(4, Math.max(2, Math.ceil(totalSessions / daysToUse)));
-
-    // Check if we can fit within preferred hours
-    const canFitInPreferredHours = totalMinutes <= (maxPreferredMinutesPerDay * daysAvailable * 0.7);
-
-    // Start scheduling from now or start of current month, whichever is later
-    let currentDay = new Date(Math.max(now, getMonthStart(currentMonth)));
-    currentDay.setHours(preferredStartHour, 0, 0, 0);
-
-    let remainingMinutes = totalMinutes;
-    let sessionCount = 0;
-    let consecutiveSessionsToday = 0;
-    let currentTime = new Date(currentDay);
-
-    // Round to next 30-minute slot
-    currentTime.setMinutes(Math.ceil(currentTime.getMinutes() / 30) * 30);
-
-    while(remainingMinutes > 0 && currentDay <= dueDate){
-      // Move to next day if we've reached the session limit for today
-      if (consecutiveSessionsToday >= idealSessionsPerDay) {
-        currentDay.setDate(currentDay.getDate() + 1);
-        currentDay.setHours(preferredStartHour, 0, 0, 0);
-        currentTime = new Date(currentDay);
-        consecutiveSessionsToday = 0;
-        continue;
-      }
-
-      // If before preferred hours, jump to preferred start
-      if(currentTime.getHours() < preferredStartHour){
-        currentTime.setHours(preferredStartHour, 0, 0, 0);
-        continue;
-      }
-
-      // If past preferred hours, check if we should extend or move to next day
-      if(currentTime.getHours() >= preferredEndHour){
-        // Only extend past preferred hours if urgent AND still within global hours
-        if (!canFitInPreferredHours && currentTime.getHours() < END_HOUR) {
-          // Allow working past preferred hours for urgent assignments
-        } else {
-          // Move to next day
-          currentDay.setDate(currentDay.getDate() + 1);
-          currentDay.setHours(preferredStartHour, 0, 0, 0);
-          currentTime = new Date(currentDay);
-          consecutiveSessionsToday = 0;
-          continue;
-        }
-      }
-
-      // Absolute limit check (never schedule past 10 PM)
-      if(currentTime.getHours() >= END_HOUR){
-        currentDay.setDate(currentDay.getDate() + 1);
-        currentDay.setHours(preferredStartHour, 0, 0, 0);
-        currentTime = new Date(currentDay);
-        consecutiveSessionsToday = 0;
-        continue;
-      }
-
-      // Check if slot is available
-      const sessionDuration = Math.min(workInterval, remainingMinutes);
-      if(await isSlotAvailable(currentTime, sessionDuration)){
-        // Create work block
-        const endTime = new Date(currentTime);
-        endTime.setMinutes(endTime.getMinutes() + sessionDuration);
-
-        await createBlock({
-          title: assignment.name,
-          start: localDateTimeStr(currentTime),
-          end: localDateTimeStr(endTime),
-          block_type: 'study',
-          assignment_id: assignment.id
-        });
-
-        remainingMinutes -= sessionDuration;
-        sessionCount++;
-        consecutiveSessionsToday++;
-        currentTime = new Date(endTime);
-
-        // Always add a break after a session
-        // Use long break after every 4 sessions, short break otherwise
-        const isLongBreak = (sessionCount % 4 === 0);
-        const breakDuration = isLongBreak ? longBreak : shortBreak;
-        const breakEnd = new Date(currentTime);
-        breakEnd.setMinutes(breakEnd.getMinutes() + breakDuration);
-
-        // Only add break if it fits within working hours
-        if (breakEnd.getHours() < END_HOUR) {
-          // Get random break activity
-          const breakActivityName = getRandomBreakActivity(isLongBreak);
-
-          await createBlock({
-            title: `🌿 ${breakActivityName}`,
-            start: localDateTimeStr(currentTime),
-            end: localDateTimeStr(breakEnd),
-            block_type: 'break'
-          });
-          currentTime = new Date(breakEnd);
-        } else {
-          // Break would go past working hours, move to next day
-          currentDay.setDate(currentDay.getDate() + 1);
-          currentDay.setHours(START_HOUR, 0, 0, 0);
-          currentTime = new Date(currentDay);
-          consecutiveSessionsToday = 0;
-        }
-      } else {
-        // Slot not available, try next 30-minute slot
-        currentTime.setMinutes(currentTime.getMinutes() + 30);
-
-        // If we've tried too many slots in one day, move to next day
-        if (currentTime.getHours() >= END_HOUR - 1) {
-          currentDay.setDate(currentDay.getDate() + 1);
-          currentDay.setHours(START_HOUR, 0, 0, 0);
-          currentTime = new Date(currentDay);
-          consecutiveSessionsToday = 0;
-        }
-      }
-    }
-
-    // Warn if we couldn't schedule everything
-    if (remainingMinutes > 0) {
-      console.warn(`Could not schedule ${remainingMinutes} minutes for assignment: ${assignment.name}`);
+    if(result.assignments.length === 0){
+      alert('All assignments are already scheduled!');
+      return;
     }
-  }
 
-  async function isSlotAvailable(startTime, durationMinutes){
-    const endTime = new Date(startTime);
-    endTime.setMinutes(endTime.getMinutes() + durationMinutes);
-
-    for(const block of blocks){
-      const blockStart = new Date(block.start);
-      const blockEnd = new Date(block.end);
-
-      if(startTime < blockEnd && endTime > blockStart){
-        return false;
+    for(const a of result.assignments){
+      if(a.unscheduled_minutes > 0){
+        console.warn(`Could not schedule ${a.unscheduled_minutes} minutes for assignment: ${a.name}`);
       }
     }
-    return true;
-  }
 
-  async function createBlock(payload){
-    try{
-      const res = await fetch('/api/calendar/blocks', {
-        method: 'POST',
-        headers: {'Content-Type':'application/json'},
-        body: JSON.stringify(payload)
-      });
-      if(res.ok){
-        const newBlock = await res.json();
-        blocks.push({...payload, id: newBlock.id});
-      }
-    }catch(e){
-      console.error('Error creating block:', e);
-    }
+    await refreshCurrentView();
+    alert('Assignments auto-scheduled successfully!');
   }
 
   // --- Clear Calendar ---
@@ -727,16 +560,14 @@
     }
 
     try {
-      const deletePromises = blocks.map(block =>
-        fetch(`/api/calendar/blocks/${block.id}`, { method: 'DELETE' })
-      );
-      await Promise.all(deletePromises);
-      await loadBlocks();
-      if (currentView === 'month') {
-        renderMonthView();
-      } else {
-        renderDayView();
-      }
+      const res = await fetch('/api/calendar/blocks/bulk-delete', {
+        method: 'POST',
+        headers: {'Content-Type':'application/json'},
+        // Everything in the visible 6-week month grid (the range loadBlocks covers)
+        body: JSON.stringify(monthGridRange())
+      });
+      if(!res.ok) throw new Error(`HTTP ${res.status}`);
+      await refreshCurrentView();
       alert('Calendar cleared successfully!');
     } catch (e) {
       console.error('Error clearing calendar:', e);
@@ -748,7 +579,7 @@
   if (prevMonthBtn) {
     prevMonthBtn.addEventListener('click', async () => {
       currentMonth = new Date(currentMonth.getFullYear(), currentMonth.getMonth() - 1, 1);
-      await loadBlocks();
+      await loadMonthSummary();
       renderMonthView();
     });
   }
@@ -756,7 +587,7 @@
   if (nextMonthBtn) {
     nextMonthBtn.addEventListener('click', async () => {
       currentMonth = new Date(currentMonth.getFullYear(), currentMonth.getMonth() + 1, 1);
-      await loadBlocks();
+      await loadMonthSummary();
       renderMonthView();
     });
   }
@@ -764,7 +595,7 @@
   if (todayMonthBtn) {
     todayMonthBtn.addEventListener('click', async () => {
       currentMonth = new Date();
-      await loadBlocks();
+      await loadMonthSummary();
       renderMonthView();
     });
   }
@@ -802,9 +633,8 @@
   // --- Init ---
   (async function init(){
     await loadSettings();
-    await loadBlocks();
+    await loadMonthSummary();
     await loadAssignments();
-    await loadBreakActivities();
     renderMonthView();
   })();
 })();
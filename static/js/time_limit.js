@@ -2,14 +2,6 @@
   // Detect current page
   const path = location.pathname;
 
-  function fmt2(n){ return String(n).padStart(2,'0'); }
-  function toDateStrLocal(d){
-    const y = d.getFullYear();
-    const m = fmt2(d.getMonth()+1);
-    const da = fmt2(d.getDate());
-    return `${y}-${m}-${da}`;
-  }
-
   async function getLimit(){
     const res = await fetch('/api/limits/setting');
     return res.json();
@@ -26,10 +18,6 @@
     }
     return res.json();
   }
-  async function getProgress(yyyy_mm_dd){
-    const res = await fetch(`/api/limits/progress?date=${encodeURIComponent(yyyy_mm_dd)}`);
-    return res.json();
-  }
 
   // SETTINGS PAGE
   const limitInput = document.getElementById('daily-limit-minutes');
@@ -61,23 +49,29 @@
   // TIMER PAGE: auto-pause on limit
   if (path === '/timer'){
     let warnedForDate = null;
+    let limitTimer = null;
+
+    // The server says when the limit will be hit; re-ask only when that
+    // moment arrives or a study session starts or stops (see timer-new.js)
     async function check(){
+      clearTimeout(limitTimer);
+      limitTimer = null;
       try{
-        const today = toDateStrLocal(new Date());
-        const [{ daily_limit_minutes }, { minutes }] = await Promise.all([getLimit(), getProgress(today)]);
-        if (minutes >= daily_limit_minutes){
+        const res = await fetch('/api/limits/forecast');
+        const forecast = await res.json();
+        const today = forecast.resets_at;
+        if (forecast.limit_reached){
           if (warnedForDate !== today){
             alert('Daily study limit reached.');
-            const pauseBtn = document.getElementById('pause-btn');
-            if (pauseBtn) pauseBtn.click();
+            if (typeof window.pauseTimer === 'function') window.pauseTimer();
             warnedForDate = today;
           }
-        } else {
-          if (warnedForDate !== null && warnedForDate !== today) warnedForDate = null;
+        } else if (forecast.limit_at){
+          limitTimer = setTimeout(check, Math.max(0, Date.parse(forecast.limit_at) - Date.now()) + 500);
         }
       }catch{}
     }
-    setInterval(check, 10000);
+    document.addEventListener('studysession:change', check);
     check();
   }
 })();
@@ -111,6 +111,9 @@ function initTimer(settings) {
         longBreak: longBreakDuration / 60,
         intervals: totalIntervals
     });
+
+    // Pick up a timer already running in another tab or before a reload
+    syncTimerState();
 }
 
 // Toggle timer between running and paused states
@@ -127,9 +130,168 @@ let timerInterval;
 let endTime = 0;
 let remainingTime = 0;
 
+// Server-side timer state: every open tab follows the same timer
+let timerVersion = null;
+
+async function timerAction(action, extra = {}) {
+    try {
+        const response = await fetch(`/api/timer/${action}`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ version: timerVersion, ...extra })
+        });
+        if (response.status === 409) {
+            // Another tab got there first; follow its state
+            await syncTimerState();
+            return;
+        }
+        if (response.ok) {
+            timerVersion = (await response.json()).version;
+        }
+    } catch (error) {
+        console.error(`Timer ${action} failed:`, error);
+    }
+}
+
+// Cheap to call often: unchanged state revalidates to a 304
+async function syncTimerState() {
+    try {
+        const response = await fetch('/api/timer/state');
+        if (!response.ok) return;
+        const state = await response.json();
+        if (state.version === timerVersion) return;
+        timerVersion = state.version;
+        applyServerState(state);
+    } catch (error) {
+        console.error('Timer sync failed:', error);
+    }
+}
+
+function applyServerState(state) {
+    isBreak = state.is_break;
+    isLongBreak = state.is_long_break;
+    currentInterval = state.current_interval;
+    updateIntervalCount();
+
+    if (isRunning) {
+        cancelAnimationFrame(timer);
+        trackWorkTime();
+        isRunning = false;
+        sendHeartbeat();
+        endStudySession();
+    }
+    if (state.is_running && state.ends_at) {
+        timeLeft = Math.max(0, Math.round((Date.parse(state.ends_at) - Date.now()) / 1000));
+        startTimer(false);
+    } else {
+        timeLeft = state.status === 'idle' ? getCurrentDuration() : state.time_remaining;
+        pauseTimer(false);
+        updateTimerDisplay();
+        updateProgressRing();
+    }
+}
+
+document.addEventListener('visibilitychange', () => {
+    if (!document.hidden) syncTimerState();
+});
+setInterval(syncTimerState, 30000);
+
+// Focused time on the selected assignment, reported to the server in batches
+const HEARTBEAT_SECONDS = 60;
+const MAX_HEARTBEAT_SECONDS = 600; // the server rejects longer gaps
+let currentAssignmentId = null;
+let unreportedWorkMs = 0;
+let lastWorkTick = null;
+
+function trackWorkTime() {
+    const now = Date.now();
+    if (!isBreak && currentAssignmentId && lastWorkTick !== null) {
+        unreportedWorkMs += now - lastWorkTick;
+    }
+    lastWorkTick = now;
+    if (unreportedWorkMs >= HEARTBEAT_SECONDS * 1000) sendHeartbeat();
+}
+
+// Report what has built up so far; the server buffers these writes
+function sendHeartbeat() {
+    lastWorkTick = isRunning ? Date.now() : null;
+    let seconds = Math.floor(unreportedWorkMs / 1000);
+    unreportedWorkMs -= seconds * 1000;
+    if (!currentAssignmentId) return;
+
+    while (seconds > 0) {
+        const chunk = Math.min(seconds, MAX_HEARTBEAT_SECONDS);
+        seconds -= chunk;
+        fetch(`/api/assignments/${currentAssignmentId}/heartbeat`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ seconds: chunk })
+        }).catch(error => console.error('Error sending heartbeat:', error));
+    }
+}
+
+// Work phases run by this tab are recorded as study sessions; the server
+// adds a session to today's study total when it ends
+let currentStudySessionId = null;
+let studySessionStarting = Promise.resolve();
+
+function startStudySession() {
+    studySessionStarting = (async () => {
+        try {
+            const response = await fetch('/api/study-sessions/', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ session_type: 'work', assignment_id: currentAssignmentId })
+            });
+            if (!response.ok) throw new Error('Failed to start study session');
+            currentStudySessionId = (await response.json()).id;
+            document.dispatchEvent(new CustomEvent('studysession:change'));
+        } catch (error) {
+            console.error('Error starting study session:', error);
+        }
+    })();
+}
+
+async function endStudySession(keepalive = false) {
+    // A pause straight after start must still end the session being created
+    await studySessionStarting;
+    if (!currentStudySessionId) return;
+    const sessionId = currentStudySessionId;
+    currentStudySessionId = null;
+    try {
+        await fetch(`/api/study-sessions/${sessionId}/end`, { method: 'POST', keepalive });
+        document.dispatchEvent(new CustomEvent('studysession:change'));
+    } catch (error) {
+        console.error('Error ending study session:', error);
+    }
+}
+
+// Closing the tab mid-session still ends it
+window.addEventListener('pagehide', () => endStudySession(true));
+
+const assignmentSelect = document.getElementById('assignment-select');
+if (assignmentSelect) {
+    assignmentSelect.addEventListener('change', () => {
+        // Time so far belongs to the previously selected assignment
+        trackWorkTime();
+        sendHeartbeat();
+        currentAssignmentId = parseInt(assignmentSelect.value, 10) || null;
+    });
+}
+
 // Start the timer
-function startTimer() {
+function startTimer(notifyServer = true) {
     if (!isRunning) {
+        if (notifyServer) {
+            timerAction('start', {
+                method: window.currentMethod ? window.currentMethod.id : undefined,
+                work_seconds: Math.round(window.workDuration),
+                short_break_seconds: Math.round(window.shortBreakDuration),
+                long_break_seconds: Math.round(window.longBreakDuration),
+                cycles_before_long_break: window.totalIntervals
+            });
+            if (!isBreak) startStudySession();
+        }
         isRunning = true;
         startPauseBtn.innerHTML = '<i class="fas fa-pause"></i><span>Pause</span>';
         startPauseBtn.classList.remove('bg-indigo-600', 'hover:bg-indigo-700');
@@ -144,7 +306,10 @@ function startTimer() {
         const currentDuration = isBreak ? (isLongBreak ? longBreakDuration : shortBreakDuration) : workDuration;
         const startTime = Date.now() - ((currentDuration - timeLeft) * 1000);
         
+        lastWorkTick = Date.now();
+
         function update() {
+            trackWorkTime();
             const currentTime = Date.now();
             const elapsed = Math.floor((currentTime - startTime) / 1000);
             timeLeft = Math.max(0, currentDuration - elapsed);
@@ -164,10 +329,14 @@ function startTimer() {
 }
 
 // Pause the timer
-function pauseTimer() {
+function pauseTimer(notifyServer = true) {
     if (isRunning) {
+        if (notifyServer) timerAction('pause');
         cancelAnimationFrame(timer);
+        trackWorkTime();
         isRunning = false;
+        sendHeartbeat();
+        endStudySession();
         startPauseBtn.innerHTML = '<i class="fas fa-play"></i><span>Resume</span>';
         startPauseBtn.classList.remove('bg-yellow-500', 'hover:bg-yellow-600');
         startPauseBtn.classList.add('bg-indigo-600', 'hover:bg-indigo-700');
@@ -194,7 +363,11 @@ function resetTimer() {
     }
     
     // Reset timer state
+    if (isRunning) trackWorkTime();
     isRunning = false;
+    sendHeartbeat();
+    endStudySession();
+    timerAction('reset');
     
     // Reset to work duration if not in break
     if (!isBreak) {
@@ -230,7 +403,9 @@ function resetTimer() {
 
 // Handle timer completion
 document.addEventListener('timerComplete', () => {
-    pauseTimer();
+    pauseTimer(false);
+    // Completing either phase advances the shared timer to the next one
+    timerAction('next');
     
     if (!isBreak) {
         // Work session completed
@@ -340,6 +515,8 @@ function showBreakModal(isLongBreak) {
     
     const skipBreakHandler = () => {
         breakModal.classList.add('hidden');
+        // The server already moved on to the break; skip straight back to work
+        timerAction('next');
         
         // Clean up event listeners
         startBreakBtn.removeEventListener('click', startBreakHandler);
@@ -372,3 +549,4 @@ window.pauseTimer = pauseTimer;
 window.resetTimer = resetTimer;
 window.updateTimerSettings = updateTimerSettings;
 window.updateTimerDisplay = updateTimerDisplay;
+window.syncTimerState = syncTimerState;
@@ -1,24 +1,33 @@
+import os
+import tempfile
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import StaticPool, NullPool
 from datetime import datetime, timedelta, date
 
 from app import app
-from backend.database import Base, get_db
+from backend.core.config import settings
+from backend.database import Base, get_db, get_async_db
 from backend.models import models, user_models, calendar_models, limit_models
 
-# Setup in-memory database for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Setup a throwaway file database shared by the sync and async test engines
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# TestClient runs each request on a fresh event loop, so async connections
+# must not be pooled across requests
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DB_PATH}", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 def override_get_db():
     try:
         db = TestingSessionLocal()
@@ -26,13 +35,31 @@ def override_get_db():
     finally:
         db.close()
 
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 client = TestClient(app)
 
+# Fail any request that issues more SQL statements than this
+settings.SQL_QUERY_BUDGET = 40
+
 @pytest.fixture(scope="function")
 def db_session():
     """Create a fresh database for each test."""
+    from backend.services.calendar_feed import clear_feed_cache
+    from backend.services.settings_cache import invalidate_settings_cache
+    from backend.services.progress_buffer import progress_buffer
+    from backend.crud.time_crud import clear_session_stats_cache
+    from backend.services.reference_data import invalidate_reference_snapshot
+    clear_feed_cache()
+    invalidate_settings_cache()
+    progress_buffer.clear()
+    clear_session_stats_cache()
+    invalidate_reference_snapshot()
     Base.metadata.create_all(bind=engine)
     db = TestingSessionLocal()
     
@@ -96,6 +123,35 @@ class TestAuth:
         assert response.url.path == "/login"
         assert "session_token" not in client.cookies
 
+class TestAsyncRoutes:
+    def test_profile_and_leaderboard(self, db_session):
+        client.post("/signup", data={"username": "u", "email": "e@e.com", "password": "p"})
+        client.post("/login", data={"username": "u", "password": "p"})
+
+        response = client.get("/api/profile")
+        assert response.status_code == 200
+        assert response.json()["username"] == "u"
+
+        response = client.get("/api/leaderboard")
+        assert response.status_code == 200
+        assert response.json()[0]["username"] == "u"
+
+    def test_profile_page(self, db_session):
+        client.post("/signup", data={"username": "u", "email": "e@e.com", "password": "p"})
+        client.post("/login", data={"username": "u", "password": "p"})
+
+        response = client.get("/profile")
+        assert response.status_code == 200
+        assert 'id="achievement-count"' in response.text
+
+    def test_notifications_unread_count(self, db_session):
+        client.post("/signup", data={"username": "u", "email": "e@e.com", "password": "p"})
+        client.post("/login", data={"username": "u", "password": "p"})
+
+        response = client.get("/api/notifications/unread-count")
+        assert response.status_code == 200
+        assert response.json() == {"count": 0}
+
 class TestAssignments:
     @pytest.fixture
     def auth_client(self, db_session):
@@ -185,6 +241,102 @@ class TestAssignments:
         assert assignment.completed is True
         db.close()
 
+    def test_heartbeats_are_batched(self, auth_client):
+        from backend.services.progress_buffer import ProgressBuffer, progress_buffer
+        auth_client.post("/assignments", data={
+            "name": "Heartbeat Test", "due_date": "2025-12-01T10:00", "estimated_time": 3
+        })
+        db = TestingSessionLocal()
+        assignment_id = db.query(models.Assignment.id).scalar()
+
+        for _ in range(3):
+            response = auth_client.post(f"/api/assignments/{assignment_id}/heartbeat", json={"seconds": 50})
+            assert response.status_code == 202
+        assert auth_client.post(f"/api/assignments/{assignment_id}/heartbeat", json={"seconds": 0}).status_code == 400
+        assert auth_client.post("/api/assignments/9999/heartbeat", json={"seconds": 50}).status_code == 404
+        assert progress_buffer.pending_count() == 1
+        # Nothing is written until the buffer flushes
+        assert db.get(models.Assignment, assignment_id).time_spent == 0
+
+        assert progress_buffer.flush(db) == 1
+        db.expire_all()
+        assignment = db.get(models.Assignment, assignment_id)
+        assert (assignment.time_spent, assignment.status) == (2, "in_progress")
+
+        # Leftover seconds carry into the next flush; an explicit total replaces buffered time
+        buffer = ProgressBuffer()
+        buffer.add_seconds(assignment_id, 30)
+        buffer.add_seconds(assignment_id, 40)
+        buffer.flush(db)
+        assert db.get(models.Assignment, assignment_id).time_spent == 3
+        assert db.get(models.Assignment, assignment_id).completed is True
+        buffer.add_seconds(assignment_id, 600)
+        buffer.set_minutes(assignment_id, 1)
+        buffer.flush(db)
+        assert db.get(models.Assignment, assignment_id).time_spent == 1
+        db.close()
+
+    def test_timer_page_lists_open_assignments(self, auth_client):
+        auth_client.post("/assignments", data={"name": "Essay draft", "due_date": "2025-12-01T10:00", "estimated_time": 30})
+        db = TestingSessionLocal()
+        assignment_id = db.query(models.Assignment.id).scalar()
+        db.close()
+        response = auth_client.get("/timer")
+        assert response.status_code == 200
+        assert f'<option value="{assignment_id}">Essay draft' in response.text
+        # The daily limit watcher runs alongside the timer
+        assert "/js/time_limit.js" in response.text
+
+    def test_heartbeats_require_owner(self, auth_client):
+        auth_client.post("/assignments", data={
+            "name": "Mine", "due_date": "2025-12-01T10:00", "estimated_time": 30
+        })
+        db = TestingSessionLocal()
+        assignment_id = db.query(models.Assignment.id).scalar()
+        db.close()
+        auth_client.get("/logout")
+        url = f"/api/assignments/{assignment_id}/heartbeat"
+        assert auth_client.post(url, json={"seconds": 50}).status_code == 401
+
+        auth_client.post("/signup", data={"username": "other", "email": "other@e.com", "password": "p"})
+        auth_client.post("/login", data={"username": "other", "password": "p"})
+        assert auth_client.post(url, json={"seconds": 50}).status_code == 404
+        auth_client.get("/logout")
+
+    def test_heartbeat_flush_adds_in_sql(self, auth_client):
+        from backend.services.progress_buffer import ProgressBuffer
+        auth_client.post("/assignments", data={
+            "name": "Shared", "due_date": "2025-12-01T10:00", "estimated_time": 100
+        })
+        db = TestingSessionLocal()
+        assignment_id = db.query(models.Assignment.id).scalar()
+        db.get(models.Assignment, assignment_id)
+
+        # Another worker writes after this session has loaded the row
+        other = TestingSessionLocal()
+        other.get(models.Assignment, assignment_id).time_spent = 10
+        other.commit()
+        other.close()
+
+        buffer = ProgressBuffer()
+        buffer.add_seconds(assignment_id, 130)
+        buffer.flush(db)
+        assert db.get(models.Assignment, assignment_id).time_spent == 12
+
+        # A failed write keeps the carried seconds as they were, so a retry doesn't count them twice
+        buffer.add_seconds(assignment_id, 50)
+        def lost_connection():
+            raise RuntimeError("lost connection")
+        original_commit, db.commit = db.commit, lost_connection
+        with pytest.raises(RuntimeError):
+            buffer.flush(db)
+        db.commit = original_commit
+        assert buffer._carry[assignment_id] == 10
+        buffer.flush(db)
+        assert db.get(models.Assignment, assignment_id).time_spent == 13
+        assert buffer._carry == {}
+        db.close()
+
 class TestCalendar:
     def test_create_and_list_blocks(self, db_session):
         # Create block
@@ -226,6 +378,253 @@ class TestCalendar:
         assert response.status_code == 409
         assert "Overlaps" in response.json()["detail"]
 
+    def test_overlap_check_sees_other_workers_blocks(self, db_session):
+        start = datetime.now().replace(microsecond=0) + timedelta(days=1)
+        end = start + timedelta(hours=1)
+        assert client.get("/api/calendar/blocks", params={"start": start.isoformat(), "end": end.isoformat()}).json() == []
+
+        # Another worker commits a block
+        db_session.add(calendar_models.CalendarBlock(
+            title="Elsewhere", start_datetime=start, end_datetime=end, block_type="study"
+        ))
+        db_session.commit()
+
+        payload = {"title": "Here", "start": start.isoformat(), "end": end.isoformat(), "block_type": "study"}
+        assert client.post("/api/calendar/blocks", json=payload).status_code == 409
+        assert client.post("/api/calendar/blocks/bulk", json={"blocks": [payload]}).status_code == 409
+
+        # Reads see it straight away too, and stop seeing it once it's deleted elsewhere
+        window = {"start": start.isoformat(), "end": end.isoformat()}
+        assert [b["title"] for b in client.get("/api/calendar/blocks", params=window).json()] == ["Elsewhere"]
+        db_session.query(calendar_models.CalendarBlock).delete()
+        db_session.commit()
+        assert client.get("/api/calendar/blocks", params=window).json() == []
+
+    def test_bulk_create_and_delete(self, db_session):
+        base = datetime.now().replace(microsecond=0) + timedelta(days=1)
+        existing = {"title": "Class", "start": base.isoformat(),
+                    "end": (base + timedelta(hours=1)).isoformat(), "block_type": "busy"}
+        existing_id = client.post("/api/calendar/blocks", json=existing).json()["id"]
+
+        def block(title, start_h, end_h):
+            return {"title": title, "block_type": "study",
+                    "start": (base + timedelta(hours=start_h)).isoformat(),
+                    "end": (base + timedelta(hours=end_h)).isoformat()}
+
+        # Overlaps inside the batch and with the existing block are reported together
+        response = client.post("/api/calendar/blocks/bulk", json={"blocks": [
+            block("A", 2, 3), block("B", 2.5, 4), block("C", 0.5, 1.5)
+        ]})
+        assert response.status_code == 409
+        conflicts = response.json()["detail"]["conflicts"]
+        assert {"index": 2, "with_id": existing_id} in conflicts
+        assert {"index": 1, "with_index": 0} in conflicts
+
+        # Items that aren't objects are a client error, not a crash
+        for item in (1, "x", None):
+            response = client.post("/api/calendar/blocks/bulk", json={"blocks": [block("A", 2, 3), item]})
+            assert response.status_code == 400 and response.json()["detail"].startswith("blocks[1]")
+
+        response = client.post("/api/calendar/blocks/bulk", json={"blocks": [
+            block("A", 2, 3), block("B", 3, 4), block("C", 1, 2)
+        ]})
+        assert response.status_code == 200
+        ids = response.json()["ids"]
+        assert len(ids) == 3
+
+        response = client.post("/api/calendar/blocks/bulk-delete", json={"ids": ids[:2]})
+        assert response.json() == {"deleted": 2}
+        response = client.post("/api/calendar/blocks/bulk-delete", json={
+            "start": base.isoformat(), "end": (base + timedelta(hours=5)).isoformat()
+        })
+        assert response.json() == {"deleted": 2}
+
+    def test_blocks_are_per_user(self, db_session):
+        start = (datetime.now() + timedelta(hours=1)).replace(microsecond=0)
+        payload = {"title": "Mine", "start": start.isoformat(),
+                   "end": (start + timedelta(hours=1)).isoformat(), "block_type": "busy"}
+
+        client.post("/signup", data={"username": "a", "email": "a@e.com", "password": "p"})
+        client.post("/login", data={"username": "a", "password": "p"})
+        assert client.post("/api/calendar/blocks", json=payload).status_code == 200
+
+        client.post("/signup", data={"username": "b", "email": "b@e.com", "password": "p"})
+        client.post("/login", data={"username": "b", "password": "p"})
+        query = f"start={start.isoformat()}&end={(start + timedelta(hours=2)).isoformat()}"
+        assert client.get(f"/api/calendar/blocks?{query}").json() == []
+        # Another user's busy time doesn't block this one
+        assert client.post("/api/calendar/blocks", json=payload).status_code == 200
+        assert client.post("/api/calendar/blocks", json=payload).status_code == 409
+        assert len(client.get(f"/api/calendar/blocks?{query}").json()) == 1
+        client.get("/logout")
+
+    def test_block_interval_index(self):
+        from backend.services.calendar_index import BlockIntervalIndex, BlockSpan
+        day = datetime(2030, 1, 7)
+        spans = [
+            BlockSpan(1, "long", day.replace(hour=8), day.replace(hour=12), "busy", None),
+            BlockSpan(2, "short", day.replace(hour=9), day.replace(hour=10), "busy", None),
+            BlockSpan(3, "late", day.replace(hour=14), day.replace(hour=15), "busy", None),
+        ]
+        index = BlockIntervalIndex(spans)
+        assert [b.id for b in index.overlapping(day.replace(hour=11), day.replace(hour=14, minute=30))] == [1, 3]
+        assert index.overlapping(day.replace(hour=12), day.replace(hour=14)) == []
+        assert index.first_overlap(day.replace(hour=9, minute=30), day.replace(hour=9, minute=45)).id == 1
+
+    def test_recurrence_rule_expansion(self):
+        from backend.services.recurrence import RecurrenceRule
+        rule = RecurrenceRule.parse("FREQ=WEEKLY;BYDAY=MO,WE;COUNT=3")
+        first = datetime(2030, 1, 2, 9)  # a Wednesday
+        starts = [s for s, _ in rule.occurrences(first, timedelta(hours=1), datetime(2029, 12, 1), datetime(2030, 3, 1))]
+        assert starts == [datetime(2030, 1, 2, 9), datetime(2030, 1, 7, 9), datetime(2030, 1, 9, 9)]
+
+        daily = RecurrenceRule.parse("FREQ=DAILY")
+        window = daily.occurrences(datetime(2000, 1, 1, 9), timedelta(hours=1), datetime(2030, 1, 1), datetime(2030, 1, 8))
+        assert len(window) == 7
+        with pytest.raises(ValueError):
+            RecurrenceRule.parse("FREQ=MONTHLY")
+
+    def test_recurring_blocks(self, db_session):
+        first = (datetime.now() + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+        response = client.post("/api/calendar/recurring", json={
+            "title": "Lecture", "block_type": "busy", "rrule": "FREQ=DAILY;COUNT=5",
+            "start": first.isoformat(), "end": (first + timedelta(hours=1)).isoformat()
+        })
+        assert response.status_code == 200
+        series_id = response.json()["id"]
+
+        window = f"start={first.isoformat()}&end={(first + timedelta(days=10)).isoformat()}"
+        blocks = client.get(f"/api/calendar/blocks?{window}").json()
+        assert len(blocks) == 5
+        assert all(b["recurring_id"] == series_id and b["id"] is None for b in blocks)
+
+        # Occurrences take part in the overlap guard
+        clash = {"title": "X", "block_type": "study",
+                 "start": (first + timedelta(days=2, minutes=30)).isoformat(),
+                 "end": (first + timedelta(days=2, hours=2)).isoformat()}
+        assert client.post("/api/calendar/blocks", json=clash).status_code == 409
+
+        assert client.delete(f"/api/calendar/recurring/{series_id}").status_code == 200
+        assert client.get(f"/api/calendar/blocks?{window}").json() == []
+        assert client.post("/api/calendar/blocks", json=clash).status_code == 200
+
+    def test_ics_feed(self, db_session):
+        client.post("/signup", data={"username": "ics", "email": "ics@e.com", "password": "p"})
+        client.post("/login", data={"username": "ics", "password": "p"})
+        start = (datetime.now() + timedelta(days=1)).replace(microsecond=0)
+        client.post("/api/calendar/blocks", json={
+            "title": "Read, chapter 1", "block_type": "study",
+            "start": start.isoformat(), "end": (start + timedelta(hours=1)).isoformat()
+        })
+        url = client.get("/api/calendar/feed").json()["url"]
+        client.get("/logout")
+
+        # The token alone grants access, so calendar apps need no session
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/calendar")
+        assert "SUMMARY:Read\\, chapter 1" in response.text
+        etag = response.headers["etag"]
+
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+        assert client.get(url, headers={"If-Modified-Since": response.headers["last-modified"]}).status_code == 304
+        # Served from the per-version cache the second time
+        assert client.get(url).text == response.text
+
+        client.post("/login", data={"username": "ics", "password": "p"})
+        client.post("/api/calendar/blocks", json={
+            "title": "Write", "block_type": "study",
+            "start": (start + timedelta(hours=2)).isoformat(), "end": (start + timedelta(hours=3)).isoformat()
+        })
+        client.get("/logout")
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.text.count("BEGIN:VEVENT") == 2
+
+        assert client.get("/api/calendar/feed/not-a-token.ics").status_code == 404
+
+    def test_freebusy_bitmap(self, db_session):
+        import base64
+        day = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        client.post("/api/calendar/blocks", json={
+            "title": "Busy", "block_type": "busy",
+            "start": day.replace(hour=9).isoformat(), "end": day.replace(hour=10, minute=5).isoformat()
+        })
+        response = client.get(f"/api/calendar/freebusy?start={day:%Y-%m-%d}&end={day + timedelta(days=2):%Y-%m-%d}&slot=15")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["slots_per_day"] == 96
+        bits = int.from_bytes(base64.b64decode(data["days"][f"{day:%Y-%m-%d}"]), "big")
+        busy = [i for i in range(96) if bits >> (95 - i) & 1]
+        assert busy == [36, 37, 38, 39, 40]  # 09:00 through the slot containing 10:05
+        assert base64.b64decode(data["days"][f"{day + timedelta(days=1):%Y-%m-%d}"]) == bytes(12)
+
+        assert client.get(f"/api/calendar/freebusy?start={day:%Y-%m-%d}&end={day:%Y-%m-%d}").status_code == 400
+        assert client.get(f"/api/calendar/freebusy?start={day:%Y-%m-%d}&end={day + timedelta(days=1):%Y-%m-%d}&slot=7").status_code == 400
+
+    def test_month_summary(self, db_session):
+        day = datetime(2030, 3, 12, 9)
+        for i, block_type in enumerate(["study", "study", "break"]):
+            client.post("/api/calendar/blocks", json={
+                "title": f"b{i}", "block_type": block_type,
+                "start": (day + timedelta(hours=i)).isoformat(),
+                "end": (day + timedelta(hours=i, minutes=25)).isoformat()
+            })
+        db_session.add(models.Assignment(name="Essay", due_date=day, estimated_time=60))
+        db_session.commit()
+
+        response = client.get("/api/calendar/summary?month=2030-03")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["start"] == "2030-02-24"  # Sunday before March 1st
+        assert data["days"]["2030-03-12"] == {
+            "study": {"count": 2, "minutes": 50},
+            "break": {"count": 1, "minutes": 25},
+            "due": 1
+        }
+        assert client.get("/api/calendar/summary?month=March").status_code == 400
+
+    def test_free_slot_index(self):
+        from backend.services.calendar_scheduler import FreeSlotIndex
+        day = datetime(2030, 1, 7)
+        index = FreeSlotIndex([
+            (day.replace(hour=9), day.replace(hour=10)),
+            (day.replace(hour=9, minute=30), day.replace(hour=10, minute=15)),  # merged
+            (day.replace(hour=11), day.replace(hour=12)),
+        ])
+        step = timedelta(minutes=30)
+        assert index.earliest_start(day.replace(hour=8), timedelta(minutes=25), step) == day.replace(hour=8)
+        assert index.earliest_start(day.replace(hour=9), timedelta(minutes=25), step) == day.replace(hour=10, minute=30)
+        # 45 minutes does not fit between 10:30 and 11:00
+        assert index.earliest_start(day.replace(hour=9), timedelta(minutes=45), step) == day.replace(hour=12)
+        assert not index.is_free(day.replace(hour=10), day.replace(hour=10, minute=30))
+        assert index.is_free(day.replace(hour=10, minute=15), day.replace(hour=11))
+
+    def test_auto_schedule(self, db_session):
+        db_session.add(models.Assignment(
+            name="Essay", due_date=datetime.now() + timedelta(days=3), estimated_time=100
+        ))
+        db_session.commit()
+
+        response = client.post("/api/calendar/auto-schedule", json={})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["assignments"][0]["unscheduled_minutes"] == 0
+
+        blocks = sorted(data["blocks"], key=lambda b: b["start"])
+        study_minutes = sum(
+            (datetime.fromisoformat(b["end"]) - datetime.fromisoformat(b["start"])).seconds // 60
+            for b in blocks if b["block_type"] == "study"
+        )
+        assert study_minutes == 100
+        for prev, nxt in zip(blocks, blocks[1:]):
+            assert prev["end"] <= nxt["start"]
+
+        # Everything is scheduled now, so a second run plans nothing
+        response = client.post("/api/calendar/auto-schedule", json={})
+        assert response.json() == {"assignments": [], "blocks": []}
+
 class TestLimits:
     def test_get_and_set_limits(self, db_session):
         # Get default
@@ -242,6 +641,91 @@ class TestLimits:
         response = client.get("/api/limits/setting")
         assert response.json()["daily_limit_minutes"] == 240
 
+    def test_daily_study_totals(self, db_session):
+        from backend.models.models import StudySession
+        from backend.models.limit_models import DailyStudyTotal
+        now = datetime.utcnow()
+        query = f"start={(now - timedelta(days=1)).date()}&end={now.date()}"
+
+        client.post("/signup", data={"username": "a", "email": "a@e.com", "password": "p"})
+        client.post("/login", data={"username": "a", "password": "p"})
+        session_id = client.post("/api/study-sessions/", json={"session_type": "work"}).json()["id"]
+        db_session.get(StudySession, session_id).start_time = now - timedelta(minutes=50)
+        db_session.commit()
+
+        # A running session is counted from its start time without writing anything
+        days = client.get(f"/api/limits/progress/range?{query}").json()["days"]
+        assert len(days) == 2 and sum(d["minutes"] for d in days) in (49, 50)
+        assert db_session.query(DailyStudyTotal).count() == 0
+
+        assert client.post(f"/api/study-sessions/{session_id}/end").status_code == 200
+        assert client.post(f"/api/study-sessions/{session_id}/end").status_code == 200
+        seconds = sum(t.seconds for t in db_session.query(DailyStudyTotal).all())
+        assert 2990 <= seconds <= 3100
+        days = client.get(f"/api/limits/progress/range?{query}").json()["days"]
+        assert sum(d["minutes"] for d in days) in (49, 50)
+        assert client.get(f"/api/limits/progress?date={now.date()}").json()["minutes"] == days[-1]["minutes"]
+
+        client.post("/signup", data={"username": "b", "email": "b@e.com", "password": "p"})
+        client.post("/login", data={"username": "b", "password": "p"})
+        days = client.get(f"/api/limits/progress/range?{query}").json()["days"]
+        assert sum(d["minutes"] for d in days) == 0
+        assert client.get(f"/api/limits/progress/range?start={now.date()}&end=2000-01-01").status_code == 400
+        client.get("/logout")
+
+    def test_study_totals_add_in_sql(self, db_session):
+        from backend.models.models import StudySession
+        from backend.models.limit_models import DailyStudyTotal
+        from backend.services.study_totals import record_session
+        user = user_models.User(username="totals", email="totals@e.com", password_hash="x")
+        db_session.add(user)
+        db_session.commit()
+        start = datetime(2026, 3, 1, 9, 0)
+        finished = lambda minutes: StudySession(
+            session_type="work", user_id=user.id, start_time=start, end_time=start + timedelta(minutes=minutes)
+        )
+        record_session(db_session, finished(10))
+        db_session.commit()
+        # This worker holds the row while another one ends a session for the same day
+        held = db_session.query(DailyStudyTotal).one()
+        other = TestingSessionLocal()
+        record_session(other, finished(20))
+        other.commit()
+        other.close()
+
+        record_session(db_session, finished(30))
+        db_session.commit()
+        db_session.refresh(held)
+        assert held.seconds == 60 * 60 and db_session.query(DailyStudyTotal).count() == 1
+
+    def test_limit_forecast(self, db_session):
+        from backend.models.models import StudySession
+        from backend.models.limit_models import DailyStudyTotal
+        from backend.services.study_totals import limit_forecast
+        now = datetime(2026, 3, 1, 20, 0)
+        db_session.add(DailyStudyTotal(user_id=None, day=now.date(), seconds=60 * 60))
+        db_session.commit()
+        assert limit_forecast(db_session, None, 120, now)["limit_at"] is None
+
+        db_session.add(StudySession(session_type="work", start_time=now - timedelta(minutes=30)))
+        db_session.commit()
+        forecast = limit_forecast(db_session, None, 120, now)
+        assert forecast["used_minutes"] == 90 and forecast["remaining_seconds"] == 30 * 60
+        assert forecast["limit_at"] == now + timedelta(minutes=30)
+        # Past midnight the budget starts over
+        forecast = limit_forecast(db_session, None, 360, now)
+        assert forecast["limit_at"] == datetime(2026, 3, 2, 6, 0)
+        assert limit_forecast(db_session, None, 60, now)["limit_reached"] is True
+
+        response = client.get("/api/limits/forecast")
+        assert response.status_code == 200
+        assert response.json()["resets_at"].endswith("Z")
+
+    def test_split_by_day(self):
+        from backend.services.study_totals import split_by_day
+        segments = list(split_by_day(datetime(2026, 3, 1, 23, 30), datetime(2026, 3, 2, 0, 45)))
+        assert segments == [(date(2026, 3, 1), 1800.0), (date(2026, 3, 2), 2700.0)]
+
 class TestBreaks:
     def test_break_activities_crud(self, db_session):
         # Create
@@ -276,3 +760,633 @@ class TestBreaks:
         # Note: Default activities might exist, so we check if our specific one is gone
         ids = [a["id"] for a in response.json()]
         assert activity_id not in ids
+
+    def test_settings_etag_cache(self, db_session):
+        client.get("/api/settings/")  # creates the default settings row
+        response = client.get("/api/settings/")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        # A repeat read is served from memory and revalidates to 304
+        response = client.get("/api/settings/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["x-db-query-count"] == "0"
+
+        payload = dict(client.get("/api/settings/").json(), work_interval=50)
+        payload.pop("id"), payload.pop("break_activities")
+        assert client.put("/api/settings/", json=payload).status_code == 200
+        response = client.get("/api/settings/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["work_interval"] == 50
+
+        activities = client.get("/api/break-activities/")
+        client.post("/api/break-activities/", json={"name": "Walk", "duration": 5, "activity_type": "short"})
+        response = client.get("/api/break-activities/", headers={"If-None-Match": activities.headers["etag"]})
+        assert response.status_code == 200
+        assert [a["name"] for a in response.json()] == ["Walk"]
+
+class TestTimerState:
+    def test_timer_state_machine(self):
+        from backend.services.timer_state import new_timer_state, apply_action, evaluate
+        start = datetime(2026, 3, 1, 9, 0)
+        state = new_timer_state(1)
+        apply_action(state, "start", start, {"work_seconds": 600, "cycles_before_long_break": 2})
+        snapshot = evaluate(state, start + timedelta(seconds=90))
+        assert snapshot["status"] == "running" and snapshot["time_remaining"] == 510
+        assert snapshot["ends_at"] == start + timedelta(seconds=600)
+
+        apply_action(state, "pause", start + timedelta(seconds=100))
+        # Paused time doesn't count
+        assert evaluate(state, start + timedelta(hours=1))["time_remaining"] == 500
+        apply_action(state, "start", start + timedelta(seconds=200))
+        snapshot = evaluate(state, start + timedelta(seconds=800))
+        assert snapshot["status"] == "complete" and snapshot["time_remaining"] == 0
+        with pytest.raises(ValueError):
+            apply_action(state, "start", start + timedelta(seconds=800))
+
+        apply_action(state, "next", start + timedelta(seconds=800))
+        assert (state.phase, state.status, state.completed_intervals) == ("short_break", "idle", 1)
+        apply_action(state, "next", start)
+        apply_action(state, "next", start)
+        assert state.phase == "long_break"
+
+    def test_switching_method_resets_work_length(self):
+        from backend.services.timer_state import new_timer_state, apply_action, evaluate
+        state = new_timer_state(1)
+        apply_action(state, "reset", config={"method": "flowtime"})
+        assert evaluate(state)["phase_duration"] is None
+        apply_action(state, "reset", config={"method": "52-17"})
+        assert state.work_seconds == 52 * 60
+        apply_action(state, "reset", config={"method": "flowtime", "work_seconds": 900})
+        assert state.work_seconds == 900
+
+    def test_timer_endpoints(self, db_session):
+        assert client.get("/api/timer/state").json()["status"] == "idle"
+        assert client.post("/api/timer/start").status_code == 401
+
+        client.post("/signup", data={"username": "a", "email": "a@e.com", "password": "p"})
+        client.post("/login", data={"username": "a", "password": "p"})
+        response = client.post("/api/timer/start", json={"method": "pomodoro", "work_seconds": 1500})
+        assert response.status_code == 200
+        state = response.json()
+        assert state["status"] == "running" and state["ends_at"].endswith("Z")
+
+        # Another tab syncs with one conditional GET
+        response = client.get("/api/timer/state", headers={"If-None-Match": response.headers["etag"]})
+        assert response.status_code == 304
+        # A stale tab can't act on an old version
+        assert client.post("/api/timer/pause", json={"version": state["version"] - 1}).status_code == 409
+        response = client.post("/api/timer/pause", json={"version": state["version"]})
+        assert response.json()["status"] == "paused"
+        assert client.post("/api/timer/pause").status_code == 409
+        assert client.post("/api/timer/bogus").status_code == 404
+        client.get("/logout")
+
+    def test_completed_phase_changes_etag(self, db_session):
+        from backend.models.time_models import UserTimerState
+        client.post("/signup", data={"username": "a", "email": "a@e.com", "password": "p"})
+        client.post("/login", data={"username": "a", "password": "p"})
+        response = client.post("/api/timer/start", json={"work_seconds": 60})
+        etag = response.headers["etag"]
+
+        # The phase runs out without any write; a cached "running" body is no longer valid
+        state = db_session.query(UserTimerState).one()
+        state.started_at -= timedelta(minutes=5)
+        db_session.commit()
+        response = client.get("/api/timer/state", headers={"If-None-Match": etag})
+        assert response.status_code == 200 and response.json()["status"] == "complete"
+        assert response.headers["etag"] != etag
+        client.get("/logout")
+
+class TestTimeStats:
+    @pytest.fixture
+    def user_and_methods(self, db_session):
+        from backend.models.time_models import TimeMethod, TimeMethodType
+        user = user_models.User(username="stats", email="stats@e.com", password_hash="x")
+        pomodoro = TimeMethod(method_type=TimeMethodType.POMODORO, name="Pomodoro", work_duration=25, break_duration=5)
+        flow = TimeMethod(method_type=TimeMethodType.FLOWTIME, name="Flowtime", break_duration=10, is_variable=True)
+        db_session.add_all([user, pomodoro, flow])
+        db_session.commit()
+        return user, pomodoro, flow
+
+    def test_session_stats_use_full_window(self, db_session, user_and_methods):
+        from backend.crud import time_crud
+        from backend.models.time_models import WorkSession
+        from backend.core.query_stats import RequestQueryStats, _current_stats
+        user, pomodoro, flow = user_and_methods
+        now = datetime.utcnow()
+        # More sessions than the old 100-row cap, spread over the last 20 days
+        for i in range(150):
+            db_session.add(WorkSession(
+                user_id=user.id, method_id=pomodoro.id if i % 3 else flow.id, planned_duration=25,
+                actual_duration=20, completed=i % 2 == 0, focus_score=0.5 if i % 2 == 0 else None,
+                started_at=now - timedelta(hours=3 * i + 1)
+            ))
+        db_session.commit()
+
+        stats = time_crud.get_user_session_stats(db_session, user.id, days=30)
+        assert stats["total_sessions"] == 150
+        assert stats["completed_sessions"] == 75
+        assert stats["total_duration_minutes"] == 75 * 20
+        assert stats["preferred_method"] == "Pomodoro"
+        assert stats["focus_score_avg"] == pytest.approx(0.5)
+
+        # Closed days come from the cache; only the fingerprint and today's aggregate run again
+        stats_token = _current_stats.set(RequestQueryStats())
+        try:
+            assert time_crud.get_user_session_stats(db_session, user.id, days=30) == stats
+            assert _current_stats.get().count == 2
+        finally:
+            _current_stats.reset(stats_token)
+
+        # Today's sessions are re-read without touching the cached days
+        time_crud.create_work_session(db_session, time_crud.WorkSessionBase(
+            user_id=user.id, method_id=flow.id, planned_duration=25, started_at=now
+        ))
+        user_id = user.id
+        stats_token = _current_stats.set(RequestQueryStats())
+        try:
+            assert time_crud.get_user_session_stats(db_session, user_id, days=30)["total_sessions"] == 151
+            assert _current_stats.get().count == 2
+        finally:
+            _current_stats.reset(stats_token)
+
+        # Recording a back-dated session invalidates the cached days
+        time_crud.create_work_session(db_session, time_crud.WorkSessionBase(
+            user_id=user.id, method_id=flow.id, planned_duration=25, started_at=now - timedelta(days=10)
+        ))
+        assert time_crud.get_user_session_stats(db_session, user.id, days=30)["total_sessions"] == 152
+
+        # A session written by another worker, without going through this process's crud
+        db_session.add(WorkSession(
+            user_id=user.id, method_id=flow.id, planned_duration=25, started_at=now - timedelta(days=12)
+        ))
+        db_session.commit()
+        assert time_crud.get_user_session_stats(db_session, user.id, days=30)["total_sessions"] == 153
+
+    def test_recommendation_from_method_totals(self, db_session, user_and_methods):
+        from backend.crud import time_crud
+        from backend.models.time_models import UserMethodStats
+        user, pomodoro, flow = user_and_methods
+        assert time_crud.recommend_time_method(db_session, user.id)["method"].name == "Pomodoro"
+
+        now = datetime.utcnow()
+        def record(method, completed, focus, minutes, hours_ago):
+            time_crud.create_work_session(db_session, time_crud.WorkSessionBase(
+                user_id=user.id, method_id=method.id, planned_duration=25, actual_duration=minutes,
+                completed=completed, focus_score=focus, started_at=now - timedelta(hours=hours_ago)
+            ))
+
+        record(flow, False, None, 10, 1)
+        # Nothing completed yet: the most recently tried method
+        assert time_crud.recommend_time_method(db_session, user.id)["method"].name == "Flowtime"
+
+        record(pomodoro, True, 0.4, 25, 5)
+        record(flow, True, 0.9, 50, 3)
+        record(flow, True, 0.7, 50, 2)
+        stats = db_session.query(UserMethodStats).filter_by(method_id=flow.id).one()
+        assert (stats.sessions, stats.completed, stats.duration_sum) == (3, 2, 100)
+        assert stats.focus_sum == pytest.approx(1.6)
+
+        recommendation = time_crud.recommend_time_method(db_session, user.id)
+        assert recommendation["method"].name == "Flowtime"
+        assert recommendation["confidence"] == pytest.approx(0.8 * 0.6 + (50 / 60) * 0.4)
+
+    def test_method_stats_increment_in_sql(self, db_session, user_and_methods):
+        from backend.crud import time_crud
+        from backend.models.time_models import UserMethodStats
+        user, pomodoro, flow = user_and_methods
+        session = lambda: time_crud.WorkSessionBase(
+            user_id=user.id, method_id=flow.id, planned_duration=25, started_at=datetime.utcnow()
+        )
+        time_crud.create_work_session(db_session, session())
+        # This worker holds the row while another one records a session
+        held = db_session.query(UserMethodStats).one()
+        assert held.sessions == 1
+        other = TestingSessionLocal()
+        time_crud.create_work_session(other, session())
+        other.close()
+
+        time_crud.create_work_session(db_session, session())
+        db_session.refresh(held)
+        assert held.sessions == 3
+
+    def test_productivity_analytics(self, db_session, user_and_methods):
+        from backend.crud import time_crud
+        from backend.models.time_models import WorkSession
+        from backend.core.query_stats import RequestQueryStats, _current_stats
+        user, pomodoro, _ = user_and_methods
+        today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        yesterday = today - timedelta(days=1)
+        for started, minutes, focus in [
+            (today + timedelta(hours=9, minutes=10), 30, None),
+            (today + timedelta(hours=9, minutes=40), 25, 0.8),
+            (yesterday + timedelta(hours=14), 50, 0.6),
+            (today - timedelta(days=40), 90, 1.0),  # outside the window
+        ]:
+            db_session.add(WorkSession(user_id=user.id, method_id=pomodoro.id, planned_duration=25,
+                                       actual_duration=minutes, focus_score=focus, started_at=started))
+        db_session.commit()
+
+        result = time_crud.get_productivity_analytics(db_session, user.id, days=30, window=2)
+        heatmap, trend = result["heatmap"], result["trend"]
+        assert heatmap["minutes"][today.weekday()][9] == 55
+        assert heatmap["sessions"][today.weekday()][9] == 2
+        assert heatmap["focus"][today.weekday()][9] == 0.8
+        assert heatmap["focus"][yesterday.weekday()][14] == 0.6
+        assert heatmap["focus"][today.weekday()][10] is None
+        assert sum(map(sum, heatmap["sessions"])) == 3
+        assert len(trend["dates"]) == 30 and trend["dates"][-1] == today.date().isoformat()
+        assert trend["minutes"][-2:] == [50, 55]
+        assert trend["rolling_minutes"][-1] == 52.5
+        assert trend["rolling_focus"][-1] == pytest.approx(0.7)
+        assert trend["rolling_focus"][0] is None
+
+        # Cached until another session arrives: only the freshness check runs
+        stats_token = _current_stats.set(RequestQueryStats())
+        try:
+            assert time_crud.get_productivity_analytics(db_session, user.id, days=30, window=2) == result
+            assert _current_stats.get().count == 1
+        finally:
+            _current_stats.reset(stats_token)
+
+        time_crud.create_work_session(db_session, time_crud.WorkSessionBase(
+            user_id=user.id, method_id=pomodoro.id, planned_duration=25, actual_duration=5,
+            started_at=today + timedelta(hours=9)
+        ))
+        result = time_crud.get_productivity_analytics(db_session, user.id, days=30, window=2)
+        assert result["heatmap"]["minutes"][today.weekday()][9] == 60
+
+    def test_simulate_methods(self):
+        import numpy as np
+        from backend.crud.time_crud import simulate_methods
+        # Pomodoro 25/5 with a 15-minute break after 4 rounds, and 52/17
+        work, breaks = simulate_methods(
+            np.array([130.0, 60.0, 70.0]), np.array([25.0, 52.0]), np.array([5.0, 17.0]),
+            np.array([15.0, 17.0]), np.array([4.0, 1.0])
+        )
+        assert work.tolist() == [[100, 50, 60], [104, 52, 53]]
+        assert breaks.tolist() == [[30, 10, 10], [26, 8, 17]]
+
+    def test_method_comparison(self, db_session, user_and_methods):
+        from backend.crud import time_crud
+        from backend.models.time_models import WorkSession
+        from backend.core.query_stats import RequestQueryStats, _current_stats
+        user, pomodoro, flow = user_and_methods
+        yesterday = datetime.utcnow() - timedelta(days=1)
+        for minutes, focus in [(20, 0.9), (40, 0.5)]:
+            db_session.add(WorkSession(user_id=user.id, method_id=flow.id, planned_duration=minutes,
+                                       actual_duration=minutes, focus_score=focus, started_at=yesterday))
+        db_session.commit()
+
+        result = time_crud.compare_time_methods(db_session, user.id, days=30)
+        assert result["active_days"] == 1 and result["minutes_per_day"] == 60
+        best, other = result["methods"]
+        # 25-minute intervals fit twice into the hour and score better on the fitted focus line
+        assert (best["name"], best["work_minutes_per_day"], best["expected_focus"]) == ("Pomodoro", 50, 0.8)
+        assert best["focused_minutes_per_day"] == 40 and best["break_overhead"] == pytest.approx(0.167)
+        # Flowtime uses the user's median session (30 min) and a fifth of it as break
+        assert (other["work_interval"], other["work_minutes_per_day"], other["expected_focus"]) == (30, 50, 0.7)
+
+        stats_token = _current_stats.set(RequestQueryStats())
+        try:
+            assert time_crud.compare_time_methods(db_session, user.id, days=30) == result
+            assert _current_stats.get().count == 1
+        finally:
+            _current_stats.reset(stats_token)
+
+    def test_bulk_work_sessions(self, db_session, user_and_methods):
+        from backend.crud import time_crud
+        from backend.models.time_models import WorkSession, UserMethodStats
+        from backend.core.query_stats import RequestQueryStats, _current_stats
+        user, pomodoro, flow = user_and_methods
+        started = "2026-03-01T09:00:00"
+        items = [
+            {"method_id": pomodoro.id, "planned_duration": 25, "actual_duration": 25,
+             "completed": True, "focus_score": 0.8, "started_at": started, "user_id": 999},
+            {"method_id": 12345, "planned_duration": 25, "started_at": started},
+            {"method_id": flow.id, "planned_duration": 0, "started_at": started},
+            "not a session",
+        ] + [{"method_id": flow.id, "planned_duration": 50, "started_at": started}] * 20
+
+        time_crud.get_all_time_methods(db_session)  # load the reference snapshot
+        stats_token = _current_stats.set(RequestQueryStats())
+        try:
+            result = time_crud.create_work_sessions_bulk(db_session, user.id, items)
+            # One insert plus the stats lookup and writes: not one per session
+            assert _current_stats.get().count <= 8
+        finally:
+            _current_stats.reset(stats_token)
+
+        assert result["created"] == 21
+        assert [s["index"] for s in result["sessions"]] == [0] + list(range(4, 24))
+        first = db_session.get(WorkSession, result["sessions"][0]["id"])
+        assert (first.method_id, first.completed) == (pomodoro.id, True)
+        assert [e["index"] for e in result["errors"]] == [1, 2, 3]
+        assert "not found" in result["errors"][0]["detail"]
+        assert "planned_duration" in result["errors"][1]["detail"]
+        # The owner comes from the caller, not the payload
+        assert db_session.query(WorkSession).filter_by(user_id=user.id).count() == 21
+        assert db_session.query(UserMethodStats).filter_by(method_id=flow.id).one().sessions == 20
+
+    def test_bulk_endpoint_reports_non_objects_per_item(self, db_session, user_and_methods):
+        from fastapi import FastAPI
+        from backend.core.dependencies import get_current_user as current_user_dependency
+        from backend.routes import time_routes
+        user, pomodoro, _ = user_and_methods
+        time_app = FastAPI()
+        time_app.include_router(time_routes.router)
+        time_app.dependency_overrides[get_db] = override_get_db
+        time_app.dependency_overrides[current_user_dependency] = lambda: user
+
+        response = TestClient(time_app).post("/api/time/sessions/bulk", json=[
+            "not a session",
+            {"method_id": pomodoro.id, "planned_duration": 25, "started_at": "2026-03-01T09:00:00"},
+        ])
+        assert response.status_code == 200
+        body = response.json()
+        assert body["created"] == 1 and body["sessions"][0]["index"] == 1
+        assert body["errors"] == [{"index": 0, "detail": "each session must be an object"}]
+
+    def test_reference_snapshot(self, db_session, user_and_methods):
+        from backend.crud import time_crud
+        from backend.models.time_models import TimeMethodType
+        _, pomodoro, _ = user_and_methods
+        assert client.get("/api/achievements").json()[0]["name"] == "First Steps"
+        # Served from the snapshot without touching the database
+        assert client.get("/api/achievements").headers["X-DB-Query-Count"] == "0"
+        assert time_crud.get_time_method_by_type(db_session, TimeMethodType.POMODORO).id == pomodoro.id
+
+        # A committed change bumps the stored version and drops the snapshot
+        db_session.add(user_models.Achievement(
+            name="Finisher", description="Complete an assignment", requirement_type="assignments_completed"
+        ))
+        db_session.commit()
+        assert [a["name"] for a in client.get("/api/achievements").json()] == ["First Steps", "Finisher"]
+
+class TestMusicStreaming:
+    def test_play_route_is_served(self, db_session):
+        from backend.main import app as api_app
+        from backend.core.dependencies import get_current_user_optional
+        from backend.models.music_models import Track, TrackSourceType
+        track = Track(title="Rain", source_type=TrackSourceType.URL, url="https://example.com/rain.mp3")
+        db_session.add(track)
+        db_session.commit()
+        api_app.dependency_overrides[get_db] = override_get_db
+        api_app.dependency_overrides[get_current_user_optional] = lambda: None
+        try:
+            response = TestClient(api_app).get(f"/api/music/tracks/{track.id}/play")
+        finally:
+            api_app.dependency_overrides.clear()
+        assert response.status_code == 200 and response.json() == {"url": "https://example.com/rain.mp3"}
+
+    def test_range_file_response(self, tmp_path):
+        from fastapi import FastAPI, Request
+        from backend.core.file_responses import RangeFileResponse, parse_range, RangeNotSatisfiable
+        track = tmp_path / "1.mp3"
+        track.write_bytes(bytes(range(256)) * 4)
+        stream_app = FastAPI()
+
+        @stream_app.get("/play")
+        def play(request: Request):
+            return RangeFileResponse(request, track, media_type="audio/mpeg", filename=track.name)
+
+        stream_client = TestClient(stream_app)
+        full = stream_client.get("/play")
+        assert full.status_code == 200 and full.content == track.read_bytes()
+        assert full.headers["accept-ranges"] == "bytes"
+        assert "immutable" in full.headers["cache-control"]
+        etag, last_modified = full.headers["etag"], full.headers["last-modified"]
+
+        part = stream_client.get("/play", headers={"Range": "bytes=100-199"})
+        assert part.status_code == 206 and part.content == track.read_bytes()[100:200]
+        assert part.headers["content-range"] == "bytes 100-199/1024"
+        assert stream_client.get("/play", headers={"Range": "bytes=-24"}).content == track.read_bytes()[-24:]
+        assert stream_client.get("/play", headers={"Range": "bytes=100-", "If-Range": etag}).status_code == 206
+        # A stale If-Range gets the whole file instead of a mismatched piece
+        assert stream_client.get("/play", headers={"Range": "bytes=100-", "If-Range": '"old"'}).status_code == 200
+
+        missed = stream_client.get("/play", headers={"Range": "bytes=5000-"})
+        assert missed.status_code == 416 and missed.headers["content-range"] == "bytes */1024"
+
+        assert stream_client.get("/play", headers={"If-None-Match": etag}).status_code == 304
+        assert stream_client.get("/play", headers={"If-Modified-Since": last_modified}).status_code == 304
+        assert parse_range("bytes=0-1,5-6", 10) is None and parse_range("items=0-1", 10) is None
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range("bytes=-0", 10)
+
+    def test_streamed_upload(self, tmp_path):
+        import asyncio
+        import hashlib
+        import io
+        from fastapi import UploadFile
+        from backend.services import uploads
+        data = os.urandom(3 * uploads.CHUNK_SIZE + 10)
+
+        stored = asyncio.run(uploads.save_upload(UploadFile(file=io.BytesIO(data), filename="a.mp3"), tmp_path, suffix=".mp3"))
+        assert stored.size == len(data) and stored.sha256 == hashlib.sha256(data).hexdigest()
+        assert stored.path.parent == tmp_path and stored.path.read_bytes() == data
+        assert stored.path.name.startswith(stored.sha256) and stored.path.suffix == ".mp3"
+        # The same content uploaded again gets its own file
+        again = asyncio.run(uploads.save_upload(UploadFile(file=io.BytesIO(data), filename="a.mp3"), tmp_path, suffix=".mp3"))
+        assert again.sha256 == stored.sha256 and again.path != stored.path
+        assert sorted(tmp_path.iterdir()) == sorted([stored.path, again.path])
+
+        # Over the limit: stopped mid-stream and nothing is left on disk
+        with pytest.raises(uploads.UploadTooLarge):
+            asyncio.run(uploads.save_upload(
+                UploadFile(file=io.BytesIO(data), filename="b.mp3"), tmp_path / "big", max_bytes=2 * uploads.CHUNK_SIZE
+            ))
+        assert list((tmp_path / "big").iterdir()) == []
+
+    def test_oversized_upload_refused_before_parsing(self, monkeypatch):
+        from fastapi import APIRouter, FastAPI, File, UploadFile
+        from backend.services import uploads
+        monkeypatch.setattr(settings, "MAX_CONTENT_LENGTH", 1024)
+        monkeypatch.setattr(uploads, "MULTIPART_OVERHEAD", 1024)
+        parsed = []
+        router = APIRouter(route_class=uploads.UploadLimitRoute)
+
+        @router.post("/upload")
+        async def upload(file: UploadFile = File(...)):
+            parsed.append(file.filename)
+            return {"size": len(await file.read())}
+
+        upload_app = FastAPI()
+        upload_app.include_router(router)
+        upload_client = TestClient(upload_app)
+
+        assert upload_client.post("/upload", files={"file": ("a.mp3", b"x" * 1000)}).json() == {"size": 1000}
+        assert upload_client.post("/upload", files={"file": ("b.mp3", b"x" * 4096)}).status_code == 413
+        # Without a Content-Length the body is cut off as it streams in
+        chunks = (b"x" * 1024 for _ in range(8))
+        streamed = upload_client.post("/upload", content=chunks, headers={"Content-Type": "multipart/form-data; boundary=b"})
+        assert streamed.status_code == 413
+        assert parsed == ["a.mp3"]
+
+class TestDatabaseEngine:
+    def test_memory_sqlite_uses_static_pool(self):
+        from backend.database import create_db_engine
+        mem_engine = create_db_engine("sqlite:///:memory:")
+        assert isinstance(mem_engine.pool, StaticPool)
+
+    def test_file_engine_records_pool_metrics(self, tmp_path):
+        from backend.database import create_db_engine, get_pool_stats
+        file_engine = create_db_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=2, max_overflow=1)
+        with file_engine.connect():
+            stats = get_pool_stats(file_engine)
+            assert stats["checked_out"] == 1
+            assert stats["saturation"] == round(1 / 3, 4)
+        stats = get_pool_stats(file_engine)
+        assert stats["checkouts"] == 1
+        assert stats["checked_out"] == 0
+        file_engine.dispose()
+
+    def test_async_url_derivation(self):
+        from backend.database import to_async_url
+        assert to_async_url("sqlite:///./timeflow.db").drivername == "sqlite+aiosqlite"
+        assert to_async_url("postgresql://u:p@localhost/db").drivername == "postgresql+asyncpg"
+
+    def test_pool_metrics_endpoint(self):
+        response = client.get("/api/metrics/db-pool")
+        assert response.status_code == 200
+        assert "pool_class" in response.json()["sync"]
+
+class TestQueryInstrumentation:
+    def test_query_headers(self, db_session):
+        response = client.get("/api/leaderboard")
+        assert response.status_code == 200
+        assert int(response.headers["X-DB-Query-Count"]) >= 1
+        assert float(response.headers["X-DB-Time-Ms"]) >= 0
+
+    def test_leaderboard_query_count_is_constant(self, db_session):
+        for i in range(5):
+            db_session.add(user_models.User(username=f"user{i}", email=f"u{i}@e.com", password_hash="x"))
+        db_session.commit()
+        few = int(client.get("/api/leaderboard").headers["X-DB-Query-Count"])
+
+        for i in range(5, 15):
+            db_session.add(user_models.User(username=f"user{i}", email=f"u{i}@e.com", password_hash="x"))
+        db_session.commit()
+        many = int(client.get("/api/leaderboard").headers["X-DB-Query-Count"])
+        assert many == few
+
+    def test_query_budget_guard(self, db_session, monkeypatch):
+        from backend.core.query_stats import QueryBudgetExceeded
+        monkeypatch.setattr(settings, "SQL_QUERY_BUDGET", 1)
+        with pytest.raises(QueryBudgetExceeded):
+            client.get("/api/limits/setting")
+
+    def test_query_metrics_endpoint(self, db_session):
+        client.get("/api/leaderboard")
+        response = client.get("/api/metrics/db-queries")
+        assert response.status_code == 200
+        assert response.json()["/api/leaderboard"]["requests"] >= 1
+
+class TestRequestMetrics:
+    def test_histogram_buckets(self):
+        from backend.core.metrics import RequestMetrics, render_request_metrics
+        metrics = RequestMetrics()
+        metrics.observe("GET", "/api/x/{id}", 200, 0.003)
+        metrics.observe("GET", "/api/x/{id}", 204, 0.2)
+        metrics.observe("GET", "/api/x/{id}", 404, 0.02)
+        lines = render_request_metrics(metrics)
+        assert 'timeflow_http_requests_total{method="GET",route="/api/x/{id}",status="2xx"} 2' in lines
+        assert 'timeflow_http_request_duration_seconds_bucket{method="GET",route="/api/x/{id}",status="2xx",le="0.005"} 1' in lines
+        assert 'timeflow_http_request_duration_seconds_bucket{method="GET",route="/api/x/{id}",status="2xx",le="+Inf"} 2' in lines
+        assert 'timeflow_http_request_duration_seconds_count{method="GET",route="/api/x/{id}",status="4xx"} 1' in lines
+
+    def test_metrics_endpoint(self, db_session):
+        client.get("/api/leaderboard")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert 'timeflow_http_requests_total{method="GET",route="/api/leaderboard",status="2xx"}' in body
+        assert "timeflow_http_requests_in_flight 1" in body
+        assert 'timeflow_db_pool_checked_out{engine="sync"}' in body
+
+class TestBootstrap:
+    def test_bootstrap_runs_once(self, tmp_path):
+        from backend.bootstrap import bootstrap, read_versions, SCHEMA_VERSION, SEED_VERSION
+        boot_engine = create_engine(f"sqlite:///{tmp_path / 'boot.db'}")
+
+        assert bootstrap(boot_engine) == {"schema": True, "seed": True}
+        versions = read_versions(boot_engine)
+        assert versions.pop("schema_version") == str(SCHEMA_VERSION)
+        assert versions.pop("seed_version") == str(SEED_VERSION)
+        # Seeding reference rows also moves the reference-data version on
+        assert int(versions.pop("reference_version")) >= 1 and versions == {}
+        # Second run only reads app_meta
+        assert bootstrap(boot_engine) == {"schema": False, "seed": False}
+        boot_engine.dispose()
+
+    def test_failed_seed_is_retried(self, tmp_path, monkeypatch):
+        from sqlalchemy.exc import ArgumentError
+        from backend.bootstrap import bootstrap, read_versions
+        boot_engine = create_engine(f"sqlite:///{tmp_path / 'boot.db'}")
+
+        # The achievements seed catches its own errors; bootstrap must still see them
+        monkeypatch.setattr(user_models, "Achievement", object())
+        with pytest.raises(ArgumentError):
+            bootstrap(boot_engine)
+        assert "seed_version" not in read_versions(boot_engine)
+
+        monkeypatch.undo()
+        assert bootstrap(boot_engine) == {"schema": False, "seed": True}
+        boot_engine.dispose()
+
+    def test_calendar_owner_migration(self, tmp_path):
+        from sqlalchemy import inspect, text
+        from backend.bootstrap import bootstrap, read_versions, SCHEMA_VERSION
+        boot_engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with boot_engine.begin() as conn:
+            # A v1 database: calendar_blocks without user_id
+            conn.execute(text("CREATE TABLE calendar_blocks (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, "
+                              "start_datetime DATETIME NOT NULL, end_datetime DATETIME NOT NULL, "
+                              "block_type VARCHAR NOT NULL, assignment_id INTEGER)"))
+            conn.execute(text("CREATE TABLE app_meta (key VARCHAR(50) PRIMARY KEY, value VARCHAR(200), updated_at DATETIME)"))
+            conn.execute(text("INSERT INTO app_meta (key, value) VALUES ('schema_version', '1'), ('seed_version', '1')"))
+
+        assert bootstrap(boot_engine) == {"schema": True, "seed": False}
+        assert "user_id" in {c["name"] for c in inspect(boot_engine).get_columns("calendar_blocks")}
+        assert read_versions(boot_engine)["schema_version"] == str(SCHEMA_VERSION)
+        boot_engine.dispose()
+
+    def test_study_totals_migration(self, tmp_path):
+        from sqlalchemy import text
+        from backend.bootstrap import bootstrap
+        boot_engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with boot_engine.begin() as conn:
+            # A v4 database: study_sessions without user_id, one finished session over midnight
+            conn.execute(text("CREATE TABLE study_sessions (id INTEGER PRIMARY KEY, start_time DATETIME NOT NULL, "
+                              "end_time DATETIME, session_type VARCHAR(20) NOT NULL, assignment_id INTEGER)"))
+            conn.execute(text("INSERT INTO study_sessions (start_time, end_time, session_type) VALUES "
+                              "('2026-03-01 23:30:00.000000', '2026-03-02 00:45:00.000000', 'work')"))
+            conn.execute(text("CREATE TABLE app_meta (key VARCHAR(50) PRIMARY KEY, value VARCHAR(200), updated_at DATETIME)"))
+            conn.execute(text("INSERT INTO app_meta (key, value) VALUES ('schema_version', '4'), ('seed_version', '1')"))
+
+        assert bootstrap(boot_engine) == {"schema": True, "seed": False}
+        with boot_engine.connect() as conn:
+            rows = conn.execute(text("SELECT day, seconds FROM daily_study_totals ORDER BY day")).all()
+        assert [tuple(r) for r in rows] == [("2026-03-01", 1800), ("2026-03-02", 2700)]
+        boot_engine.dispose()
+
+    def test_method_stats_backfill(self, tmp_path):
+        from sqlalchemy import text
+        from backend.bootstrap import bootstrap
+        boot_engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with boot_engine.begin() as conn:
+            conn.execute(text("CREATE TABLE work_sessions (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, "
+                              "method_id INTEGER NOT NULL, planned_duration INTEGER, actual_duration INTEGER, "
+                              "completed BOOLEAN, interruptions INTEGER, focus_score FLOAT, "
+                              "started_at DATETIME NOT NULL, ended_at DATETIME, created_at DATETIME)"))
+            conn.execute(text("INSERT INTO work_sessions (user_id, method_id, actual_duration, completed, focus_score, started_at) "
+                              "VALUES (1, 2, 30, 1, 0.5, '2026-03-01 09:00:00'), (1, 2, 10, 0, NULL, '2026-03-02 09:00:00')"))
+            conn.execute(text("CREATE TABLE app_meta (key VARCHAR(50) PRIMARY KEY, value VARCHAR(200), updated_at DATETIME)"))
+            conn.execute(text("INSERT INTO app_meta (key, value) VALUES ('schema_version', '6'), ('seed_version', '1')"))
+
+        assert bootstrap(boot_engine) == {"schema": True, "seed": False}
+        with boot_engine.connect() as conn:
+            row = conn.execute(text("SELECT sessions, completed, focus_sum, duration_sum FROM user_method_stats")).one()
+        assert tuple(row) == (2, 1, 0.5, 30)
+        boot_engine.dispose()